@@ -8,11 +8,15 @@ def _isolate_session_manager():
     # Tools use a global singleton session manager. Keep tests isolated.
     from word_document_server.session_manager import get_session_manager
     from word_document_server.undo_manager import get_undo_manager
+    from word_document_server.utils.parse_cache import get_parse_cache
 
     mgr = get_session_manager()
     undo_mgr = get_undo_manager()
+    parse_cache = get_parse_cache()
     mgr.close_all_documents()
     undo_mgr.clear_history()
+    parse_cache.invalidate()
     yield
     mgr.close_all_documents()
     undo_mgr.clear_history()
+    parse_cache.invalidate()
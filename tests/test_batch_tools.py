@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from docx import Document
+
+from tests.helpers import write_docx
+from word_document_server.tools.batch_tools import batch_edit
+from word_document_server.tools.session_tools import open_document
+from word_document_server.tools.undo_tools import session_undo
+from word_document_server.undo_manager import get_undo_manager
+
+
+def test_batch_edit_applies_all_operations_with_one_snapshot(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["draft text"])
+    before = p.read_bytes()
+
+    result = asyncio.run(
+        batch_edit(
+            filename=str(p),
+            operations=[
+                {"tool": "add_text_content", "args": {"text": "Results", "content_type": "heading", "level": 1}},
+                {"tool": "add_table", "args": {"rows": 1, "cols": 2, "data": [["a", "b"]]}},
+                {"tool": "enhanced_search_and_replace", "args": {"find_text": "draft", "replace_text": "final"}},
+            ],
+        )
+    )
+    assert "batch applied 3 operations" in result.lower()
+
+    doc = Document(str(p))
+    assert [para.text for para in doc.paragraphs] == ["final text", "Results"]
+    assert len(doc.tables) == 1
+    assert "undo=1," in get_undo_manager().list_history(str(p))
+
+    session_undo(action="undo", filename=str(p))
+    assert p.read_bytes() == before
+
+
+def test_batch_edit_rolls_back_on_failure(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    open_document("main", str(p))
+    before = p.read_bytes()
+
+    result = asyncio.run(
+        batch_edit(
+            document_id="main",
+            operations=[
+                {"tool": "add_text_content", "args": {"text": "should vanish"}},
+                {"tool": "add_text_content", "args": {"text": "x", "position": "nowhere"}},
+            ],
+        )
+    )
+    assert "rolled back at operation 2" in result.lower()
+    assert p.read_bytes() == before
+    assert "undo=0," in get_undo_manager().list_history(str(p))
+
+    # The resident session document must not retain the partial edit.
+    follow_up = asyncio.run(batch_edit(document_id="main", operations=[{"tool": "add_table", "args": {"rows": 1, "cols": 1}}]))
+    assert "batch applied" in follow_up.lower()
+    assert "should vanish" not in [para.text for para in Document(str(p)).paragraphs]
+
+
+def test_batch_edit_rejects_unknown_tools_and_per_operation_targets(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+
+    res = asyncio.run(batch_edit(filename=str(p), operations=[{"tool": "convert_to_pdf"}]))
+    assert "unsupported tool" in res.lower()
+
+    res = asyncio.run(
+        batch_edit(filename=str(p), operations=[{"tool": "add_table", "args": {"filename": "other.docx", "rows": 1, "cols": 1}}])
+    )
+    assert "must not set" in res.lower()
+
+
+def test_batch_edit_rolls_back_failures_whatever_their_message(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello world"])
+    before = p.read_bytes()
+
+    # The second word's search fails; the result reads "'': Error: ...".
+    result = asyncio.run(
+        batch_edit(
+            filename=str(p),
+            operations=[
+                {"tool": "add_text_content", "args": {"text": "should vanish"}},
+                {"tool": "format_document", "args": {"action": "words", "word_list": ["Hello", ""], "bold": True,
+                                                     "start_paragraph": 0}},
+            ],
+        )
+    )
+    assert "rolled back at operation 2" in result.lower()
+    assert p.read_bytes() == before
+
+    result = asyncio.run(
+        batch_edit(
+            filename=str(p),
+            operations=[
+                {"tool": "enhanced_search_and_replace", "args": {"find_text": "absent", "replace_text": "x"}},
+                {"tool": "add_text_content", "args": {"text": "kept"}},
+            ],
+        )
+    )
+    assert "batch applied 2 operations" in result.lower()
+    assert [para.text for para in Document(str(p)).paragraphs] == ["Hello world", "kept"]
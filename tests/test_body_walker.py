@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from docx import Document
+from docx.oxml import parse_xml
+
+from word_document_server.tools.content_tools import enhanced_search_and_replace
+from word_document_server.tools.review_tools import extract_track_changes
+from word_document_server.utils.body_walker import BodyWalker, WalkedCell
+
+_INS = (
+    '<w:ins xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'w:id="1" w:author="A"><w:r><w:t>{}</w:t></w:r></w:ins>'
+)
+
+
+def _table_first_doc(path: Path) -> Path:
+    doc = Document()
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).merge(table.cell(0, 1))
+    table.cell(0, 0).text = "target merged"
+    table.cell(1, 0).text = "target below"
+    table.cell(1, 1).add_table(rows=1, cols=1).cell(0, 0).text = "target nested"
+    doc.add_paragraph("target body")
+    doc.save(str(path))
+    return path
+
+
+def test_walker_orders_paragraphs_and_cells_once(tmp_path: Path):
+    doc = Document(str(_table_first_doc(tmp_path / "t.docx")))
+    walker = BodyWalker(doc)
+
+    texts = [walker.proxy(item).text for item in walker.paragraphs]
+    assert [t for t in texts if t] == ["target merged", "target below", "target nested", "target body"]
+    assert [item.index for item in walker.paragraphs] == list(range(len(walker)))
+
+    cells = [block for block in walker.blocks() if isinstance(block, WalkedCell)]
+    assert [(c.location, c.depth) for c in cells] == [
+        ((0, 0, 0), 0),
+        ((0, 1, 0), 0),
+        ((0, 1, 1), 0),
+        ((0, 1, 1), 1),
+    ]
+
+    assert len(walker.body_paragraphs) == len(doc.paragraphs)
+    assert walker.paragraph(0).text == doc.paragraphs[0].text == "target body"
+    assert walker.paragraph(0)._element is doc.paragraphs[0]._element
+    run = doc.paragraphs[0].runs[0]._element
+    assert walker.find(run).paragraph_index == 0
+
+
+def test_search_and_replace_visits_merged_cells_once_in_document_order(tmp_path: Path):
+    p = _table_first_doc(tmp_path / "t.docx")
+
+    result = enhanced_search_and_replace(filename=str(p), find_text="target", replace_text="target!")
+    assert "Replaced 4 occurrence(s)" in result
+    table = Document(str(p)).tables[0]
+    assert table.cell(0, 0).text == "target! merged"
+    assert table.cell(1, 1).tables[0].cell(0, 0).text == "target! nested"
+
+    # The first occurrence in document order is in the table, not the body.
+    p = _table_first_doc(tmp_path / "u.docx")
+    enhanced_search_and_replace(filename=str(p), find_text="target", replace_text="hit", occurrence_index=1)
+    doc = Document(str(p))
+    assert doc.tables[0].cell(0, 0).text == "hit merged"
+    assert doc.paragraphs[0].text == "target body"
+
+
+def test_track_changes_are_listed_in_document_order_with_location(tmp_path: Path):
+    doc = Document()
+    doc.add_paragraph("first")._p.append(parse_xml(_INS.format("one")))
+    doc.add_table(rows=1, cols=1).cell(0, 0).paragraphs[0]._p.append(parse_xml(_INS.format("two")))
+    p = tmp_path / "tc.docx"
+    doc.save(str(p))
+
+    result = extract_track_changes(filename=str(p))
+    assert result.index("'one'") < result.index("'two'")
+    assert "Location: Paragraph 0" in result
+    assert "Location: Table 0, Row 0, Column 0" in result
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+from docx import Document
+from docx.oxml import parse_xml
+
+from word_document_server.tools.document_tools import get_text
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+_FIELD = (
+    f'<w:r {_W}><w:fldChar w:fldCharType="begin"/><w:instrText> PAGE </w:instrText>'
+    '<w:fldChar w:fldCharType="separate"/><w:t>7</w:t><w:fldChar w:fldCharType="end"/></w:r>'
+)
+
+
+def _doc(path: Path) -> Path:
+    doc = Document()
+    doc.add_heading("Title", level=1)
+    for i in range(12):
+        para = doc.add_paragraph(f"plain {i} ")
+        para.add_run("bold").bold = True
+        para.add_run(" italic").italic = i % 2 == 0
+    doc.paragraphs[3]._p.append(parse_xml(_FIELD))
+    doc.add_paragraph("")
+    doc.save(str(path))
+    return path
+
+
+def _expand(paragraphs, styles):
+    expanded = []
+    for para in paragraphs:
+        runs = []
+        for entry in para["runs"]:
+            run = {"text": entry[0], **styles[entry[1]]}
+            if len(entry) > 2:
+                run.update(entry[2])
+            runs.append(run)
+        expanded.append({"index": para["index"], "text": para["text"], "paragraph_formatting": styles[para["format"]],
+                         "runs": runs})
+    return expanded
+
+
+def test_compact_and_ndjson_carry_the_json_content(tmp_path: Path):
+    p = str(_doc(tmp_path / "compact.docx"))
+    for kwargs in ({"scope": "all"}, {"scope": "range", "start_paragraph": 2, "end_paragraph": 9}):
+        for detail in ("basic", "detailed"):
+            full = json.loads(asyncio.run(get_text(filename=p, include_formatting=True, formatting_detail=detail,
+                                                   **kwargs)))
+            compact = json.loads(asyncio.run(get_text(filename=p, include_formatting=True, formatting_detail=detail,
+                                                      output_format="compact", **kwargs)))
+            assert _expand(compact["paragraphs"], compact["styles"]) == full["paragraphs"]
+            assert len(compact["styles"]) < sum(len(para["runs"]) + 1 for para in full["paragraphs"])
+
+            lines = asyncio.run(get_text(filename=p, include_formatting=True, formatting_detail=detail,
+                                         output_format="ndjson", **kwargs)).splitlines()
+            records = [json.loads(line) for line in lines]
+            assert records[0] == {"formatting_detail": detail}
+            styles = {}
+            paragraphs = []
+            for record in records[1:]:
+                if "style" in record:
+                    assert record["style"] == len(styles)
+                    styles[record["style"]] = record["format"]
+                else:
+                    assert record["format"] in styles
+                    assert all(entry[1] in styles for entry in record["runs"])
+                    paragraphs.append(record)
+            assert paragraphs == compact["paragraphs"]
+            assert list(styles.values()) == compact["styles"]
+
+
+def test_output_format_is_validated(tmp_path: Path):
+    p = str(_doc(tmp_path / "invalid.docx"))
+    assert asyncio.run(get_text(filename=p, include_formatting=True, output_format="xml")).startswith(
+        "Invalid output_format"
+    )
+    for kwargs in ({"include_formatting": False}, {"include_formatting": True, "page_size": 5},
+                   {"include_formatting": True, "scope": "search", "search_term": "bold"}):
+        assert asyncio.run(get_text(filename=p, output_format="compact", **kwargs)).startswith("Invalid parameter")
@@ -136,3 +136,40 @@ def test_enhanced_search_and_replace_requires_both_char_bounds(tmp_path: Path):
 
     doc = Document(str(p))
     assert doc.paragraphs[0].text == "foo bar foo"
+
+
+def test_rules_apply_in_one_pass_with_leftmost_longest_priority(tmp_path: Path):
+    p = tmp_path / "rules.docx"
+    doc = Document()
+    doc.add_paragraph("The data base and DATA BASE use e-mail in 5ms or 10 ms.")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "e-mail the data base"
+    doc.save(str(p))
+
+    res = enhanced_search_and_replace(filename=str(p), whole_words_only=True, rules=[
+        {"find": "data", "replace": "info"},
+        {"find": "data base", "replace": "database", "match_case": False},
+        {"find": "e-mail", "replace": "email", "formatting": {"bold": True}},
+        {"find": r"(\d+) ?ms", "replace": "$1 ms", "use_regex": True},
+        # Ties with rule 3 on position and length; the earlier rule wins.
+        {"find": "e-mail", "replace": "mail"},
+    ])
+    assert res.splitlines() == [
+        "Replaced 7 occurrence(s) using 5 rule(s) in one pass.",
+        "  1. 'data' -> 'info': 0",
+        "  2. 'data base' -> 'database': 3",
+        "  3. 'e-mail' -> 'email': 2",
+        "  4. '(\\d+) ?ms' -> '$1 ms': 2",
+        "  5. 'e-mail' -> 'mail': 0",
+    ]
+
+    doc = Document(str(p))
+    para = doc.paragraphs[0]
+    assert para.text == "The database and DATABASE use email in 5 ms or 10 ms."
+    assert [run.text for run in para.runs if run.bold] == ["email"]
+    assert doc.tables[0].cell(0, 0).text == "email the database"
+
+    # Rules are validated before the document is touched.
+    assert enhanced_search_and_replace(filename=str(p), rules=[{"find": "x"}]) == "Error: rule 1 needs a 'replace' value"
+    assert "occurrence_index" in enhanced_search_and_replace(
+        filename=str(p), rules=[{"find": "x", "replace": "y"}], occurrence_index=1
+    )
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+from docx import Document
+
+from word_document_server.tools.content_tools import enhanced_search_and_replace
+from word_document_server.tools.document_tools import get_text
+from word_document_server.tools.section_tools import get_sections
+
+
+def _doc(path: Path) -> Path:
+    doc = Document()
+    for i in range(30):
+        if i % 10 == 0:
+            doc.add_heading(f"Part {i // 10}", level=1)
+        para = doc.add_paragraph(f"para {i} alpha ")
+        para.add_run("alpha").bold = True
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "alpha in a cell"
+    doc.save(str(path))
+    return path
+
+
+def _pages(**kwargs):
+    pages = [json.loads(asyncio.run(get_text(**kwargs)))]
+    while pages[-1]["next_cursor"]:
+        pages.append(json.loads(asyncio.run(get_text(cursor=pages[-1]["next_cursor"], **kwargs))))
+    return pages
+
+
+def test_pages_add_up_to_the_unpaged_output(tmp_path: Path):
+    p = str(_doc(tmp_path / "paged.docx"))
+
+    pages = _pages(filename=p, page_size=7)
+    assert len(pages) == 5
+    assert "\n".join(page["text"] for page in pages) == asyncio.run(get_text(filename=p))
+
+    whole = json.loads(asyncio.run(get_text(filename=p, scope="range", start_paragraph=2, end_paragraph=20,
+                                            include_formatting=True)))
+    pages = _pages(filename=p, scope="range", start_paragraph=2, end_paragraph=20, include_formatting=True, page_size=4)
+    assert [para for page in pages for para in page["paragraphs"]] == whole["paragraphs"]
+
+    for include_formatting in (False, True):
+        whole = json.loads(asyncio.run(get_text(filename=p, scope="search", search_term="alpha",
+                                                include_formatting=include_formatting, max_results=1000)))
+        pages = _pages(filename=p, scope="search", search_term="alpha", include_formatting=include_formatting,
+                       page_size=9)
+        assert len(pages) == 7
+        assert [occ for page in pages for occ in page["occurrences"]] == whole["occurrences"]
+
+
+def test_output_budget_moves_items_to_the_next_page(tmp_path: Path, monkeypatch):
+    p = str(_doc(tmp_path / "budget.docx"))
+    monkeypatch.setenv("EW_MAX_SEARCH_OUTPUT_CHARS", "2000")
+
+    pages = _pages(filename=p, include_formatting=True, page_size=100)
+    assert len(pages) > 1
+    assert all(len(json.dumps(page, indent=2)) <= 2000 for page in pages)
+    assert [para["index"] for page in pages for para in page["paragraphs"]] == list(range(33))
+
+
+def test_cursors_are_refused_for_other_arguments_or_a_changed_document(tmp_path: Path):
+    p = str(_doc(tmp_path / "stale.docx"))
+    first = json.loads(asyncio.run(get_text(filename=p, page_size=5)))
+
+    assert asyncio.run(get_text(filename=p, scope="search", search_term="alpha", cursor=first["next_cursor"])).startswith(
+        "Invalid cursor"
+    )
+    assert asyncio.run(get_text(filename=p, cursor="not a cursor")).startswith("Invalid cursor")
+
+    enhanced_search_and_replace(filename=p, find_text="para 0", replace_text="first")
+    assert asyncio.run(get_text(filename=p, cursor=first["next_cursor"])).startswith("Stale cursor")
+
+
+def test_get_sections_pages_top_level_sections(tmp_path: Path):
+    p = str(_doc(tmp_path / "sections.docx"))
+    whole = json.loads(asyncio.run(get_sections(filename=p, output_format="json", include_formatting=True)))
+
+    first = json.loads(asyncio.run(get_sections(filename=p, output_format="json", include_formatting=True, page_size=2)))
+    rest = json.loads(asyncio.run(get_sections(filename=p, output_format="json", include_formatting=True,
+                                               cursor=first["next_cursor"])))
+    assert [s["title"] for s in first["sections"]] == ["Part 0", "Part 1"]
+    assert first["sections"] + rest["sections"] == whole["sections"]
+    assert rest["next_cursor"] is None
+
+    text = asyncio.run(get_sections(filename=p, page_size=1))
+    assert "Part 0" in text and "Part 1" not in text and "next_cursor: " in text
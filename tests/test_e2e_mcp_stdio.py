@@ -50,7 +50,7 @@ def test_e2e_stdio_lists_registered_tools():
     async def _run(session: ClientSession):
         result = await session.list_tools()
         names = sorted([tool.name for tool in result.tools])
-        assert len(names) == 25
+        assert len(names) == 26
         for expected in [
             "create_document",
             "add_text_content",
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import threading
+import time
+from pathlib import Path
+
+from word_document_server.tools.content_tools import enhanced_search_and_replace
+from word_document_server.tools.document_tools import get_text
+from word_document_server.utils.executor import offload_tool
+from tests.helpers import write_docx
+
+
+def test_offload_tool_preserves_signature_and_runs_off_loop_thread(tmp_path: Path):
+    wrapped_sync = offload_tool(enhanced_search_and_replace)
+    wrapped_async = offload_tool(get_text)
+    assert inspect.iscoroutinefunction(wrapped_sync)
+    assert inspect.signature(wrapped_sync) == inspect.signature(enhanced_search_and_replace)
+    assert wrapped_async.__doc__ == get_text.__doc__
+
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["hello world"])
+    assert "hello world" in asyncio.run(wrapped_async(filename=str(p), scope="all"))
+
+    loop_thread = threading.get_ident()
+    seen = []
+
+    def probe(filename: str = None) -> str:
+        seen.append(threading.get_ident())
+        return "ok"
+
+    assert asyncio.run(offload_tool(probe)(filename=str(p))) == "ok"
+    assert seen and seen[0] != loop_thread
+
+
+def test_offload_tool_serializes_same_document_and_parallelizes_others(tmp_path: Path):
+    active = {}
+    overlap = {"same": False, "different": False}
+    guard = threading.Lock()
+
+    def slow(filename: str = None) -> str:
+        with guard:
+            for other in active:
+                key = "same" if other == filename else "different"
+                overlap[key] = True
+            active[filename] = active.get(filename, 0) + 1
+        time.sleep(0.05)
+        with guard:
+            active[filename] -= 1
+            if not active[filename]:
+                del active[filename]
+        return filename
+
+    tool = offload_tool(slow)
+    a = str(tmp_path / "a.docx")
+    b = str(tmp_path / "b.docx")
+
+    async def _run():
+        return await asyncio.gather(tool(filename=a), tool(filename=a), tool(filename=b))
+
+    asyncio.run(_run())
+    assert overlap["same"] is False
+    assert overlap["different"] is True
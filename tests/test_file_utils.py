@@ -1,6 +1,21 @@
 from __future__ import annotations
 
-from word_document_server.utils.file_utils import validate_docx_path
+import builtins
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.helpers import write_docx
+from word_document_server.undo_manager import get_undo_manager
+from word_document_server.utils.file_utils import (
+    atomic_write,
+    atomic_write_bytes,
+    preflight_write,
+    validate_docx_path,
+)
+from word_document_server.utils.instrumentation import get_write_stats
+from word_document_server.utils.session_utils import load_document
 
 
 def test_validate_docx_path_rejects_doc_extension():
@@ -20,3 +35,73 @@ def test_validate_docx_path_accepts_docx_extension():
     assert ok, err
     assert sanitized.endswith(".docx")
 
+
+
+def test_preflight_reads_once_and_feeds_snapshot_and_parse(tmp_path: Path, monkeypatch):
+    p = write_docx(tmp_path / "x.docx", paragraphs=["Hello"])
+    original = p.read_bytes()
+    reads = []
+    real_open = builtins.open
+
+    def counting_open(file, mode="r", *args, **kwargs):
+        if str(file) == str(p) and "r" in mode:
+            reads.append(mode)
+        return real_open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", counting_open)
+    ok, err, data = preflight_write(str(p))
+    doc = load_document(str(p), for_write=True, data=data)
+    monkeypatch.undo()
+
+    assert ok, err
+    assert data == original
+    assert len(reads) == 1
+    assert [para.text for para in doc.paragraphs] == ["Hello"]
+
+    p.write_bytes(b"changed")
+    assert "undo successful" in get_undo_manager().undo(str(p)).lower()
+    assert p.read_bytes() == original
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="flock is POSIX-only")
+def test_preflight_refuses_a_locked_file_without_snapshot(tmp_path: Path):
+    import fcntl
+
+    p = write_docx(tmp_path / "x.docx", paragraphs=["Hello"])
+    with open(p, "rb") as holder:
+        fcntl.flock(holder.fileno(), fcntl.LOCK_EX)
+        ok, err, data = preflight_write(str(p))
+    assert not ok and "locked" in err
+    assert data is None
+    assert "undo=0," in get_undo_manager().list_history(str(p))
+
+
+def test_atomic_write_failure_leaves_original_and_no_temp(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    p.write_bytes(b"original")
+
+    def fail_midway(f):
+        f.write(b"partial")
+        raise RuntimeError("killed")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(str(p), fail_midway)
+    assert p.read_bytes() == b"original"
+    assert [c.name for c in tmp_path.iterdir()] == ["x.docx"]
+
+
+@pytest.mark.parametrize("durability,fsyncs", [("none", 0), ("file", 1), ("full", 2)])
+def test_atomic_write_reports_to_instrumentation(tmp_path: Path, monkeypatch, durability, fsyncs):
+    monkeypatch.setenv("EW_SAVE_DURABILITY", durability)
+    stats = get_write_stats()
+    stats.reset()
+    p = tmp_path / "x.docx"
+    p.write_bytes(b"old")
+    p.chmod(0o640)
+
+    assert atomic_write_bytes(str(p), b"new contents", kind="undo") == 12
+    assert p.read_bytes() == b"new contents"
+    assert p.stat().st_mode & 0o777 == 0o640
+    undo = stats.stats()["undo"]
+    assert undo["writes"] == 1 and undo["bytes"] == 12 and undo["fsyncs"] == fsyncs
+    assert undo["seconds"] >= 0
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from docx import Document
+from docx.enum.text import WD_BREAK
+
+from word_document_server.tools.content_tools import format_research_paper_terms, format_specific_words
+from word_document_server.tools.undo_tools import session_undo
+from word_document_server.undo_manager import get_undo_manager
+from word_document_server.utils.instrumentation import get_write_stats
+
+
+def _doc(path: Path) -> Path:
+    doc = Document()
+    para = doc.add_paragraph()
+    para.add_run("PCL with DT")
+    para.add_run("G at 25°C")
+    para.add_run().add_break(WD_BREAK.PAGE)
+    para.add_run(" was significant (p < 0.05).")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "ANOVA of PCLs and PCL"
+    doc.save(str(path))
+    return path
+
+
+def _saves() -> int:
+    return get_write_stats().stats().get("save", {}).get("writes", 0)
+
+
+def _formatted(para):
+    return [(run.text, run.bold, run.italic, str(run.font.color.rgb) if run.font.color.rgb else None)
+            for run in para.runs if run.text]
+
+
+def test_research_terms_are_formatted_in_one_save_and_one_undo_step(tmp_path: Path):
+    p = _doc(tmp_path / "paper.docx")
+    saves = _saves()
+
+    result = format_research_paper_terms(str(p))
+    assert "'DTG': Formatted 1 occurrence(s)" in result
+    assert "'PCL': Formatted 2 occurrence(s)" in result
+    assert "'MLX': No occurrences of text 'MLX' found." in result
+    assert _saves() == saves + 1
+    assert "undo=1," in get_undo_manager().list_history(str(p))
+
+    doc = Document(str(p))
+    para = doc.paragraphs[0]
+    assert para.text == "PCL with DTG at 25°C was significant (p < 0.05)."
+    assert _formatted(para) == [
+        ("PCL", None, None, "008000"),
+        (" with ", None, None, None),
+        ("DT", True, None, "0000FF"),
+        ("G", True, None, "0000FF"),
+        (" at ", None, None, None),
+        ("25°C", None, None, "FFA500"),
+        (" was ", None, None, None),
+        ("significant", None, True, "FF0000"),
+        (" (", None, None, None),
+        ("p < 0.05", None, True, "FF0000"),
+        (").", None, None, None),
+    ]
+    assert len(para._p.xpath(".//w:br[@w:type='page']")) == 1
+    cell = doc.tables[0].cell(0, 0).paragraphs[0]
+    assert [text for text, *_ in _formatted(cell)] == ["ANOVA", " of PCLs and ", "PCL"]
+
+    session_undo(action="undo", filename=str(p))
+    assert all(run.font.color.rgb is None for run in Document(str(p)).paragraphs[0].runs)
+
+
+def test_longest_term_wins_and_nothing_is_saved_without_matches(tmp_path: Path):
+    p = _doc(tmp_path / "words.docx")
+    result = format_specific_words(str(p), ["pcl", "with dtg", "absent"], bold=True, match_case=False)
+    assert result.splitlines() == [
+        "'pcl': Formatted 2 occurrence(s) of text 'pcl'.",
+        "'with dtg': Formatted 1 occurrence(s) of text 'with dtg'.",
+        "'absent': No occurrences of text 'absent' found.",
+    ]
+    bold = [run.text for run in Document(str(p)).paragraphs[0].runs if run.bold]
+    assert bold == ["PCL", "with DT", "G"]
+
+    saves = _saves()
+    assert format_specific_words(str(p), ["absent"], bold=True) == "'absent': No occurrences of text 'absent' found."
+    assert _saves() == saves
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+from word_document_server.undo_manager import UndoManager
+from word_document_server.utils.locks import ReadWriteLock, get_path_lock
+
+
+def test_readers_share_and_writer_excludes():
+    lock = ReadWriteLock()
+    readers_inside = threading.Barrier(2, timeout=2)
+    events = []
+
+    def reader():
+        with lock.read_locked():
+            readers_inside.wait()  # both readers hold the lock at once
+            events.append("read")
+
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(2)
+    assert events == ["read", "read"]
+
+    lock.acquire_write()
+    acquired = threading.Event()
+
+    def blocked_reader():
+        with lock.read_locked():
+            acquired.set()
+
+    t = threading.Thread(target=blocked_reader)
+    t.start()
+    assert not acquired.wait(0.1)
+    lock.release_write()
+    assert acquired.wait(2)
+    t.join(2)
+
+
+def test_writer_is_reentrant_and_path_locks_are_per_resolved_path(tmp_path: Path):
+    lock = ReadWriteLock()
+    with lock.write_locked():
+        with lock.write_locked():
+            with lock.read_locked():
+                pass
+    # Fully released: another thread can take it.
+    done = threading.Event()
+    threading.Thread(target=lambda: (lock.acquire_write(), lock.release_write(), done.set())).start()
+    assert done.wait(2)
+
+    a = tmp_path / "a.docx"
+    assert get_path_lock(str(a)) is get_path_lock(str(tmp_path / "." / "a.docx"))
+    assert get_path_lock(str(a)) is not get_path_lock(str(tmp_path / "b.docx"))
+
+
+def test_undo_io_on_one_file_does_not_block_another(tmp_path: Path):
+    mgr = UndoManager()
+    a = tmp_path / "a.docx"
+    b = tmp_path / "b.docx"
+    a.write_bytes(b"a1")
+    b.write_bytes(b"b1")
+
+    # Simulate a long snapshot read in progress on a.
+    with mgr._path_lock(str(a.resolve())):  # pylint: disable=protected-access
+        start = time.monotonic()
+        mgr.snapshot(str(b))
+        b.write_bytes(b"b2")
+        assert "undo successful" in mgr.undo(str(b)).lower()
+        assert time.monotonic() - start < 1
+    assert b.read_bytes() == b"b1"
@@ -48,6 +48,7 @@ def test_stress_undo_budget_evicts_oldest_snapshots(tmp_path: Path, monkeypatch)
     doc.save(str(p))
 
     monkeypatch.setenv("EW_MAX_UNDO_BYTES_TOTAL", "30000")
+    monkeypatch.setenv("EW_MAX_UNDO_DISK_BYTES", "0")
     assert "successfully opened" in open_document("budget", str(p)).lower()
 
     for i in range(18):
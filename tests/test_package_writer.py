@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import io
+import os
+import struct
+import zipfile
+import zlib
+from pathlib import Path
+
+from docx import Document
+
+from word_document_server.tools.content_tools import enhanced_search_and_replace
+from word_document_server.utils.package_writer import write_package
+
+
+def _png(padding: bytes) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"tEXt", b"pad\x00" + padding)
+        + chunk(b"IDAT", zlib.compress(b"\x00\x00\x00\x00"))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _raw_entries(path: Path) -> dict:
+    data = path.read_bytes()
+    entries = {}
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            name_len, extra_len = struct.unpack_from("<HH", data, info.header_offset + 26)
+            start = info.header_offset + 30 + name_len + extra_len
+            entries[info.filename] = data[start:start + info.compress_size]
+    return entries
+
+
+def _figure_doc(path: Path) -> Path:
+    doc = Document()
+    doc.add_picture(io.BytesIO(_png(os.urandom(200_000))))
+    doc.add_paragraph("alpha beta")
+    doc.save(str(path))
+    return path
+
+
+def test_edit_copies_unchanged_parts_raw(tmp_path: Path):
+    p = _figure_doc(tmp_path / "fig.docx")
+    before = _raw_entries(p)
+
+    result = enhanced_search_and_replace(filename=str(p), find_text="beta", replace_text="gamma")
+    assert "replaced" in result.lower()
+
+    after = _raw_entries(p)
+    media = [name for name in before if name.startswith("word/media/")]
+    assert media and all(after[name] == before[name] for name in media)
+    assert after["word/document.xml"] != before["word/document.xml"]
+    with zipfile.ZipFile(p) as zf:
+        assert zf.testzip() is None
+    assert [para.text for para in Document(str(p)).paragraphs][-1] == "alpha gamma"
+
+
+def test_compression_level_applies_to_rewritten_parts(tmp_path: Path, monkeypatch):
+    p = _figure_doc(tmp_path / "fig.docx")
+    doc = Document(str(p))
+    doc.add_paragraph("more")
+
+    monkeypatch.setenv("EW_DOCX_COMPRESSION_LEVEL", "0")
+    out = io.BytesIO()
+    copied = write_package(doc, out)
+    assert copied == 0
+    with zipfile.ZipFile(out) as zf:
+        assert {info.compress_type for info in zf.infolist()} == {zipfile.ZIP_STORED}
+        assert zf.testzip() is None
+
+    copied = write_package(doc, str(tmp_path / "copy.docx"), source=str(p), compression_level=9)
+    assert copied > 0
+    assert Document(str(tmp_path / "copy.docx")).paragraphs[-1].text == "more"
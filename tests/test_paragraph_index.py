@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from docx import Document
+
+from tests.helpers import write_docx
+from word_document_server.session_manager import get_session_manager
+from word_document_server.tools.content_tools import add_text_content
+from word_document_server.tools.document_tools import get_text
+from word_document_server.utils.extended_document_utils import get_paragraph_text
+from word_document_server.utils.paragraph_index import get_paragraph_index
+from word_document_server.utils.session_utils import load_document
+
+
+def test_index_matches_python_docx(tmp_path: Path):
+    doc = Document()
+    doc.add_heading("Title", level=1)
+    doc.add_paragraph("tab\tand text", style="List Bullet")
+    doc.add_paragraph("")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "cell"
+    doc.add_paragraph("last")
+
+    index = get_paragraph_index(doc)
+    assert len(index) == len(doc.paragraphs)
+    for i, para in enumerate(doc.paragraphs):
+        assert index.text(i) == para.text
+        assert index.style_name(i) == para.style.name
+        assert index.element(i) is para._p
+        assert index.paragraph(i).text == para.text
+    assert index.style_id(0) == "Heading1" and index.style_id(3) is None
+    assert index.texts(1, 3) == ["tab\tand text", "", "last"]
+    assert get_paragraph_index(doc) is index
+
+
+def test_index_is_reused_by_reads_and_rebuilt_after_writes(tmp_path: Path, monkeypatch):
+    p = write_docx(tmp_path / "x.docx", paragraphs=["zero", "one", "two"])
+    monkeypatch.setenv("EW_SESSION_FLUSH_OPS", "0")
+    get_session_manager().open_document("main", str(p))
+
+    first = get_paragraph_index(load_document(str(p)))
+    assert get_paragraph_text(str(p), 1)["text"] == "one"
+    assert get_paragraph_index(load_document(str(p))) is first
+
+    asyncio.run(add_text_content(document_id="main", text="inserted", position="after", insert_after_paragraph=0))
+    assert asyncio.run(get_text(document_id="main", scope="range", start_paragraph=0, end_paragraph=2)) == (
+        "[Paragraph 0] zero\n[Paragraph 1] inserted\n[Paragraph 2] one"
+    )
+    assert get_paragraph_index(load_document(str(p))) is not first
+
+    # A write that never reaches save_document is rolled back and still
+    # invalidates the index.
+    before = get_paragraph_index(load_document(str(p)))
+    load_document(str(p), for_write=True).paragraphs[0].text = "changed"
+    assert get_paragraph_text(str(p), 0)["text"] == "zero"
+    assert get_paragraph_text(str(p), 1)["text"] == "inserted"
+    assert get_paragraph_index(load_document(str(p))) is not before
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+
+from docx import Document
+
+from tests.helpers import write_docx
+from word_document_server.tools.content_tools import add_text_content
+from word_document_server.tools.document_tools import get_text
+from word_document_server.utils.parse_cache import ParseCache, get_parse_cache
+from word_document_server.utils.session_utils import load_document, save_document
+
+
+def test_repeated_filename_reads_hit_the_cache(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    cache = get_parse_cache()
+
+    first = load_document(str(p))
+    second = load_document(str(p))
+    assert first is second
+    stats = cache.stats()
+    assert stats["hits"] >= 1 and stats["misses"] >= 1 and stats["entries"] == 1
+
+
+def test_edit_through_filename_keeps_reads_consistent(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+
+    assert "Hello" in asyncio.run(get_text(filename=str(p), scope="all"))
+    asyncio.run(add_text_content(filename=str(p), text="Appended"))
+    assert "Appended" in asyncio.run(get_text(filename=str(p), scope="all"))
+
+
+def test_same_size_rewrite_with_identical_stat_is_detected_by_hash(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["AAAA"])
+    cache = ParseCache()
+    cache.load(str(p))
+    st = os.stat(p)
+
+    # Rewrite in place keeping size and timestamps identical (racy-clean case).
+    data = bytearray(p.read_bytes())
+    other = tmp_path / "y.docx"
+    write_docx(other, paragraphs=["BBBB"])
+    replacement = other.read_bytes()
+    assert len(replacement) == len(data)
+    with open(p, "r+b") as f:
+        f.write(replacement)
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns))
+    doc = cache.load(str(p))
+    assert [para.text for para in doc.paragraphs] == ["BBBB"]
+
+
+def test_byte_budget_evicts_least_recently_used(tmp_path: Path, monkeypatch):
+    a = tmp_path / "a.docx"
+    b = tmp_path / "b.docx"
+    write_docx(a, paragraphs=["a"])
+    write_docx(b, paragraphs=["b"])
+    cache = ParseCache()
+
+    cache.load(str(a))
+    one_entry = cache.stats()["bytes"]
+    monkeypatch.setenv("EW_PARSE_CACHE_BYTES", str(one_entry + 1))
+    cache.load(str(b))
+
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["evictions"] == 1
+    assert cache.get(str(b)) is not None
+    assert cache.get(str(a)) is None
+
+
+def test_external_write_invalidates_entry(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["old"])
+    cache = ParseCache()
+    cache.load(str(p))
+
+    doc = Document()
+    doc.add_paragraph("new and longer")
+    doc.save(str(p))
+    assert [para.text for para in cache.load(str(p)).paragraphs] == ["new and longer"]
+
+
+def test_saved_document_is_cached_without_reading_the_file_back(tmp_path: Path, monkeypatch):
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    doc = load_document(str(p), for_write=True)
+    doc.add_paragraph("Saved")
+
+    from word_document_server.utils import parse_cache
+
+    def no_reread(*args):
+        raise AssertionError("the saved file was read back")
+
+    estimate_weight = parse_cache._estimate_weight
+    monkeypatch.setattr(parse_cache, "_content_hash", no_reread)
+    monkeypatch.setattr(parse_cache, "_estimate_weight", lambda source, fallback: no_reread()
+                        if isinstance(source, str) else estimate_weight(source, fallback))
+    save_document(doc, str(p))
+
+    # Still inside the racy window: a stat-only hit on the saved Document.
+    assert load_document(str(p)) is doc
+    assert [para.text for para in Document(str(p)).paragraphs] == ["Hello", "Saved"]
+
+
+def test_racy_entries_are_hashed_outside_the_cache_lock(tmp_path: Path, monkeypatch):
+    import threading
+
+    from word_document_server.utils import parse_cache
+
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    cache = ParseCache()
+    doc = cache.load(str(p))
+    content_hash = parse_cache._content_hash
+    free = []
+
+    def checked_hash(path):
+        # Another thread can take the cache lock while the file is hashed.
+        def probe():
+            acquired = cache._lock.acquire(timeout=1)
+            free.append(acquired)
+            if acquired:
+                cache._lock.release()
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return content_hash(path)
+
+    monkeypatch.setattr(parse_cache, "is_racy_signature", lambda signature: True)
+    monkeypatch.setattr(parse_cache, "_content_hash", checked_hash)
+    assert cache.get(str(p)) is doc
+    assert cache.take(str(p)) is doc
+    assert free == [True, True]
+    assert cache.stats()["entries"] == 0
+
+
+def test_entry_replaced_while_hashing_is_not_returned(tmp_path: Path, monkeypatch):
+    from word_document_server.utils import parse_cache
+
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    cache = ParseCache()
+    cache.load(str(p))
+    content_hash = parse_cache._content_hash
+    replacement = Document(str(p))
+
+    def racing_hash(path):
+        monkeypatch.setattr(parse_cache, "_content_hash", content_hash)
+        cache.put(str(p), replacement)
+        return content_hash(path)
+
+    monkeypatch.setattr(parse_cache, "is_racy_signature", lambda signature: True)
+    monkeypatch.setattr(parse_cache, "_content_hash", racing_hash)
+    assert cache.take(str(p)) is None
+    assert cache.get(str(p)) is replacement
@@ -5,7 +5,7 @@ from pathlib import Path
 import pytest
 from docx import Document
 
-import word_document_server.tools.content_tools as content_tools
+import word_document_server.utils.regex_runtime as regex_runtime
 from word_document_server.tools.content_tools import enhanced_search_and_replace
 
 
@@ -48,19 +48,52 @@ def test_stress_valid_complex_regex_still_executes(tmp_path: Path):
     assert "Replaced" in result
 
 
-def test_stress_timeout_contract_returns_clear_message(tmp_path: Path, monkeypatch):
+def test_stress_timeout_stops_backtracking_without_mutation(tmp_path: Path, monkeypatch):
     p = tmp_path / "timeout.docx"
-    _write_doc(p, "aaaaa")
+    _write_doc(p, "a" * 40)
+    before = p.read_bytes()
 
-    monkeypatch.setenv("EW_REGEX_TIMEOUT_MS", "10")
-    monkeypatch.setattr(content_tools, "is_regex_timeout_supported", lambda: False)
+    monkeypatch.setenv("EW_REGEX_TIMEOUT_MS", "200")
+    # Force the helper-process fallback used when the regex module is absent.
+    monkeypatch.setattr(regex_runtime, "is_regex_timeout_supported", lambda: False)
 
+    # Exponential backtracking that the preflight heuristic does not catch.
     result = enhanced_search_and_replace(
         filename=str(p),
-        find_text=r"a+",
+        find_text=r"(a|aa)*c",
         replace_text="b",
         use_regex=True,
     )
 
-    assert "REGEX_COMPLEXITY_BLOCKED" in result
-    assert "EW_REGEX_TIMEOUT_MS=10" in result
+    assert "REGEX_TIMEOUT" in result
+    assert "EW_REGEX_TIMEOUT_MS=200" in result
+    assert p.read_bytes() == before
+
+
+@pytest.mark.parametrize("pattern", [r"(\w)(\d)?", r"|a", r"a*|b", r"\b"])
+def test_stress_timed_scan_matches_finditer(pattern, monkeypatch):
+    monkeypatch.setattr(regex_runtime, "is_regex_timeout_supported", lambda: False)
+    compiled = regex_runtime.compile_pattern(pattern)
+    texts = ["ab1 x", "", "baab"]
+
+    timed = regex_runtime.scan(compiled, texts, regex_runtime.RegexBudget(5000))
+    for text, matches in zip(texts, timed):
+        expected = [(m.span(), m.groups()) for m in compiled.finditer(text)]
+        assert [(m.span(), m.groups()) for m in matches] == expected
+
+
+def test_stress_timed_regex_replaces_with_groups(tmp_path: Path, monkeypatch):
+    p = tmp_path / "groups.docx"
+    _write_doc(p, "mail ann@example and bob@test")
+    monkeypatch.setenv("EW_REGEX_TIMEOUT_MS", "5000")
+    monkeypatch.setattr(regex_runtime, "is_regex_timeout_supported", lambda: False)
+
+    result = enhanced_search_and_replace(
+        filename=str(p),
+        find_text=r"(\w+)@(\w+)",
+        replace_text="$2 at $1",
+        use_regex=True,
+    )
+
+    assert "Replaced 2 occurrence(s)" in result
+    assert Document(str(p)).paragraphs[0].text == "mail example at ann and test at bob"
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.enum.text import WD_COLOR_INDEX
+from docx.oxml import parse_xml
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from word_document_server.tools.content_tools import enhanced_search_and_replace
+from word_document_server.utils.run_map import RunMap
+from word_document_server.utils.text_stream import paragraph_text, run_text
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+_FIELD_BEGIN = f'<w:r {_W}><w:fldChar w:fldCharType="begin"/></w:r>'
+_HYPERLINK = f'<w:hyperlink {_W} w:anchor="x"><w:r><w:t>link</w:t></w:r></w:hyperlink>'
+
+
+@settings(max_examples=60, deadline=None)
+@given(
+    pieces=st.lists(st.text(alphabet="ab \t", max_size=4), min_size=1, max_size=6),
+    cuts=st.lists(st.integers(min_value=0, max_value=30), max_size=4),
+)
+def test_lookups_and_splits_match_a_linear_scan(pieces, cuts):
+    para = Document().add_paragraph()
+    for piece in pieces:
+        para.add_run(piece)
+    para._p.append(parse_xml(_FIELD_BEGIN))
+    text = paragraph_text(para._p)
+    run_map = RunMap(para._p)
+
+    for cut in cuts:
+        run_map.split(min(cut, len(text)))
+    assert paragraph_text(para._p) == text
+    assert len(para._p.xpath(".//w:fldChar")) == 1
+
+    for pos in range(len(text)):
+        r = run_map.run_at(pos)
+        start = 0
+        for candidate in run_map.runs:
+            if start <= pos < start + len(run_text(candidate)):
+                assert candidate is r
+            start += len(run_text(candidate))
+
+
+def test_replace_edits_only_the_runs_under_the_match(tmp_path: Path):
+    doc = Document()
+    para = doc.add_paragraph()
+    para.add_run("a X ")
+    marked = para.add_run("b")
+    marked.font.highlight_color = WD_COLOR_INDEX.YELLOW
+    para._p.append(parse_xml(_FIELD_BEGIN))
+    para.add_run(" bb ")
+    para._p.append(parse_xml(_HYPERLINK))
+    p = tmp_path / "r.docx"
+    doc.save(str(p))
+
+    enhanced_search_and_replace(filename=str(p), find_text="X", replace_text="", whole_words_only=True)
+    enhanced_search_and_replace(filename=str(p), find_text="b b", replace_text="c", apply_formatting=True, bold=True)
+    enhanced_search_and_replace(filename=str(p), find_text="link", replace_text="site")
+
+    para = Document(str(p)).paragraphs[0]
+    assert para.text == "a cb site"
+    assert len(para._p.xpath(".//w:fldChar")) == 1
+    replaced = [run for run in para.runs if run.bold]
+    assert [run.text for run in replaced] == ["c"]
+    assert replaced[0].font.highlight_color == WD_COLOR_INDEX.YELLOW
+    assert para._p.xpath("string(w:hyperlink)") == "site"
+
+
+def _assert_offsets_match_a_linear_scan(run_map):
+    start = 0
+    for i, r in enumerate(run_map.runs):
+        length = len(run_text(r))
+        for pos in range(start, start + length):
+            assert run_map.index_at(pos) == i
+        start += length
+
+
+def test_offsets_stay_sorted_after_multi_run_replacements():
+    para = Document().add_paragraph()
+    for piece in ("one ", "two ", "three ", "gam"):
+        para.add_run(piece)
+    para.add_run().add_break(WD_BREAK.PAGE)
+    para.add_run("ma end")
+    run_map = RunMap(para._p)
+
+    new_runs = [parse_xml(f'<w:r {_W}><w:t>{text}</w:t></w:r>') for text in ("X", "Y")]
+    run_map.replace(14, 19, new_runs)  # "gamma" across the page-break run
+    _assert_offsets_match_a_linear_scan(run_map)
+    run_map.replace(4, 7, [parse_xml(f'<w:r {_W}><w:t>Z</w:t></w:r>')])
+    assert paragraph_text(para._p) == "one Z three XY end"
+    _assert_offsets_match_a_linear_scan(run_map)
+
+
+def test_regex_replaces_every_match_left_of_zero_length_runs(tmp_path: Path):
+    doc = Document()
+    para = doc.add_paragraph()
+    for piece in ("one ", "two ", "three ", "four ", "five ", "six ", "gam"):
+        para.add_run(piece)
+    para.add_run().add_break(WD_BREAK.PAGE)
+    para.add_run("ma end")
+    p = tmp_path / "breaks.docx"
+    doc.save(str(p))
+
+    enhanced_search_and_replace(filename=str(p), find_text="two|five|gamma", replace_text="X", use_regex=True)
+
+    para = Document(str(p)).paragraphs[0]
+    assert para.text == "one X three four X six X end"
+    assert len(para._p.xpath(".//w:br")) == 1
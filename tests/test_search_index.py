@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from pathlib import Path
+
+from docx import Document
+
+from word_document_server.session_manager import get_session_manager
+from word_document_server.tools.content_tools import enhanced_search_and_replace
+from word_document_server.tools.document_tools import get_text
+from word_document_server.utils.extended_document_utils import find_text
+from word_document_server.utils.search_index import SearchIndex, clear_search_indexes, get_search_index
+from word_document_server.utils.text_stream import ParagraphText
+
+_TEXTS = [
+    "Alpha beta gamma, alpha BETA.",
+    "ΑΣ and ας and σς",
+    "İstanbul istanbul ıstanbul",
+    "Straße STRASSE strasse",
+    "overlapping aaaa aaa",
+    "",
+    "Kelvin Kelvin kelvin",
+]
+
+
+def _aged_doc(path: Path) -> Path:
+    doc = Document()
+    for text in _TEXTS:
+        doc.add_paragraph(text)
+    doc.add_table(rows=1, cols=2).cell(0, 1).text = "beta in a cell"
+    doc.save(str(path))
+    old = time.time() - 60
+    os.utime(path, (old, old))
+    return path
+
+
+def test_index_lookups_match_a_full_scan(monkeypatch):
+    index = SearchIndex([ParagraphText(text, i, None) for i, text in enumerate(_TEXTS)])
+    monkeypatch.setenv("EW_SEARCH_INDEX_MAX_CHARS", "0")
+    assert not index.indexable
+    queries = ["beta", "BETA", "alpha beta", "ας", "ΑΣ", "stanbul", "İstanbul", "strasse", "aaa", "a", "kelvin", "elvin"]
+    expected = {
+        (q, case, word): index.find(q, case, word)
+        for q in queries for case in (True, False) for word in (True, False)
+    }
+    monkeypatch.setenv("EW_SEARCH_INDEX_MAX_CHARS", "1000000")
+    assert index.indexable
+    for (q, case, word), scan in expected.items():
+        assert index.find(q, case, word) == scan, (q, case, word)
+
+    for pattern, flags in [("kelvin", re.IGNORECASE), ("istanbul", re.IGNORECASE), (r"gam+a, alpha", 0), ("(?i)STRASSE", 0)]:
+        candidates = index.regex_candidates(pattern, flags)
+        compiled = re.compile(pattern, flags)
+        matching = [i for i, text in enumerate(_TEXTS) if compiled.search(text)]
+        assert candidates is None or set(matching) <= set(candidates), pattern
+    assert index.regex_candidates(r"gam+a, alpha", 0) == [0]
+    assert index.regex_candidates(r"\w+", 0) is None
+
+
+def test_find_text_reuses_the_index_until_the_document_changes(tmp_path: Path, monkeypatch):
+    p = _aged_doc(tmp_path / "s.docx")
+    clear_search_indexes()
+
+    first = find_text(str(p), "beta", match_case=False)
+    assert first["total_count"] == 3
+    assert first["occurrences"][-1]["location"] == "Table 0, Row 0, Column 1"
+    index = get_search_index(str(p))
+    assert get_search_index(str(p)) is index
+
+    monkeypatch.setenv("EW_SEARCH_INDEX_MAX_CHARS", "0")
+    assert find_text(str(p), "beta", match_case=False) == first
+    monkeypatch.delenv("EW_SEARCH_INDEX_MAX_CHARS")
+
+    # Unsaved session edits are searched and get their own index.
+    monkeypatch.setenv("EW_SESSION_FLUSH_OPS", "0")
+    get_session_manager().open_document("main", str(p))
+    enhanced_search_and_replace(document_id="main", find_text="gamma", replace_text="beta")
+    assert find_text(str(p), "beta", match_case=False)["total_count"] == 4
+    assert get_search_index(str(p)) is not index
+
+
+def test_replace_after_search_uses_the_index_without_changing_results(tmp_path: Path):
+    p = _aged_doc(tmp_path / "r.docx")
+    q = _aged_doc(tmp_path / "q.docx")
+    get_session_manager().open_document("main", str(p))
+
+    # Build the index for p's resident document, then replace in both files.
+    result = asyncio.run(get_text(document_id="main", scope="search", search_term="beta", include_formatting=True))
+    assert '"total_count": 2' in result and "Table 0, Row 0, Column 1" in result
+    for path in (p, q):
+        enhanced_search_and_replace(filename=str(path), find_text="b[e]ta", replace_text="B", use_regex=True)
+    get_session_manager().close_all_documents()
+
+    assert [para.text for para in Document(str(p)).paragraphs] == [para.text for para in Document(str(q)).paragraphs]
@@ -8,6 +8,7 @@ from docx import Document
 
 from word_document_server.tools.content_tools import add_text_content, enhanced_search_and_replace
 from word_document_server.tools.document_tools import create_document, get_text
+from word_document_server.utils import regex_runtime
 
 
 def test_guardrail_max_matches_per_call_limits_mutation(tmp_path: Path, monkeypatch):
@@ -113,3 +114,54 @@ def test_get_text_search_output_is_char_capped(tmp_path: Path, monkeypatch):
     assert payload.get("truncated") is True
     assert payload.get("output_truncated") is True
     assert payload.get("returned_count", 0) <= payload.get("total_count", 0)
+
+
+def test_occurrences_and_limit_are_resolved_against_one_match_table(tmp_path: Path, monkeypatch):
+    p = tmp_path / "plan.docx"
+    doc = Document()
+    doc.add_paragraph("x x")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "x"
+    doc.add_paragraph("x")
+    doc.save(str(p))
+
+    # Occurrences count in document order, table cells included.
+    res = enhanced_search_and_replace(filename=str(p), find_text="x", replace_text="y", occurrence_index=3)
+    assert "Replaced 1 occurrence(s)" in res
+    doc = Document(str(p))
+    assert doc.tables[0].cell(0, 0).text == "y"
+    assert [par.text for par in doc.paragraphs] == ["x x", "x"]
+
+    # A limit equal to the number of matches is not reported as reached.
+    monkeypatch.setenv("EW_MAX_MATCHES_PER_CALL", "3")
+    res = enhanced_search_and_replace(filename=str(p), find_text="[xy]", replace_text="z", use_regex=True)
+    assert "Replaced 4 occurrence(s)" not in res and "Replacement limit reached" in res
+    monkeypatch.setenv("EW_MAX_MATCHES_PER_CALL", "4")
+    res = enhanced_search_and_replace(filename=str(p), find_text="[xyz]", replace_text="w", use_regex=True)
+    assert res.startswith("Replaced 4 occurrence(s)") and "limit" not in res
+
+
+
+def test_parallel_regex_scan_matches_the_serial_scan(tmp_path: Path, monkeypatch):
+    doc = Document()
+    for i in range(40):
+        doc.add_paragraph(f"item {i}: id-{i * 7} and id-{i} " * (i % 3))
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "id-99 in a cell"
+    serial, parallel = tmp_path / "serial.docx", tmp_path / "parallel.docx"
+    doc.save(str(serial))
+    doc.save(str(parallel))
+
+    monkeypatch.setenv("EW_CPU_WORKERS", "0")
+    expected = enhanced_search_and_replace(filename=str(serial), find_text=r"id-(\d+)", replace_text="#$1", use_regex=True)
+
+    monkeypatch.setenv("EW_CPU_WORKERS", "2")
+    monkeypatch.setenv("EW_PARALLEL_SCAN_MIN_CHARS", "1")
+    sharded = []
+    parallel_spans = regex_runtime._parallel_spans
+    monkeypatch.setattr(regex_runtime, "_parallel_spans", lambda *a: sharded.append(parallel_spans(*a)) or sharded[-1])
+    result = enhanced_search_and_replace(filename=str(parallel), find_text=r"id-(\d+)", replace_text="#$1", use_regex=True)
+
+    assert sharded and sharded[0] is not None
+    assert result == expected and result.startswith("Replaced 79 occurrence(s)")
+    texts = [[par.text for par in Document(str(path)).paragraphs] for path in (serial, parallel)]
+    assert texts[0] == texts[1]
+    assert Document(str(parallel)).tables[0].cell(0, 0).text == "#99 in a cell"
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+from docx import Document
+
+from tests.helpers import write_docx
+from word_document_server.session_manager import get_session_manager
+from word_document_server.tools.content_tools import add_text_content
+from word_document_server.tools.document_tools import get_text
+from word_document_server.tools.session_tools import open_document, session_manager
+from word_document_server.tools.undo_tools import session_undo
+from word_document_server.utils.session_utils import load_document
+
+
+def test_open_document_is_reused_for_document_id_and_path(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    assert "successfully opened" in open_document("main", str(p)).lower()
+
+    resident = get_session_manager().get_document("main").document
+    assert load_document(str(p)) is resident
+
+    asyncio.run(add_text_content(document_id="main", text="More"))
+    assert load_document(str(p)) is resident
+    assert "More" in [para.text for para in Document(str(p)).paragraphs]
+
+
+def test_deferred_flush_keeps_edits_in_memory_until_save(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("EW_SESSION_FLUSH_OPS", "0")
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    open_document("main", str(p))
+    before = p.read_bytes()
+
+    asyncio.run(add_text_content(document_id="main", text="Pending"))
+    asyncio.run(add_text_content(document_id="main", text="Pending 2"))
+    assert p.read_bytes() == before
+    assert "Pending 2" in asyncio.run(get_text(document_id="main", scope="all"))
+    assert "Unsaved changes: yes" in session_manager("list")
+
+    assert "saved document 'main'" in session_manager("save", document_id="main").lower()
+    texts = [para.text for para in Document(str(p)).paragraphs]
+    assert texts[-2:] == ["Pending", "Pending 2"]
+    assert "no unsaved changes" in session_manager("save", document_id="main").lower()
+
+
+def test_deferred_flush_close_writes_pending_edits(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("EW_SESSION_FLUSH_OPS", "0")
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    open_document("main", str(p))
+
+    asyncio.run(add_text_content(document_id="main", text="On close"))
+    assert "successfully closed" in session_manager("close", document_id="main").lower()
+    assert "On close" in [para.text for para in Document(str(p)).paragraphs]
+
+
+def test_undo_flushes_pending_edits_and_reloads_resident_document(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("EW_SESSION_FLUSH_OPS", "0")
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    open_document("main", str(p))
+    before = p.read_bytes()
+
+    asyncio.run(add_text_content(document_id="main", text="Edit 1"))
+    asyncio.run(add_text_content(document_id="main", text="Edit 2"))
+
+    # Each pending edit is its own undo step.
+    assert "undo successful" in session_undo(action="undo", document_id="main").lower()
+    assert [para.text for para in Document(str(p)).paragraphs] == ["Hello", "Edit 1"]
+    assert "Edit 2" not in asyncio.run(get_text(document_id="main", scope="all"))
+    assert "undo successful" in session_undo(action="undo", document_id="main").lower()
+    assert p.read_bytes() == before
+
+    assert "redo successful" in session_undo(action="redo", document_id="main", steps=2).lower()
+    assert "Edit 2" in asyncio.run(get_text(document_id="main", scope="all"))
+
+
+def test_one_undo_reverts_one_write_behind_edit(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("EW_SESSION_FLUSH_OPS", "5")
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["hello"])
+    open_document("main", str(p))
+
+    asyncio.run(add_text_content(document_id="main", text="first"))
+    asyncio.run(add_text_content(document_id="main", text="second"))
+    assert "undo successful" in session_undo(action="undo", document_id="main").lower()
+
+    assert [para.text for para in Document(str(p)).paragraphs] == ["hello", "first"]
+
+
+def test_write_behind_flushes_every_n_operations(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("EW_SESSION_FLUSH_OPS", "3")
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    open_document("main", str(p))
+    before = p.read_bytes()
+
+    asyncio.run(add_text_content(document_id="main", text="One"))
+    asyncio.run(add_text_content(document_id="main", text="Two"))
+    assert p.read_bytes() == before
+    assert "2 pending operations" in session_manager("list")
+
+    asyncio.run(add_text_content(document_id="main", text="Three"))
+    texts = [para.text for para in Document(str(p)).paragraphs]
+    assert texts[-3:] == ["One", "Two", "Three"]
+    assert not get_session_manager().has_pending_changes(str(p))
+
+
+def test_write_behind_flushes_after_idle_interval(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("EW_SESSION_FLUSH_OPS", "0")
+    monkeypatch.setenv("EW_SESSION_FLUSH_IDLE_MS", "50")
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    open_document("main", str(p))
+
+    asyncio.run(add_text_content(document_id="main", text="Idle"))
+    mgr = get_session_manager()
+    deadline = time.monotonic() + 5
+    while mgr.has_pending_changes(str(p)) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert not mgr.has_pending_changes(str(p))
+    assert "Idle" in [para.text for para in Document(str(p)).paragraphs]
+
+
+def _fail_midway(path: str) -> None:
+    # A write that changes the resident document, then errors before saving.
+    doc = load_document(path, for_write=True)
+    doc.add_paragraph("Half-applied")
+
+
+def test_failed_write_is_not_saved_by_the_next_edit(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    open_document("main", str(p))
+
+    _fail_midway(str(p))
+    assert "Half-applied" not in asyncio.run(get_text(document_id="main", scope="all"))
+    asyncio.run(add_text_content(document_id="main", text="Next"))
+
+    assert [para.text for para in Document(str(p)).paragraphs] == ["Hello", "Next"]
+
+
+def test_failed_write_rolls_back_to_pending_edits(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("EW_SESSION_FLUSH_OPS", "0")
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    open_document("main", str(p))
+
+    asyncio.run(add_text_content(document_id="main", text="Pending"))
+    _fail_midway(str(p))
+    assert "saved document 'main'" in session_manager("save", document_id="main").lower()
+    assert [para.text for para in Document(str(p)).paragraphs] == ["Hello", "Pending"]
+
+    _fail_midway(str(p))
+    asyncio.run(add_text_content(document_id="main", text="Next"))
+    assert "successfully closed" in session_manager("close", document_id="main").lower()
+    assert [para.text for para in Document(str(p)).paragraphs] == ["Hello", "Pending", "Next"]
+
+
+def test_resident_lookup_stats_the_file_outside_the_manager_lock(tmp_path: Path, monkeypatch):
+    import threading
+
+    import word_document_server.session_manager as session_module
+
+    p = tmp_path / "x.docx"
+    write_docx(p, paragraphs=["Hello"])
+    open_document("main", str(p))
+    mgr = get_session_manager()
+    stat = session_module.get_file_signature
+    free = []
+
+    def checked_stat(path):
+        # Another thread can take the manager lock while the file is stat'ed.
+        def probe():
+            acquired = mgr._lock.acquire(timeout=1)
+            free.append(acquired)
+            if acquired:
+                mgr._lock.release()
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return stat(path)
+
+    monkeypatch.setattr(session_module, "get_file_signature", checked_stat)
+    assert mgr.get_resident_document(str(p)) is mgr.get_document("main").document
+    assert free == [True]
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from docx import Document
+
+from tests.helpers import write_docx
+from word_document_server.tools.content_tools import add_text_content
+from word_document_server.tools.session_tools import open_document
+from word_document_server.tools.undo_tools import session_undo
+from word_document_server.undo_manager import get_undo_manager
+from word_document_server.utils.snapshot_store import SnapshotStore
+
+
+def test_store_round_trips_packages_and_arbitrary_bytes(tmp_path: Path):
+    p = write_docx(tmp_path / "x.docx", paragraphs=["Hello"])
+    data = p.read_bytes()
+    store = SnapshotStore()
+
+    manifest = store.add(data)
+    assert len(manifest) > 3  # split into per-part segments
+    assert store.materialize(manifest) == data
+
+    raw = store.add(b"not a zip")
+    assert store.materialize(raw) == b"not a zip"
+
+    store.release(manifest)
+    store.release(raw)
+    assert store.total_bytes == 0 and len(store) == 0
+
+
+def test_unchanged_parts_are_shared_between_snapshots(tmp_path: Path):
+    p = tmp_path / "x.docx"
+    doc = Document()
+    doc.add_paragraph("one")
+    doc.save(str(p))
+    first = p.read_bytes()
+    doc.add_paragraph("two")
+    doc.save(str(p))
+    second = p.read_bytes()
+
+    store = SnapshotStore()
+    a = store.add(first)
+    after_first = store.total_bytes
+    b = store.add(second)
+    # Only document.xml, local headers and the central directory differ.
+    assert store.total_bytes - after_first < len(second) // 4
+    assert store.materialize(a) == first
+    assert store.materialize(b) == second
+
+    store.release(a)
+    assert store.materialize(b) == second
+
+
+def test_many_undo_steps_fit_and_restore_exactly(tmp_path: Path):
+    p = write_docx(tmp_path / "x.docx", paragraphs=["seed"])
+    open_document("main", str(p))
+    versions = [p.read_bytes()]
+    for i in range(15):
+        asyncio.run(add_text_content(document_id="main", text=f"line {i}"))
+        versions.append(p.read_bytes())
+
+    history = get_undo_manager().list_history(str(p))
+    total = int(history.split("total_snapshot_bytes=")[1].split(",")[0])
+    assert total < sum(len(v) for v in versions[:-1]) // 4
+
+    for expected in reversed(versions[:-1]):
+        assert "undo successful" in session_undo(action="undo", document_id="main").lower()
+        assert p.read_bytes() == expected
+
+
+def test_spilled_segments_round_trip_through_compaction(tmp_path: Path, monkeypatch):
+    from word_document_server.utils import snapshot_store
+
+    monkeypatch.setattr(snapshot_store, "_SPILL_COMPACT_MIN_DEAD", 0)
+    store = SnapshotStore(str(tmp_path / "spill"))
+    payloads = [(b"segment-%d " % i) * 200 for i in range(6)]
+    manifests = [store.add(data) for data in payloads]
+
+    assert store.spill(0) > 0
+    assert store.memory_bytes == 0 and store.disk_bytes > 0
+    assert store.disk_bytes < sum(len(p) for p in payloads)  # compressed
+
+    for manifest in manifests[:4]:
+        store.release(manifest)  # leaves dead records; next spill compacts
+    store.add(b"fresh")
+    store.spill(0)
+    assert [store.materialize(m) for m in manifests[4:]] == payloads[4:]
+    store.clear()
+    assert not any((tmp_path / "spill").iterdir())
+
+
+def test_history_spills_to_disk_instead_of_evicting(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("EW_MAX_UNDO_BYTES_TOTAL", "1024")
+    monkeypatch.setenv("EW_UNDO_SPILL_DIR", str(tmp_path / "spill"))
+    p = write_docx(tmp_path / "x.docx", paragraphs=["seed"])
+    open_document("main", str(p))
+    versions = [p.read_bytes()]
+    for i in range(5):
+        asyncio.run(add_text_content(document_id="main", text=f"line {i}"))
+        versions.append(p.read_bytes())
+
+    history = get_undo_manager().list_history(str(p))
+    assert "budget_evictions=0" in history
+    assert "disk_bytes=0" not in history
+
+    for expected in reversed(versions[:-1]):
+        assert "undo successful" in session_undo(action="undo", document_id="main").lower()
+        assert p.read_bytes() == expected
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import zipfile
+from pathlib import Path
+
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.oxml import parse_xml
+
+from tests.helpers import write_docx
+from word_document_server.session_manager import get_session_manager
+from word_document_server.tools.document_tools import get_text
+from word_document_server.utils.parse_cache import get_parse_cache
+from word_document_server.utils.text_stream import iter_body_paragraphs, iter_paragraphs
+
+_HYPERLINK = (
+    '<w:hyperlink xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    "<w:r><w:t>link</w:t></w:r></w:hyperlink>"
+)
+
+
+def _mixed_doc(path: Path) -> Path:
+    doc = Document()
+    p = doc.add_paragraph("tab\there ")
+    p.add_run("line").add_break()
+    p.add_run("page").add_break(WD_BREAK.PAGE)
+    p._p.append(parse_xml(_HYPERLINK))
+    doc.add_paragraph("before table")
+    table = doc.add_table(rows=3, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 1))
+    table.cell(1, 2).merge(table.cell(2, 2))
+    for r in range(3):
+        for c in range(3):
+            table.cell(r, c).text = table.cell(r, c).text + f"r{r}c{c}"
+    table.cell(2, 0).add_table(rows=1, cols=1).cell(0, 0).text = "nested"
+    doc.add_paragraph("after table")
+    doc.save(str(path))
+    return path
+
+
+def test_stream_matches_python_docx_text_and_order(tmp_path: Path):
+    p = _mixed_doc(tmp_path / "mixed.docx")
+    doc = Document(str(p))
+
+    streamed = list(iter_paragraphs(str(p)))
+    assert streamed == list(iter_body_paragraphs(doc))
+
+    body = [item.text for item in streamed if item.cell is None]
+    assert body == [para.text for para in doc.paragraphs]
+    assert body[0] == "tab\there line\npagelink"
+
+    texts = [item.text for item in streamed]
+    assert texts.index("before table") < texts.index("r0c0r0c1") < texts.index("after table")
+    cells = [(item.cell, item.text) for item in streamed if item.cell is not None and item.text]
+    # Merged cells appear once, at their first grid column; nested tables
+    # belong to the enclosing cell.
+    assert cells == [
+        ((0, 0, 0), "r0c0r0c1"),
+        ((0, 0, 2), "r0c2"),
+        ((0, 1, 0), "r1c0"),
+        ((0, 1, 1), "r1c1"),
+        ((0, 1, 2), "r1c2r2c2"),
+        ((0, 2, 0), "r2c0"),
+        ((0, 2, 0), "nested"),
+        ((0, 2, 1), "r2c1"),
+    ]
+
+
+def test_stream_sees_unsaved_session_edits_and_skips_parsing(tmp_path: Path, monkeypatch):
+    p = write_docx(tmp_path / "x.docx", paragraphs=["on disk"])
+    monkeypatch.setenv("EW_SESSION_FLUSH_OPS", "0")
+    mgr = get_session_manager()
+    mgr.open_document("main", str(p))
+    mgr.get_resident_document(str(p)).add_paragraph("unsaved")
+    mgr.commit_document(str(p), mgr.get_resident_document(str(p)))
+
+    assert asyncio.run(get_text(document_id="main", scope="all")) == "on disk\nunsaved"
+    mgr.close_all_documents()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the streaming path must not build a Document")
+
+    monkeypatch.setattr("word_document_server.utils.parse_cache.Document", fail)
+    assert asyncio.run(get_text(filename=str(p), scope="all")) == "on disk\nunsaved"
+    assert get_parse_cache().stats()["entries"] == 0
+
+
+def test_stream_follows_the_package_relationship_to_the_main_part(tmp_path: Path):
+    src = write_docx(tmp_path / "x.docx", paragraphs=["renamed part"])
+    dst = tmp_path / "renamed.docx"
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst, "w") as zout:
+        for info in zin.infolist():
+            data = zin.read(info)
+            name = info.filename
+            if name == "word/document.xml":
+                name = "word/main.xml"
+            elif name in ("_rels/.rels", "[Content_Types].xml"):
+                data = data.replace(b"/word/document.xml", b"/word/main.xml").replace(
+                    b"word/document.xml", b"word/main.xml"
+                )
+            elif name == "word/_rels/document.xml.rels":
+                name = "word/_rels/main.xml.rels"
+            zout.writestr(name, data)
+
+    assert [item.text for item in iter_paragraphs(str(dst))] == ["renamed part"]
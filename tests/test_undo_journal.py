@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+
+from tests.helpers import write_docx
+from word_document_server.tools.content_tools import add_text_content
+from word_document_server.tools.session_tools import open_document
+from word_document_server.undo_manager import UndoManager
+from word_document_server.utils.undo_journal import journal_directory
+
+
+def _edit(mgr: UndoManager, path: Path, data: bytes) -> None:
+    mgr.snapshot(str(path))
+    path.write_bytes(data)
+
+
+def test_history_survives_a_restart(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("EW_UNDO_JOURNAL_DIR", str(tmp_path / "journal"))
+    p = write_docx(tmp_path / "x.docx", paragraphs=["v1"])
+    open_document("main", str(p))
+    versions = [p.read_bytes()]
+    for text in ("v2", "v3"):
+        asyncio.run(add_text_content(document_id="main", text=text))
+        versions.append(p.read_bytes())
+
+    restarted = UndoManager()
+    assert "undo=2, redo=0" in restarted.list_history(str(p))
+    assert "undo successful" in restarted.undo(str(p), steps=2).lower()
+    assert p.read_bytes() == versions[0]
+    assert "redo successful" in restarted.redo(str(p)).lower()
+    assert p.read_bytes() == versions[1]
+
+    again = UndoManager()
+    assert "undo=1, redo=1" in again.list_history(str(p))
+
+
+def test_torn_index_tail_is_ignored(tmp_path: Path, monkeypatch):
+    root = tmp_path / "journal"
+    monkeypatch.setenv("EW_UNDO_JOURNAL_DIR", str(root))
+    p = tmp_path / "x.bin"
+    p.write_bytes(b"one")
+    mgr = UndoManager()
+    _edit(mgr, p, b"two")
+
+    index = Path(journal_directory(str(root), str(p.resolve()))) / "journal.idx"
+    with open(index, "ab") as f:
+        f.write(b'{"op":"push","stack":"undo","manif')
+
+    restarted = UndoManager()
+    assert "undo=1," in restarted.list_history(str(p))
+    _edit(restarted, p, b"three")
+    assert "undo=2," in UndoManager().list_history(str(p))
+
+
+def test_size_cap_drops_oldest_and_compacts(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("EW_UNDO_JOURNAL_DIR", str(tmp_path / "journal"))
+    monkeypatch.setenv("EW_UNDO_JOURNAL_MAX_BYTES", "4096")
+    p = tmp_path / "x.bin"
+    p.write_bytes(os.urandom(1000))
+    mgr = UndoManager()
+    for _ in range(10):
+        _edit(mgr, p, os.urandom(1000))
+
+    history = mgr.list_history(str(p))
+    undo_count = int(history.split("undo=")[1].split(",")[0])
+    journal_bytes = int(history.split("journal_bytes=")[1].split(",")[0].split(" ")[0])
+    assert 0 < undo_count < 10
+    assert journal_bytes <= 4096
+    assert f"undo={undo_count}," in UndoManager().list_history(str(p))
+
+
+def test_evicted_journaled_snapshots_are_still_restorable(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("EW_UNDO_JOURNAL_DIR", str(tmp_path / "journal"))
+    monkeypatch.setenv("EW_MAX_UNDO_BYTES_TOTAL", "1024")
+    monkeypatch.setenv("EW_MAX_UNDO_DISK_BYTES", "0")
+    p = tmp_path / "x.bin"
+    versions = [os.urandom(600) for _ in range(5)]
+    p.write_bytes(versions[0])
+    mgr = UndoManager()
+    for data in versions[1:]:
+        _edit(mgr, p, data)
+
+    assert "budget_evictions=0" in mgr.list_history(str(p))
+    for expected in reversed(versions[:-1]):
+        assert "undo successful" in mgr.undo(str(p)).lower()
+        assert p.read_bytes() == expected
+
+
+def test_clear_history_removes_the_journal(tmp_path: Path, monkeypatch):
+    root = tmp_path / "journal"
+    monkeypatch.setenv("EW_UNDO_JOURNAL_DIR", str(root))
+    p = tmp_path / "x.bin"
+    p.write_bytes(b"one")
+    _edit(UndoManager(), p, b"two")
+
+    UndoManager().clear_history(str(p))
+    assert "undo=0," in UndoManager().list_history(str(p))
+
+
+def test_going_far_over_the_cap_compacts_once(tmp_path: Path, monkeypatch):
+    from word_document_server.utils.undo_journal import UndoJournal
+
+    monkeypatch.setenv("EW_UNDO_JOURNAL_DIR", str(tmp_path / "journal"))
+    p = tmp_path / "x.bin"
+    p.write_bytes(os.urandom(1000))
+    mgr = UndoManager()
+    for _ in range(8):
+        _edit(mgr, p, os.urandom(1000))
+
+    # Reopen with a cap that the next snapshot overshoots by several snapshots.
+    monkeypatch.setenv("EW_UNDO_JOURNAL_MAX_BYTES", "3500")
+    compactions = []
+    compact = UndoJournal._compact
+    monkeypatch.setattr(UndoJournal, "_compact", lambda self: (compactions.append(1), compact(self))[1])
+    restarted = UndoManager()
+    _edit(restarted, p, os.urandom(1000))
+
+    history = restarted.list_history(str(p))
+    journal_bytes = int(history.split("journal_bytes=")[1].split(",")[0].split(" ")[0])
+    assert len(compactions) == 1
+    assert 0 < journal_bytes <= 3500
+    assert "undo=" in history and "undo=9," not in history
@@ -34,3 +34,23 @@ def test_session_undo_uses_active_document_when_no_path_provided(tmp_path: Path)
     restored = _read_bytes(p)
     assert restored == before
 
+
+
+def test_budget_eviction_removes_globally_oldest_snapshots(tmp_path: Path, monkeypatch):
+    from word_document_server.undo_manager import UndoManager
+
+    monkeypatch.setenv("EW_MAX_UNDO_BYTES_TOTAL", "2048")
+    monkeypatch.setenv("EW_MAX_UNDO_DISK_BYTES", "0")
+    mgr = UndoManager()
+    paths = [tmp_path / f"doc{i}.docx" for i in range(50)]
+    for round_no in range(3):
+        for i, p in enumerate(paths):
+            p.write_bytes(f"{round_no}-{i}-".encode() * 60)
+            mgr.snapshot(str(p))
+
+    # Only the newest ~2 KB of history survives: the last few paths' final round.
+    survivors = [p for p in paths if "undo=1," in mgr.list_history(str(p))]
+    assert survivors and survivors == paths[-len(survivors):]
+    assert "UNDO_BUDGET_EXCEEDED" in mgr.list_history(str(paths[0]))
+    # Stale eviction-heap entries are bounded by the live snapshot count.
+    assert len(mgr._eviction_heap) <= 2 * len(mgr._resident) + 64  # pylint: disable=protected-access
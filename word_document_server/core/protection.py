@@ -5,7 +5,7 @@ import os
 import json
 import hashlib
 import datetime
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 
 def add_protection_info(doc_path: str, protection_type: str, password_hash: str, 
@@ -51,12 +51,7 @@ def add_protection_info(doc_path: str, protection_type: str, password_hash: str,
         # Apply actual document encryption if raw_password is provided
         if protection_type == "password" and raw_password:
             import msoffcrypto
-            import tempfile
-            import shutil
-            
-            # Create a temporary file for the encrypted output
-            temp_fd, temp_path = tempfile.mkstemp(suffix='.docx')
-            os.close(temp_fd)
+            from word_document_server.utils.file_utils import atomic_write
             
             try:
                 # Open the document
@@ -66,12 +61,8 @@ def add_protection_info(doc_path: str, protection_type: str, password_hash: str,
                     # Encrypt with password
                     office_file.load_key(password=raw_password)
                     
-                    # Write the encrypted file to the temp path
-                    with open(temp_path, 'wb') as out_file:
-                        office_file.encrypt(out_file)
-                
-                # Replace original with encrypted version
-                shutil.move(temp_path, doc_path)
+                    # Replace the original with the encrypted version
+                    atomic_write(doc_path, office_file.encrypt, kind="protection")
                 
                 # Update metadata to note that true encryption was applied
                 protection_data["true_encryption"] = True
@@ -80,8 +71,6 @@ def add_protection_info(doc_path: str, protection_type: str, password_hash: str,
                     
             except Exception as e:
                 print(f"Encryption error: {str(e)}")
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
                 return False
         
         return True
@@ -165,6 +154,16 @@ def is_section_editable(doc_path: str, section_name: str) -> bool:
         return False
 
 
+def _content_hash(paragraph_texts: Iterable[str]) -> str:
+    """SHA-256 of the body paragraph texts joined by newlines, fed incrementally."""
+    digest = hashlib.sha256()
+    for i, text in enumerate(paragraph_texts):
+        if i:
+            digest.update(b"\n")
+        digest.update(text.encode())
+    return digest.hexdigest()
+
+
 def create_signature_info(doc, signer_name: str, reason: Optional[str] = None) -> Dict[str, Any]:
     """
     Create signature information for a document.
@@ -187,9 +186,10 @@ def create_signature_info(doc, signer_name: str, reason: Optional[str] = None) -
         signature_info["reason"] = reason
     
     # Generate a simple signature hash based on document content and metadata
-    text_content = "\n".join([p.text for p in doc.paragraphs])
-    content_hash = hashlib.sha256(text_content.encode()).hexdigest()
-    signature_info["content_hash"] = content_hash
+    from word_document_server.utils.text_stream import iter_body_paragraphs
+
+    texts = (p.text for p in iter_body_paragraphs(doc, include_tables=False))
+    signature_info["content_hash"] = _content_hash(texts)
     
     return signature_info
 
@@ -204,7 +204,7 @@ def verify_signature(doc_path: str) -> Tuple[bool, str]:
     Returns:
         Tuple of (is_valid, message)
     """
-    from docx import Document
+    from word_document_server.utils.text_stream import iter_paragraph_texts
     
     base_path, _ = os.path.splitext(doc_path)
     metadata_path = f"{base_path}.protection"
@@ -228,9 +228,7 @@ def verify_signature(doc_path: str) -> Tuple[bool, str]:
             return False, "Invalid signature: missing content hash"
         
         # Calculate current content hash
-        doc = Document(doc_path)
-        text_content = "\n".join([p.text for p in doc.paragraphs])
-        current_hash = hashlib.sha256(text_content.encode()).hexdigest()
+        current_hash = _content_hash(iter_paragraph_texts(doc_path, include_tables=False))
         
         # Compare hashes
         if current_hash != original_hash:
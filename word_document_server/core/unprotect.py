@@ -6,8 +6,6 @@ This module handles removing document protection.
 import os
 import json
 import hashlib
-import tempfile
-import shutil
 from typing import Tuple, Optional
 
 def remove_protection_info(filename: str, password: Optional[str] = None) -> Tuple[bool, str]:
@@ -43,10 +41,7 @@ def remove_protection_info(filename: str, password: Optional[str] = None) -> Tup
         if protection_data.get("true_encryption") and password:
             try:
                 import msoffcrypto
-                
-                # Create a temporary file for the decrypted output
-                temp_fd, temp_path = tempfile.mkstemp(suffix='.docx')
-                os.close(temp_fd)
+                from word_document_server.utils.file_utils import atomic_write
                 
                 # Open the encrypted document
                 with open(filename, 'rb') as f:
@@ -56,15 +51,9 @@ def remove_protection_info(filename: str, password: Optional[str] = None) -> Tup
                     try:
                         office_file.load_key(password=password)
                         
-                        # Write the decrypted file to the temp path
-                        with open(temp_path, 'wb') as out_file:
-                            office_file.decrypt(out_file)
-                        
                         # Replace encrypted file with decrypted version
-                        shutil.move(temp_path, filename)
+                        atomic_write(filename, office_file.decrypt, kind="protection")
                     except Exception as decrypt_error:
-                        if os.path.exists(temp_path):
-                            os.unlink(temp_path)
                         return False, f"Failed to decrypt document: {str(decrypt_error)}"
             except ImportError:
                 return False, "Missing msoffcrypto package required for encryption/decryption"
@@ -4,8 +4,11 @@ Acts as the central controller for the MCP server that handles Word document ope
 """
 
 import os
+import signal
 import sys
 from mcp.server.fastmcp import FastMCP
+from word_document_server.session_manager import get_session_manager
+from word_document_server.utils.executor import offload_tool
 from word_document_server.tools import (
     document_tools,
     content_tools,
@@ -18,12 +21,25 @@ from word_document_server.tools import (
     undo_tools,
     equation_tools,
     citation_tools,
+    batch_tools,
 )
 
 
 
+class OffloadingFastMCP(FastMCP):
+    """FastMCP that runs every registered tool on the bounded executor.
+
+    Tool bodies do blocking zip/XML work and subprocess calls; running them
+    on the event loop would stall every other request.
+    """
+
+    def tool(self, *args, **kwargs):
+        register = super().tool(*args, **kwargs)
+        return lambda fn: register(offload_tool(fn))
+
+
 # Initialize FastMCP server
-mcp = FastMCP("word-document-server")
+mcp = OffloadingFastMCP("word-document-server")
 
 def register_tools():
     """Register all tools with the MCP server - CONSOLIDATED VERSION WITH SESSION MANAGEMENT."""
@@ -126,6 +142,10 @@ def register_tools():
     # ========== EQUATION INSERTION (1) ==========
     mcp.tool()(equation_tools.insert_equation)
 
+    # ========== BATCH EDITING (1) ==========
+    # Many edits, one load / snapshot / save
+    mcp.tool()(batch_tools.batch_edit)
+
 
 
 
@@ -135,9 +155,16 @@ def run_server():
     """Run the Word Document MCP Server."""
     # Register all tools
     register_tools()
+
+    # Turn SIGTERM into a normal exit so write-behind session edits are flushed
+    # (see the atexit hook in session_manager).
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     
     # Run the server
-    mcp.run(transport='stdio')
+    try:
+        mcp.run(transport='stdio')
+    finally:
+        get_session_manager().flush_all()
     return mcp
 
 if __name__ == "__main__":
@@ -3,15 +3,36 @@ Document Session Manager for Word Document Server.
 
 Provides in-memory storage and management of open Word documents with simple IDs,
 eliminating the need to pass full file paths for every operation.
+
+Edits to open documents are written behind: a handle is marked dirty and
+flushed after EW_SESSION_FLUSH_OPS operations, after EW_SESSION_FLUSH_IDLE_MS
+without further edits, on an explicit save, on close, or at interpreter exit.
+
+An edit that fails after changing the resident document (it was checked out
+for writing but never saved) is rolled back rather than flushed with the
+next one: to the file on disk, or, when earlier edits are still pending, to
+the copy serialised when the failed edit began.
 """
+import atexit
+import io
 import os
-from typing import Dict, Optional, List, Any
-from dataclasses import dataclass
+import threading
+from pathlib import Path
+from typing import Dict, Optional, List, Any, Tuple
+from dataclasses import dataclass, field
 from docx import Document
-from word_document_server.utils.file_utils import ensure_docx_extension
+from word_document_server.utils.file_utils import (
+    atomic_save_document,
+    ensure_docx_extension,
+    get_file_signature,
+)
+from word_document_server.utils.locks import get_path_lock
+from word_document_server.utils.paragraph_index import get_document_versions
 from word_document_server.utils.limits import (
     SESSION_CONSISTENCY_WARNING,
     get_long_session_op_limit,
+    get_session_flush_idle_ms,
+    get_session_flush_ops,
 )
 
 
@@ -22,10 +43,17 @@ class DocumentHandle:
     file_path: str
     document: Document
     metadata: Dict[str, Any]
+    dirty: bool = False
+    pending_ops: int = 0
+    disk_signature: Optional[Tuple[int, int, int]] = None
+    # Pending edits serialised before the current write (see begin_write).
+    rollback: Optional[bytes] = None
+    resolved_path: str = field(default="", init=False)
     
     def __post_init__(self):
         """Ensure file path has .docx extension."""
         self.file_path = ensure_docx_extension(self.file_path)
+        self.resolved_path = str(Path(self.file_path).resolve())
 
 
 class DocumentSessionManager:
@@ -34,6 +62,12 @@ class DocumentSessionManager:
     def __init__(self):
         self._documents: Dict[str, DocumentHandle] = {}
         self._active_document_id: Optional[str] = None
+        # Guards the handle table and dirty/flush state. Tool calls run on
+        # worker threads and idle-flush timers fire off-thread. Lock order: a
+        # path's reader/writer lock is always taken before this one, and disk
+        # I/O never happens while holding it.
+        self._lock = threading.RLock()
+        self._flush_timers: Dict[str, threading.Timer] = {}
     
     def open_document(self, document_id: str, file_path: str) -> str:
         """
@@ -71,11 +105,18 @@ class DocumentSessionManager:
             if document_id in self._documents:
                 return f"Error: Document ID '{document_id}' is already in use. Use close_document() first or choose a different ID."
             
-            # Try to open the document
-            try:
-                doc = Document(file_path)
-            except Exception as e:
-                return f"Error: Failed to open document '{file_path}': {str(e)}"
+            # Reuse the resident copy when the same file is already open under
+            # another ID so both handles observe the same in-memory edits.
+            existing = self.find_handle_by_path(file_path)
+            if existing is not None:
+                doc = self.get_resident_document(file_path) or existing.document
+                signature = existing.disk_signature
+            else:
+                signature = get_file_signature(file_path)
+                try:
+                    doc = Document(file_path)
+                except Exception as e:
+                    return f"Error: Failed to open document '{file_path}': {str(e)}"
             
             # Create document handle with metadata
             metadata = {
@@ -90,15 +131,21 @@ class DocumentSessionManager:
                 document_id=document_id,
                 file_path=file_path,
                 document=doc,
-                metadata=metadata
+                metadata=metadata,
+                dirty=existing.dirty if existing is not None else False,
+                disk_signature=signature,
+                rollback=existing.rollback if existing is not None else None,
             )
             
-            # Store in session
-            self._documents[document_id] = handle
-            
-            # Set as active if it's the first document
-            if self._active_document_id is None:
-                self._active_document_id = document_id
+            with self._lock:
+                # The parse above ran unlocked; re-check the ID before storing.
+                if document_id in self._documents:
+                    return f"Error: Document ID '{document_id}' is already in use. Use close_document() first or choose a different ID."
+                self._documents[document_id] = handle
+                
+                # Set as active if it's the first document
+                if self._active_document_id is None:
+                    self._active_document_id = document_id
                 
             return f"Successfully opened document '{document_id}' from '{file_path}'"
             
@@ -121,14 +168,29 @@ class DocumentSessionManager:
             
             # Get handle before removing
             handle = self._documents[document_id]
-            
-            # Remove from session
-            del self._documents[document_id]
-            
-            # Update active document if needed
-            if self._active_document_id == document_id:
-                # Set active to another document if available, or None
-                self._active_document_id = next(iter(self._documents.keys())) if self._documents else None
+
+            # Hold the path exclusively so no edit lands between the final
+            # flush and the handle going away.
+            with get_path_lock(handle.resolved_path).write_locked():
+                # Flush pending in-memory edits before the handle goes away.
+                if handle.dirty:
+                    try:
+                        self._flush_handle(handle)
+                    except Exception as e:
+                        return f"Error: Failed to save pending changes for '{document_id}' before closing: {str(e)}"
+                
+                with self._lock:
+                    # Remove from session
+                    if self._documents.get(document_id) is not handle:
+                        return f"Error: Document ID '{document_id}' not found in session"
+                    del self._documents[document_id]
+                    if not self._handles_for_path(handle.resolved_path):
+                        self._cancel_idle_flush(handle.resolved_path)
+                    
+                    # Update active document if needed
+                    if self._active_document_id == document_id:
+                        # Set active to another document if available, or None
+                        self._active_document_id = next(iter(self._documents.keys())) if self._documents else None
             
             return f"Successfully closed document '{document_id}' (was '{handle.file_path}')"
             
@@ -154,7 +216,10 @@ class DocumentSessionManager:
                 result += f"  Path: {handle.file_path}\n"
                 result += f"  Paragraphs: {handle.metadata.get('paragraph_count', 'Unknown')}\n"
                 result += f"  Sections: {handle.metadata.get('section_count', 'Unknown')}\n"
-                result += f"  File size: {handle.metadata.get('file_size', 'Unknown')} bytes\n\n"
+                result += f"  File size: {handle.metadata.get('file_size', 'Unknown')} bytes\n"
+                if handle.dirty:
+                    result += f"  Unsaved changes: yes ({handle.pending_ops} pending operations)\n"
+                result += "\n"
             
             return result.rstrip()
             
@@ -175,8 +240,9 @@ class DocumentSessionManager:
             if document_id not in self._documents:
                 return f"Error: Document ID '{document_id}' not found in session"
             
-            old_active = self._active_document_id
-            self._active_document_id = document_id
+            with self._lock:
+                old_active = self._active_document_id
+                self._active_document_id = document_id
             
             if old_active:
                 return f"Active document changed from '{old_active}' to '{document_id}'"
@@ -248,9 +314,10 @@ class DocumentSessionManager:
         if validation_error:
             return validation_error
 
-        handle = self._documents[document_id]
-        operation_count = int(handle.metadata.get("operation_count", 0)) + 1
-        handle.metadata["operation_count"] = operation_count
+        with self._lock:
+            handle = self._documents[document_id]
+            operation_count = int(handle.metadata.get("operation_count", 0)) + 1
+            handle.metadata["operation_count"] = operation_count
 
         limit = get_long_session_op_limit()
         if operation_count > limit:
@@ -270,15 +337,337 @@ class DocumentSessionManager:
         Returns:
             Success message with count
         """
-        count = len(self._documents)
-        self._documents.clear()
-        self._active_document_id = None
+        failed = self.flush_all()
+        with self._lock:
+            count = len(self._documents)
+            for resolved_path in list(self._flush_timers):
+                self._cancel_idle_flush(resolved_path)
+            self._documents.clear()
+            self._active_document_id = None
+        if failed:
+            return f"Closed {count} documents (failed to save pending changes: {', '.join(failed)})"
         return f"Closed {count} documents"
 
+    # ------------------------------------------------------------------
+    # Resident document access
+    # ------------------------------------------------------------------
+
+    def _handles_for_path(self, resolved_path: str) -> List[DocumentHandle]:
+        return [h for h in self._documents.values() if h.resolved_path == resolved_path]
+
+    def _unique_dirty_handles(self) -> List[DocumentHandle]:
+        seen = set()
+        handles = []
+        for handle in self._documents.values():
+            if handle.dirty and handle.resolved_path not in seen:
+                seen.add(handle.resolved_path)
+                handles.append(handle)
+        return handles
+
+    def _set_path_state(self, resolved_path: str, **state: Any) -> None:
+        for handle in self._handles_for_path(resolved_path):
+            for name, value in state.items():
+                setattr(handle, name, value)
+
+    def _flush_handle(self, handle: DocumentHandle) -> None:
+        """Write the handle's pending edits to disk. Must not hold self._lock."""
+        with get_path_lock(handle.resolved_path).write_locked():
+            with self._lock:
+                doc = handle.document
+            if get_document_versions().release(doc):
+                # Holding the path lock, so that write is over: it failed.
+                self.discard_write(handle.file_path, doc)
+            with self._lock:
+                self._cancel_idle_flush(handle.resolved_path)
+                if not handle.dirty:
+                    return
+                doc = handle.document
+            # Written via a sibling temp file + rename so a crash mid-flush can
+            # never leave a truncated document behind.
+            atomic_save_document(doc, handle.file_path)
+            signature = get_file_signature(handle.file_path)
+            with self._lock:
+                self._set_path_state(
+                    handle.resolved_path, dirty=False, pending_ops=0, disk_signature=signature, rollback=None
+                )
+                if signature is not None:
+                    for alias in self._handles_for_path(handle.resolved_path):
+                        alias.metadata["file_size"] = signature[1]
+
+    def _cancel_idle_flush(self, resolved_path: str) -> None:
+        timer = self._flush_timers.pop(resolved_path, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _schedule_idle_flush(self, resolved_path: str) -> None:
+        """(Re)arm the idle timer so the path is flushed once edits stop."""
+        self._cancel_idle_flush(resolved_path)
+        idle_ms = get_session_flush_idle_ms()
+        if idle_ms <= 0:
+            return
+        timer = threading.Timer(idle_ms / 1000.0, lambda: self._idle_flush(resolved_path, timer))
+        timer.daemon = True
+        self._flush_timers[resolved_path] = timer
+        timer.start()
+
+    def _idle_flush(self, resolved_path: str, timer: threading.Timer) -> None:
+        # Wait for in-flight tool calls on the path so the flush never
+        # serializes a document mid-edit.
+        with get_path_lock(resolved_path).write_locked():
+            with self._lock:
+                # A newer edit re-armed (or a flush cancelled) this timer.
+                if self._flush_timers.get(resolved_path) is not timer:
+                    return
+                self._flush_timers.pop(resolved_path, None)
+                handles = self._handles_for_path(resolved_path)
+            if handles and handles[0].dirty:
+                try:
+                    self._flush_handle(handles[0])
+                except Exception:
+                    # Stay dirty; the next save/close/exit flush retries.
+                    pass
+
+    def find_handle_by_path(self, file_path: str) -> Optional[DocumentHandle]:
+        """
+        Find the open handle backed by file_path, if any.
+
+        Paths are compared after resolution so relative and absolute spellings
+        of the same file map to the same handle.
+        """
+        if not self._documents or not file_path:
+            return None
+        resolved = str(Path(ensure_docx_extension(file_path)).resolve())
+        with self._lock:
+            for handle in self._documents.values():
+                if handle.resolved_path == resolved:
+                    return handle
+        return None
+
+    def get_resident_document(self, file_path: str) -> Optional[Document]:
+        """
+        Get the live Document for file_path when it is open in the session.
+
+        Pending in-memory edits are authoritative; otherwise the file on disk
+        wins, so external writes are never masked by a stale parse.
+
+        Returns:
+            The parsed Document (re-parsed if the file changed externally), or
+            None when the path is not open or no longer exists on disk.
+        """
+        with self._lock:
+            handle = self.find_handle_by_path(file_path)
+            if handle is None:
+                return None
+            if handle.dirty:
+                return handle.document
+            known_signature = handle.disk_signature
+
+        # Stat outside the manager lock so other documents are not held up.
+        signature = get_file_signature(handle.file_path)
+        if signature is None:
+            return None
+        if signature == known_signature:
+            with self._lock:
+                if handle.dirty or handle.disk_signature == signature:
+                    return handle.document
+            # Refreshed or invalidated meanwhile; fall through and re-parse.
+
+        # Re-parse outside the manager lock as well.
+        doc = Document(handle.file_path)
+        with self._lock:
+            if handle.dirty or handle.disk_signature == signature:
+                # Another caller refreshed or edited it meanwhile.
+                return handle.document
+            self._set_path_state(handle.resolved_path, document=doc, disk_signature=signature)
+            return doc
+
+    def commit_document(self, file_path: str, doc: Document) -> bool:
+        """
+        Record a mutation of the resident document for file_path.
+
+        The handle is marked dirty and written behind: it is flushed once
+        EW_SESSION_FLUSH_OPS edits have accumulated (default 1, i.e.
+        write-through; 0 disables count-based flushing), after
+        EW_SESSION_FLUSH_IDLE_MS without further edits, or by
+        save_document()/close_document()/exit.
+
+        Returns:
+            True if the session owns the write, False if the caller must save.
+        """
+        with self._lock:
+            handle = self.find_handle_by_path(file_path)
+            if handle is None or handle.document is not doc:
+                return False
+            self._set_path_state(
+                handle.resolved_path, dirty=True, pending_ops=handle.pending_ops + 1, rollback=None
+            )
+            flush_ops = get_session_flush_ops()
+            flush_now = bool(flush_ops and handle.pending_ops >= flush_ops)
+            if not flush_now:
+                self._schedule_idle_flush(handle.resolved_path)
+        if flush_now:
+            self._flush_handle(handle)
+        return True
+
+    def begin_write(self, file_path: str, doc: Document) -> None:
+        """
+        Note that the resident document for file_path is about to be edited.
+
+        While earlier edits are pending, the file on disk is no rollback point
+        for this one, so the document is serialised first for discard_write
+        (unless pending_data already did so for this edit).
+        """
+        with self._lock:
+            handle = self.find_handle_by_path(file_path)
+            if handle is None or handle.document is not doc or not handle.dirty:
+                return
+            if handle.rollback is not None:
+                # Taken since the last commit, so it is still the current state.
+                return
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        with self._lock:
+            if handle.document is doc:
+                self._set_path_state(handle.resolved_path, rollback=buffer.getvalue())
+
+    def pending_data(self, file_path: str) -> Optional[bytes]:
+        """
+        Serialise the resident document for file_path if it has unflushed edits.
+
+        The file on disk is then older than the document, so these bytes are
+        what an undo snapshot of the next edit must capture. They are kept as
+        that edit's rollback point as well (see begin_write).
+
+        Returns:
+            The document's bytes, or None when nothing is pending.
+        """
+        with self._lock:
+            handle = self.find_handle_by_path(file_path)
+            if handle is None or not handle.dirty:
+                return None
+            doc = handle.document
+        if get_document_versions().release(doc):
+            # No write is running yet, so that one failed; snapshot without it.
+            self.discard_write(file_path, doc)
+        with self._lock:
+            if not handle.dirty:
+                return None
+            if handle.rollback is not None:
+                return handle.rollback
+            doc = handle.document
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        data = buffer.getvalue()
+        with self._lock:
+            if handle.document is doc:
+                self._set_path_state(handle.resolved_path, rollback=data)
+        return data
+
+    def discard_write(self, file_path: str, doc: Document) -> bool:
+        """
+        Roll back an edit of the resident document that never reached
+        commit_document, so its partial changes are neither read nor flushed.
+
+        Returns:
+            True if doc was the resident document for file_path.
+        """
+        with self._lock:
+            handle = self.find_handle_by_path(file_path)
+            if handle is None or handle.document is not doc:
+                return False
+            rollback = handle.rollback
+            if rollback is None:
+                # Nothing pending: the next access re-parses the file.
+                self._cancel_idle_flush(handle.resolved_path)
+                self._set_path_state(handle.resolved_path, dirty=False, pending_ops=0, disk_signature=None)
+                return True
+        restored = Document(io.BytesIO(rollback))
+        with self._lock:
+            if handle.document is doc:
+                self._set_path_state(handle.resolved_path, document=restored, rollback=None)
+        return True
+
+    def has_pending_changes(self, file_path: str) -> bool:
+        """Report whether file_path has in-memory edits not yet written to disk."""
+        handle = self.find_handle_by_path(file_path)
+        return bool(handle and handle.dirty)
+
+    def flush_path(self, file_path: str) -> None:
+        """Write pending in-memory edits for file_path to disk, if any."""
+        handle = self.find_handle_by_path(file_path)
+        if handle is not None and handle.dirty:
+            self._flush_handle(handle)
+
+    def invalidate_path(self, file_path: str) -> None:
+        """
+        Drop the resident parse for file_path after the file was rewritten
+        outside the session (e.g. by undo/redo). The next access re-parses.
+        """
+        with self._lock:
+            handle = self.find_handle_by_path(file_path)
+            if handle is not None:
+                self._cancel_idle_flush(handle.resolved_path)
+                self._set_path_state(
+                    handle.resolved_path, dirty=False, pending_ops=0, disk_signature=None, rollback=None
+                )
+
+    def save_document(self, document_id: Optional[str] = None) -> str:
+        """
+        Write pending in-memory edits to disk.
+
+        Args:
+            document_id: ID of the document to save, or None to save every
+                open document with pending changes
+
+        Returns:
+            Success/error message string
+        """
+        if document_id:
+            validation_error = self.validate_document_id(document_id)
+            if validation_error:
+                return validation_error
+            handle = self._documents[document_id]
+            if not handle.dirty:
+                return f"Document '{document_id}' has no unsaved changes"
+            try:
+                self._flush_handle(handle)
+            except Exception as e:
+                return f"Error: Failed to save document '{document_id}': {str(e)}"
+            return f"Saved document '{document_id}' to '{handle.file_path}'"
+
+        with self._lock:
+            dirty = self._unique_dirty_handles()
+        failed = self.flush_all()
+        if not dirty:
+            return "No documents have unsaved changes"
+        if failed:
+            return f"Error: Failed to save documents: {', '.join(failed)}"
+        return f"Saved {len(dirty)} documents: {', '.join(h.document_id for h in dirty)}"
+
+    def flush_all(self) -> List[str]:
+        """
+        Flush every open document with pending edits.
+
+        Returns:
+            List of "document_id (error)" entries for handles that failed to save
+        """
+        failed = []
+        with self._lock:
+            dirty = self._unique_dirty_handles()
+        for handle in dirty:
+            try:
+                self._flush_handle(handle)
+            except Exception as e:
+                failed.append(f"{handle.document_id} ({str(e)})")
+        return failed
+
 
 # Global session manager instance
 _session_manager = DocumentSessionManager()
 
+# Write-behind edits must not be lost on a normal interpreter shutdown.
+atexit.register(_session_manager.flush_all)
+
 
 def get_session_manager() -> DocumentSessionManager:
     """Get the global document session manager instance."""
@@ -6,7 +6,7 @@ registered by `word_document_server/main.py`.
 """
 
 # ========== CONSOLIDATED TOOLS ==========
-# These unified tools replace numerous legacy functions; total registered tools = 25.
+# These unified tools replace numerous legacy functions; total registered tools = 26.
 
 # Document tools - consolidated
 from word_document_server.tools.document_tools import (
@@ -81,6 +81,9 @@ from word_document_server.tools.equation_tools import insert_equation  # noqa: F
 # Citation tool (consolidated entry point)
 from word_document_server.tools.citation_tools import citations  # noqa: F401
 
+# Batch editing tool (transactional multi-operation edits)
+from word_document_server.tools.batch_tools import batch_edit  # noqa: F401
+
 # Tools registered by `word_document_server/main.py` (source of truth for tool count).
 REGISTERED_TOOL_NAMES = [
     "session_manager",
@@ -108,6 +111,7 @@ REGISTERED_TOOL_NAMES = [
     "citations",
     "session_undo",
     "insert_equation",
+    "batch_edit",
 ]
 
 # Exported symbols for compatibility (includes legacy names not registered by main.py).
@@ -136,7 +140,10 @@ CONSOLIDATED_TOOLS = [
 
     # New undo/redo capability
     'session_undo',
-    'insert_equation'
+    'insert_equation',
+
+    # Transactional batch editing
+    'batch_edit'
 ]
 
 # Total tools registered by main.py (must match `REGISTERED_TOOL_NAMES`).
@@ -0,0 +1,196 @@
+"""
+Transactional batch editing tool for Word Document Server.
+
+Runs an ordered list of editing tool calls against one parsed document with a
+single writeability check, a single undo snapshot and a single save. If any
+step fails, nothing is written and the in-memory document is discarded. A
+step has failed unless the tool reported success through
+``session_utils.mark_operation_succeeded``; result strings are not parsed.
+"""
+
+import inspect
+import os
+from typing import Any, Dict, List, Optional
+
+from word_document_server.session_manager import get_session_manager
+from word_document_server.undo_manager import get_undo_manager
+from word_document_server.tools.content_tools import (
+    add_picture,
+    add_table,
+    add_text_content,
+    enhanced_search_and_replace,
+    format_document,
+)
+from word_document_server.tools.equation_tools import insert_equation
+from word_document_server.tools.review_tools import manage_track_changes
+from word_document_server.tools.section_tools import generate_table_of_contents
+from word_document_server.utils.file_utils import preflight_write
+from word_document_server.utils.limits import (
+    LIMIT_EXCEEDED,
+    check_doc_size_for_operation,
+    get_max_batch_operations,
+)
+from word_document_server.utils.parse_cache import get_parse_cache
+from word_document_server.utils.session_utils import (
+    batch_transaction,
+    load_document,
+    resolve_document_path,
+    save_document,
+)
+
+
+# Editing tools that may appear in a batch, by tool name.
+BATCH_TOOLS = {
+    "add_text_content": add_text_content,
+    "enhanced_search_and_replace": enhanced_search_and_replace,
+    "add_table": add_table,
+    "add_picture": add_picture,
+    "insert_equation": insert_equation,
+    "format_document": format_document,
+    "manage_track_changes": manage_track_changes,
+    "generate_table_of_contents": generate_table_of_contents,
+}
+
+def _validate_operations(operations: Any) -> str:
+    if not isinstance(operations, list) or not operations:
+        return "Error: 'operations' must be a non-empty list of {\"tool\": ..., \"args\": {...}} objects"
+
+    limit = get_max_batch_operations()
+    if len(operations) > limit:
+        return (
+            f"[{LIMIT_EXCEEDED}] Batch refused: {len(operations)} operations exceeds "
+            f"EW_MAX_BATCH_OPERATIONS={limit}."
+        )
+
+    for i, op in enumerate(operations, 1):
+        if not isinstance(op, dict) or "tool" not in op:
+            return f"Error: operation {i} must be an object with a 'tool' key"
+        if op["tool"] not in BATCH_TOOLS:
+            return (
+                f"Error: operation {i} uses unsupported tool '{op['tool']}'. "
+                f"Supported: {', '.join(BATCH_TOOLS)}"
+            )
+        args = op.get("args", {})
+        if not isinstance(args, dict):
+            return f"Error: operation {i} 'args' must be an object"
+        if "document_id" in args or "filename" in args:
+            return (
+                f"Error: operation {i} must not set 'document_id' or 'filename'; "
+                "every operation targets the batch document"
+            )
+    return ""
+
+
+def _discard(file_path: str) -> None:
+    """Forget any in-memory copy of file_path that may hold partial edits."""
+    get_session_manager().invalidate_path(file_path)
+    get_parse_cache().invalidate(file_path)
+
+
+async def batch_edit(
+    operations: List[Dict[str, Any]],
+    document_id: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> str:
+    """Apply several editing operations to one document as a single transaction.
+
+    The document is checked, loaded, snapshotted for undo and saved exactly
+    once, no matter how many operations run. Operations execute in order; if
+    one fails, the batch is rolled back and the file is left untouched. One
+    ``session_undo`` step reverts a whole successful batch.
+
+    Args:
+        operations (List[dict]): Ordered operations, each
+            ``{"tool": <name>, "args": {...}}`` where ``args`` are the tool's
+            usual keyword arguments without ``document_id``/``filename``.
+            Supported tools: add_text_content, enhanced_search_and_replace,
+            add_table, add_picture, insert_equation, format_document,
+            manage_track_changes, generate_table_of_contents.
+        document_id (str): Session document ID (preferred)
+        filename (str): Path to the Word document (legacy, for backward compatibility)
+
+    Returns:
+        str: Per-operation results, or the failing operation and a rollback notice
+
+    Examples:
+        batch_edit(document_id="main", operations=[
+            {"tool": "add_text_content", "args": {"text": "Results", "content_type": "heading", "level": 1}},
+            {"tool": "add_table", "args": {"rows": 2, "cols": 2, "data": [["a", "b"], ["c", "d"]]}},
+            {"tool": "enhanced_search_and_replace", "args": {"find_text": "draft", "replace_text": "final"}},
+        ])
+    """
+    validation_error = _validate_operations(operations)
+    if validation_error:
+        return validation_error
+
+    file_path, error_msg = resolve_document_path(document_id, filename)
+    if error_msg:
+        return error_msg
+
+    if not os.path.exists(file_path):
+        return f"Document {file_path} does not exist"
+
+    size_ok, size_error = check_doc_size_for_operation(file_path, "batch_edit")
+    if not size_ok:
+        return size_error
+
+    session_mgr = get_session_manager()
+    try:
+        # Earlier write-behind edits must be on disk so that rollback (re-reading
+        # the file) and the undo snapshot both reflect the pre-batch state.
+        session_mgr.flush_path(file_path)
+    except Exception as e:
+        return f"Failed to load document for batch: {str(e)}"
+
+    # The pre-batch bytes are kept for the undo snapshot taken before saving.
+    is_writeable, error_message, file_bytes = preflight_write(file_path, snapshot=False)
+    if not is_writeable:
+        return f"Cannot modify document: {error_message}"
+
+    try:
+        doc = load_document(file_path, for_write=True, data=file_bytes)
+    except Exception as e:
+        return f"Failed to load document for batch: {str(e)}"
+
+    # Inner tools resolve the target the same way the caller addressed it.
+    target = {"document_id": document_id} if document_id else {"filename": file_path}
+
+    results = []
+    with batch_transaction(file_path, doc) as transaction:
+        for i, op in enumerate(operations, 1):
+            tool_name = op["tool"]
+            tool = BATCH_TOOLS[tool_name]
+            transaction.succeeded = False
+            try:
+                result = tool(**target, **op.get("args", {}))
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception as e:
+                result = f"Error: {type(e).__name__}: {str(e)}"
+                transaction.succeeded = False
+
+            # Tools report success explicitly (mark_operation_succeeded); any
+            # other outcome, whatever its message, rolls the batch back.
+            if not transaction.succeeded:
+                _discard(file_path)
+                return (
+                    f"Error: Batch rolled back at operation {i} ({tool_name}): {result}\n"
+                    f"No changes were written to {file_path}."
+                )
+            results.append(f"{i}. {tool_name}: {result}")
+
+    if transaction.modified:
+        try:
+            get_undo_manager().snapshot(file_path, data=file_bytes)
+            save_document(doc, file_path)
+        except Exception as e:
+            _discard(file_path)
+            return f"Failed to save batch: {str(e)}"
+        summary = f"Batch applied {len(operations)} operations to {file_path} (1 load, 1 save)"
+    else:
+        summary = f"Batch ran {len(operations)} operations on {file_path}; no changes to save"
+
+    return summary + ":\n" + "\n".join(results)
+
+
+__all__ = ["batch_edit"]
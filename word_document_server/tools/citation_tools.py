@@ -9,7 +9,6 @@ plain async functions intended to be registered by the main MCP server.
 from typing import Optional, Dict, Any, List
 import json
 import os
-from docx import Document
 
 from word_document_server.utils.citation_utils import (
     extract_all_citations_from_document,
@@ -17,7 +16,9 @@ from word_document_server.utils.citation_utils import (
     create_citation_field_xml,
     extract_fields_from_run
 )
-from word_document_server.utils.session_utils import resolve_document_path
+from word_document_server.utils.session_utils import resolve_document_path, load_document
+from word_document_server.utils.body_walker import BodyWalker
+from word_document_server.utils.text_stream import paragraph_text
 
 
 async def list_citations(
@@ -69,7 +70,7 @@ async def list_citations(
         return f"Document {filename} does not exist"
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         all_citations = extract_all_citations_from_document(doc)
         
         # Format based on grouping preference
@@ -199,12 +200,13 @@ async def get_citation_at_position(
         return "paragraph_index is required"
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
+        walker = BodyWalker(doc)
         
-        if paragraph_index >= len(doc.paragraphs):
-            return f"Invalid paragraph index: {paragraph_index}. Document has {len(doc.paragraphs)} paragraphs"
+        if paragraph_index >= len(walker.body_paragraphs):
+            return f"Invalid paragraph index: {paragraph_index}. Document has {len(walker.body_paragraphs)} paragraphs"
         
-        paragraph = doc.paragraphs[paragraph_index]
+        paragraph = walker.paragraph(paragraph_index)
         citations = extract_citations_from_paragraph(paragraph)
         
         result = {
@@ -286,12 +288,13 @@ async def copy_existing_citation(
         return "source_paragraph is required"
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
+        walker = BodyWalker(doc)
         
-        if source_paragraph >= len(doc.paragraphs):
-            return f"Invalid paragraph index: {source_paragraph}. Document has {len(doc.paragraphs)} paragraphs"
+        if source_paragraph >= len(walker.body_paragraphs):
+            return f"Invalid paragraph index: {source_paragraph}. Document has {len(walker.body_paragraphs)} paragraphs"
         
-        paragraph = doc.paragraphs[source_paragraph]
+        paragraph = walker.paragraph(source_paragraph)
         citations = extract_citations_from_paragraph(paragraph)
         
         if not citations:
@@ -375,15 +378,21 @@ async def analyze_citation_distribution(
         return f"Document {filename} does not exist"
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         all_citations = extract_all_citations_from_document(doc)
         
         # Calculate overall statistics
-        total_paragraphs = len(doc.paragraphs)
-        paragraphs_with_citations = len(all_citations['citations_by_paragraph'])
-        
-        # Find citation gaps (consecutive paragraphs without citations)
-        cited_paragraphs = {para['paragraph_index'] for para in all_citations['citations_by_paragraph']}
+        walker = BodyWalker(doc)
+        total_paragraphs = len(walker.body_paragraphs)
+        
+        # Find citation gaps (consecutive paragraphs without citations).
+        # Distribution is measured over body paragraphs; citations in table
+        # cells count towards the totals only.
+        cited_paragraphs = {
+            para['paragraph_index'] for para in all_citations['citations_by_paragraph']
+            if para['paragraph_index'] is not None
+        }
+        paragraphs_with_citations = len(cited_paragraphs)
         
         gaps = []
         gap_start = None
@@ -446,9 +455,9 @@ async def analyze_citation_distribution(
             current_section = "Before first section"
             section_start = 0
             
-            for i, paragraph in enumerate(doc.paragraphs):
+            for i, item in enumerate(walker.body_paragraphs):
                 # Check if this paragraph is a section header
-                para_text = paragraph.text.strip()
+                para_text = paragraph_text(item.element).strip()
                 for header in section_headers:
                     if header.lower() in para_text.lower():
                         # Save previous section data
@@ -475,6 +484,8 @@ async def analyze_citation_distribution(
             # Count citations per section
             for para_info in all_citations['citations_by_paragraph']:
                 para_idx = para_info['paragraph_index']
+                if para_idx is None:
+                    continue
                 
                 for section, data in section_data.items():
                     if data['start_paragraph'] <= para_idx <= data['end_paragraph']:
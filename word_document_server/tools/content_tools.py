@@ -6,26 +6,41 @@ including headings, paragraphs, tables, images, and page breaks.
 """
 import os
 import re
-from typing import List, Optional
-from docx import Document
+from copy import deepcopy
+from itertools import tee
+from typing import List, NamedTuple, Optional
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
 from docx.shared import Inches, Pt
+from docx.text.run import Run
 
-from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension, validate_docx_path, sanitize_file_path
+from word_document_server.utils.file_utils import preflight_write, ensure_docx_extension, validate_docx_path, sanitize_file_path
 from word_document_server.utils.document_utils import find_and_replace_text
-from word_document_server.utils.session_utils import resolve_document_path
+from word_document_server.utils.session_utils import (
+    get_batch_transaction,
+    load_document,
+    mark_operation_succeeded,
+    resolve_document_path,
+    save_document,
+)
+from word_document_server.utils.body_walker import BodyWalker, WalkedParagraph
+from word_document_server.utils.paragraph_index import get_paragraph_index
+from word_document_server.utils.regex_runtime import RegexBudget, RegexTimeout, compile_pattern, scan
+from word_document_server.utils.run_map import RunMap
+from word_document_server.utils.search_index import cached_search_index
+from word_document_server.utils.text_stream import paragraph_text
 from word_document_server.core.styles import ensure_heading_style, ensure_table_style
 from word_document_server.utils.equation_utils import latex_to_omml
-from word_document_server.utils.citation_utils import extract_fields_from_run, format_run_with_citation_awareness
 from word_document_server.utils.limits import (
     LIMIT_EXCEEDED,
     REGEX_COMPLEXITY_BLOCKED,
+    REGEX_TIMEOUT,
     check_doc_size_for_operation,
     get_max_matches_per_call,
     get_max_regex_pattern_chars,
     get_max_regex_scan_chars,
     get_max_search_output_chars,
     get_regex_timeout_ms,
-    is_regex_timeout_supported,
 )
 from docx.oxml import parse_xml
 
@@ -291,23 +306,27 @@ async def add_text_content(
         return size_error
     
     # Check if file is writeable
-    is_writeable, error_message = check_file_writeable(filename)
+    is_writeable, error_message, file_bytes = preflight_write(filename)
     if not is_writeable:
         return f"Cannot modify document: {error_message}. Consider creating a copy first."
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename, for_write=True, data=file_bytes)
         
         # Validate paragraph indices against document
+        index = None
+        if insert_before_paragraph is not None or insert_after_paragraph is not None:
+            index = get_paragraph_index(doc)
+            paragraph_count = len(index)
         if insert_before_paragraph is not None:
             insert_before_paragraph = int(insert_before_paragraph)
-            if insert_before_paragraph >= len(doc.paragraphs):
-                return f"Invalid insert_before_paragraph: {insert_before_paragraph}. Document has {len(doc.paragraphs)} paragraphs (0-{len(doc.paragraphs)-1})."
+            if insert_before_paragraph >= paragraph_count:
+                return f"Invalid insert_before_paragraph: {insert_before_paragraph}. Document has {paragraph_count} paragraphs (0-{paragraph_count-1})."
         
         if insert_after_paragraph is not None:
             insert_after_paragraph = int(insert_after_paragraph)
-            if insert_after_paragraph >= len(doc.paragraphs):
-                return f"Invalid insert_after_paragraph: {insert_after_paragraph}. Document has {len(doc.paragraphs)} paragraphs (0-{len(doc.paragraphs)-1})."
+            if insert_after_paragraph >= paragraph_count:
+                return f"Invalid insert_after_paragraph: {insert_after_paragraph}. Document has {paragraph_count} paragraphs (0-{paragraph_count-1})."
         
         # Create the content element
         if content_type == "heading":
@@ -369,20 +388,12 @@ async def add_text_content(
         # Handle positioning for before/after insertions
         if position == "before":
             # Move element to before specified paragraph
-            target_paragraph = doc.paragraphs[insert_before_paragraph]
-            target_paragraph._element.getparent().insert(
-                list(target_paragraph._element.getparent()).index(target_paragraph._element),
-                created_element._element
-            )
+            index.element(insert_before_paragraph).addprevious(created_element._element)
             success_message += f" before paragraph {insert_before_paragraph}"
         
         elif position == "after":
             # Move element to after specified paragraph
-            target_paragraph = doc.paragraphs[insert_after_paragraph]
-            target_paragraph._element.getparent().insert(
-                list(target_paragraph._element.getparent()).index(target_paragraph._element) + 1,
-                created_element._element
-            )
+            index.element(insert_after_paragraph).addnext(created_element._element)
             success_message += f" after paragraph {insert_after_paragraph}"
         
         elif position == "beginning" and content_type == "paragraph":
@@ -390,7 +401,8 @@ async def add_text_content(
             doc._body._element.insert(0, created_element._element)
             success_message += " at document beginning"
         
-        doc.save(filename)
+        save_document(doc, filename)
+        mark_operation_succeeded(filename)
         return f"{success_message} to {filename}"
     
     except Exception as e:
@@ -433,13 +445,13 @@ async def add_table(document_id: str = None, filename: str = None, rows: int = N
         return "Invalid parameters: 'rows' and 'cols' must be positive integers"
     
     # Check if file is writeable
-    is_writeable, error_message = check_file_writeable(filename)
+    is_writeable, error_message, file_bytes = preflight_write(filename)
     if not is_writeable:
         # Suggest creating a copy
         return f"Cannot modify document: {error_message}. Consider creating a copy first or creating a new document."
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename, for_write=True, data=file_bytes)
         table = doc.add_table(rows=rows, cols=cols)
         
         # Try to set the table style
@@ -459,7 +471,8 @@ async def add_table(document_id: str = None, filename: str = None, rows: int = N
                         break
                     table.cell(i, j).text = str(cell_text)
         
-        doc.save(filename)
+        save_document(doc, filename)
+        mark_operation_succeeded(filename)
         return f"Table ({rows}x{cols}) added to {filename}"
     except Exception as e:
         return f"Failed to add table: {str(e)}"
@@ -514,12 +527,12 @@ async def add_picture(document_id: str = None, filename: str = None, image_path:
         return f"Error checking image file: {str(size_error)}"
     
     # Check if file is writeable
-    is_writeable, error_message = check_file_writeable(abs_filename)
+    is_writeable, error_message, file_bytes = preflight_write(abs_filename)
     if not is_writeable:
         return f"Cannot modify document: {error_message}. Consider creating a copy first or creating a new document."
     
     try:
-        doc = Document(abs_filename)
+        doc = load_document(abs_filename, for_write=True, data=file_bytes)
         # Additional diagnostic info
         diagnostic = f"Attempting to add image ({abs_image_path}, {image_size:.2f} KB) to document ({abs_filename})"
         
@@ -528,7 +541,8 @@ async def add_picture(document_id: str = None, filename: str = None, image_path:
                 doc.add_picture(abs_image_path, width=Inches(width))
             else:
                 doc.add_picture(abs_image_path)
-            doc.save(abs_filename)
+            save_document(doc, abs_filename)
+            mark_operation_succeeded(abs_filename)
             return f"Picture {image_path} added to {filename}"
         except Exception as inner_error:
             # More detailed error for the specific operation
@@ -562,7 +576,8 @@ def enhanced_search_and_replace(document_id: str = None, filename: str = None,
                                     char_end: Optional[int] = None,
                                     replace_with_equation: bool = False,
                                     latex_equation: Optional[str] = None,
-                                    preserve_fields: bool = True) -> str:
+                                    preserve_fields: bool = True,
+                                    rules: Optional[List[dict]] = None) -> str:
     """Enhanced search and replace with formatting options, regex support, and case-insensitive matching.
     
     Provides powerful text replacement capabilities with:
@@ -571,6 +586,7 @@ def enhanced_search_and_replace(document_id: str = None, filename: str = None,
     - Whole word matching
     - Advanced formatting application to replaced text
     - Table content support
+    - Several find/replace rules applied in one pass (``rules``)
     
     Args:
         document_id: Session document ID (preferred)
@@ -596,6 +612,14 @@ def enhanced_search_and_replace(document_id: str = None, filename: str = None,
         replace_with_equation: Replace matched text with a LaTeX equation (default False)
         latex_equation: LaTeX equation to insert (required if replace_with_equation=True)
         preserve_fields: Preserve Word fields like EndNote citations when replacing text (default True)
+        rules: Instead of find_text/replace_text, a list of rules
+            ``{"find", "replace", "use_regex", "match_case", "whole_words_only", "formatting"}``
+            applied together in one pass over the document. Omitted keys take
+            the call's values; ``formatting`` holds bold/italic/underline/color/
+            font_size/font_name (default: the call's formatting if
+            apply_formatting). Where matches overlap, the leftmost wins, then
+            the longest, then the earlier rule. Cannot be combined with
+            occurrence_index or replace_with_equation.
     
     Returns:
         Status message with replacement count and details
@@ -630,6 +654,13 @@ def enhanced_search_and_replace(document_id: str = None, filename: str = None,
         # Replace text while preserving EndNote citations
         enhanced_search_and_replace(document_id="paper", find_text="old methodology", 
                                    replace_text="new approach", preserve_fields=True)
+        
+        # Normalize several terms in one pass
+        enhanced_search_and_replace(document_id="paper", whole_words_only=True, rules=[
+            {"find": "e-mail", "replace": "email"},
+            {"find": "data base", "replace": "database", "match_case": False},
+            {"find": r"(\\d+) ?ms\\b", "replace": "$1 ms", "use_regex": True},
+        ])
     """
     from word_document_server.utils.session_utils import resolve_document_path
     
@@ -642,6 +673,33 @@ def enhanced_search_and_replace(document_id: str = None, filename: str = None,
         return path_error
 
     
+    if rules is not None:
+        return _search_and_replace_rules(
+            filename, rules,
+            find_text=find_text,
+            defaults={
+                'replace': replace_text,
+                'use_regex': use_regex,
+                'match_case': match_case,
+                'whole_words_only': whole_words_only,
+                'formatting': {
+                    'bold': bold,
+                    'italic': italic,
+                    'underline': underline,
+                    'color': color,
+                    'font_size': font_size,
+                    'font_name': font_name,
+                } if apply_formatting else None,
+            },
+            start_paragraph=start_paragraph,
+            end_paragraph=end_paragraph,
+            paragraph_indices=paragraph_indices,
+            occurrence_index=occurrence_index,
+            char_start=char_start,
+            char_end=char_end,
+            replace_with_equation=replace_with_equation,
+        )
+
     # Validate required parameters
     if not find_text:
         return "Error: find_text parameter is required"
@@ -663,62 +721,28 @@ def enhanced_search_and_replace(document_id: str = None, filename: str = None,
         return size_error
     
     # Check if file is writeable
-    is_writeable, error_message = check_file_writeable(filename)
+    is_writeable, error_message, file_bytes = preflight_write(filename)
     if not is_writeable:
         return f"Cannot modify document: {error_message}. Consider creating a copy first."
     
     # Validate range / occurrence parameters (Tier-1 & Tier-2)
-    if paragraph_indices is not None and (start_paragraph is not None or end_paragraph is not None):
-        return "Error: paragraph_indices cannot be combined with start_paragraph/end_paragraph"
-
     if occurrence_index is not None and occurrence_index < 1:
         return "Error: occurrence_index must be >= 1"
 
-    if (char_start is not None or char_end is not None) and paragraph_indices is None and start_paragraph is None and end_paragraph is None:
-        return "Error: char_start/char_end require a paragraph range to be specified"
-
-    if (char_start is None) != (char_end is None):
-        return "Error: char_start and char_end must both be provided together"
-
-    if char_start is not None and char_end is not None and char_end < char_start:
-        return "Error: char_end cannot be less than char_start"
+    range_error = _range_arguments_error(start_paragraph, end_paragraph, paragraph_indices, char_start, char_end)
+    if range_error:
+        return range_error
 
     # Guardrails
     max_matches_per_call = get_max_matches_per_call()
     max_output_chars = get_max_search_output_chars()
-    max_regex_pattern_chars = get_max_regex_pattern_chars()
     max_regex_scan_chars = get_max_regex_scan_chars()
-    regex_timeout_ms = get_regex_timeout_ms()
 
     # Validate regex pattern if using regex
     if use_regex:
-        if len(find_text) > max_regex_pattern_chars:
-            return (
-                f"[{LIMIT_EXCEEDED}] Regex pattern too long. "
-                f"len(find_text)={len(find_text)} exceeds EW_MAX_REGEX_PATTERN_CHARS={max_regex_pattern_chars}."
-            )
-
-        complexity_reason = _regex_complexity_reason(find_text)
-        if complexity_reason:
-            return (
-                f"[{REGEX_COMPLEXITY_BLOCKED}] Regex pattern refused by preflight: "
-                f"{complexity_reason}. Refine the expression."
-            )
-
-        if regex_timeout_ms > 0 and not is_regex_timeout_supported():
-            return (
-                f"[{REGEX_COMPLEXITY_BLOCKED}] EW_REGEX_TIMEOUT_MS={regex_timeout_ms} is configured, "
-                "but timeout-capable regex runtime is unavailable. Set EW_REGEX_TIMEOUT_MS=0 "
-                "or add runtime support for regex timeouts."
-            )
-
-        try:
-            import re
-            # Validate with the same flags used at runtime
-            flags = re.IGNORECASE if not match_case else 0
-            re.compile(find_text, flags)
-        except re.error as e:
-            return f"Invalid regex pattern '{find_text}': {str(e)}"
+        regex_error = _regex_refusal(find_text, match_case)
+        if regex_error:
+            return regex_error
 
     # Pre-validate LaTeX conversion once to avoid partial/slow failures during replacement.
     # If conversion fails, we bail out before mutating any document content.
@@ -730,14 +754,12 @@ def enhanced_search_and_replace(document_id: str = None, filename: str = None,
         precomputed_equation_omml_xml = omml_or_err
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename, for_write=True, data=file_bytes)
+        walker = BodyWalker(doc)
+        index = get_paragraph_index(doc)
 
         if use_regex:
-            regex_scan_chars = sum(len(p.text) for p in doc.paragraphs)
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        regex_scan_chars += sum(len(p.text) for p in cell.paragraphs)
+            regex_scan_chars = sum(len(paragraph_text(item.element)) for item in walker.paragraphs)
             if regex_scan_chars > max_regex_scan_chars:
                 return (
                     f"[{LIMIT_EXCEEDED}] Regex search refused due to scan-size guardrail. "
@@ -746,117 +768,49 @@ def enhanced_search_and_replace(document_id: str = None, filename: str = None,
                 )
         
         # Determine which paragraphs to process.
-        #
-        # Note: A valid .docx can contain tables but zero "body paragraphs" as
-        # exposed by python-docx. In that case, we still want to process table
-        # cell paragraphs when the caller did not specify a paragraph range.
-        total_paragraphs = len(doc.paragraphs)
-        if total_paragraphs == 0:
-            if paragraph_indices is not None or start_paragraph is not None or end_paragraph is not None:
-                return "Invalid paragraph range. Document has 0 paragraphs."
-            target_paragraphs = []
-        elif paragraph_indices is not None:
-            target_paragraphs = sorted(set(paragraph_indices))
-            if any(idx < 0 or idx >= total_paragraphs for idx in target_paragraphs):
-                return f"Invalid paragraph range. Document has {total_paragraphs} paragraphs (0-{total_paragraphs-1})"
-        else:
-            start_idx = start_paragraph if start_paragraph is not None else 0
-            end_idx = end_paragraph if end_paragraph is not None else total_paragraphs - 1
-            if start_idx < 0 or end_idx >= total_paragraphs or start_idx > end_idx:
-                return f"Invalid paragraph range. Document has {total_paragraphs} paragraphs (0-{total_paragraphs-1})"
-            target_paragraphs = list(range(start_idx, end_idx + 1))
-
-        # Global occurrence counter
-        current_occurrence = 0
-        replacement_limit_hit = False
-
-        def process_para(p_idx, paragraph_list):
-            nonlocal current_occurrence, count, equations_inserted, replacement_limit_hit
-            # If p_idx is provided, honor paragraph-range gating; for table
-            # paragraphs (p_idx is None), process unconditionally.
-            if replacement_limit_hit:
-                return
-            if p_idx is not None and p_idx not in target_paragraphs:
-                return
-            import re
-            para_text_combined = "\n".join([p.text for p in paragraph_list])
-            if use_regex:
-                pattern_tmp = find_text
-                if whole_words_only:
-                    pattern_tmp = rf"\b(?:{pattern_tmp})\b"
-                flags_tmp = re.IGNORECASE if not match_case else 0
-            else:
-                escaped = re.escape(find_text)
-                pattern_tmp = rf"\b{escaped}\b" if whole_words_only else escaped
-                flags_tmp = re.IGNORECASE if not match_case else 0
-            try:
-                total_matches_para = len(list(re.finditer(pattern_tmp, para_text_combined, flags_tmp)))
-            except re.error:
-                total_matches_para = 0
-
-            # Determine if this paragraph contains the target occurrence
-            local_target = None
-            if occurrence_index is not None:
-                if current_occurrence + total_matches_para < occurrence_index:
-                    # target occurs later; just advance counter
-                    current_occurrence += total_matches_para
-                    return
-                else:
-                    local_target = occurrence_index - current_occurrence
-
-            replace_count, match_count, had_equations = _enhanced_replace_in_paragraphs(
-                paragraph_list,
-                find_text,
-                replace_text,
-                apply_formatting,
-                bold,
-                italic,
-                underline,
-                color,
-                font_size,
-                font_name,
-                match_case,
-                whole_words_only,
-                use_regex,
-                target_occurrence=local_target,
-                char_start=char_start,
-                char_end=char_end,
-                replace_with_equation=replace_with_equation,
-                latex_equation=latex_equation,
-                preserve_fields=preserve_fields,
-                equation_omml_xml=precomputed_equation_omml_xml,
-                max_replacements=max_matches_per_call - count,
-            )
-            if had_equations:
-                equations_inserted = True
-            current_occurrence += match_count
-            count += replace_count
-            if count >= max_matches_per_call:
-                replacement_limit_hit = True
-    
-        count = 0
-        equations_inserted = False
-        
-
-        
-        # Process body paragraphs
-        for idx, para in enumerate(doc.paragraphs):
-            process_para(idx, [para])
-            if replacement_limit_hit:
-                break
-
-        # Search in tables (treat cell paragraphs independently of doc paragraph indices)
-        if not replacement_limit_hit:
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        process_para(None, cell.paragraphs)
-                        if replacement_limit_hit:
-                            break
-                    if replacement_limit_hit:
-                        break
-                if replacement_limit_hit:
-                    break
+        target_paragraphs, range_error = _target_paragraphs(
+            len(index), start_paragraph, end_paragraph, paragraph_indices
+        )
+        if range_error:
+            return range_error
+
+        formatting = None
+        if apply_formatting:
+            formatting = {
+                'bold': bold,
+                'italic': italic,
+                'underline': underline,
+                'color': color,
+                'font_size': font_size,
+                'font_name': font_name,
+            }
+        rule = _compile_rule(find_text, replace_text, use_regex, match_case, whole_words_only, formatting)
+
+        # If an earlier read already indexed this version of the document,
+        # skip body paragraphs that cannot contain a match. Building the index
+        # here would cost more than the scan it saves.
+        body_candidates = None
+        search_index = cached_search_index(doc)
+        if search_index is not None:
+            candidate_pids = search_index.regex_candidates(rule['pattern'].pattern, rule['pattern'].flags)
+            if candidate_pids is not None:
+                body_candidates = {search_index.paragraphs[pid].paragraph_index for pid in candidate_pids}
+
+        plan, replacement_limit_hit = _plan_replacements(
+            walker, [rule], target_paragraphs,
+            body_candidates=body_candidates,
+            char_start=char_start,
+            char_end=char_end,
+            occurrence_index=occurrence_index,
+            max_matches=max_matches_per_call,
+            budget=RegexBudget(get_regex_timeout_ms()),
+        )
+        count = len(plan)
+        equations_inserted = _apply_plan(
+            walker, [rule], plan,
+            replace_with_equation=replace_with_equation,
+            equation_omml_xml=precomputed_equation_omml_xml,
+        )
         
         if count > 0:
             # If equations were inserted, ensure math namespace is present
@@ -866,7 +820,7 @@ def enhanced_search_and_replace(document_id: str = None, filename: str = None,
                 if "m" not in root.nsmap:
                     root.set(qn("xmlns:m"), "http://schemas.openxmlformats.org/officeDocument/2006/math")
             
-            doc.save(filename)
+            save_document(doc, filename)
             search_type = "regex pattern" if use_regex else "text"
             case_info = "" if match_case else " (case-insensitive)"
             word_info = " (whole words only)" if whole_words_only else ""
@@ -887,12 +841,16 @@ def enhanced_search_and_replace(document_id: str = None, filename: str = None,
                     f" [{LIMIT_EXCEEDED}] Replacement limit reached: EW_MAX_MATCHES_PER_CALL={max_matches_per_call}. "
                     "Additional matches were not modified."
                 )
+            mark_operation_succeeded(filename)
             return _truncate_message(response, max_output_chars)
         else:
             search_type = "regex pattern" if use_regex else "text"
             response = f"No occurrences of {search_type} '{find_text}' found."
+            mark_operation_succeeded(filename)
             return _truncate_message(response, max_output_chars)
             
+    except RegexTimeout as e:
+        return _regex_timeout_message(e)
     except FileNotFoundError:
         return f"Document {filename} not found"
     except PermissionError:
@@ -901,340 +859,458 @@ def enhanced_search_and_replace(document_id: str = None, filename: str = None,
         return f"Failed to search and replace: {str(e)}"
 
 
-def _enhanced_replace_in_paragraphs(paragraphs, find_text, replace_text, apply_formatting,
-                                   bold, italic, underline, color, font_size, font_name,
-                                   match_case, whole_words_only, use_regex=False,
-                                   target_occurrence=None,
-                                   char_start=None, char_end=None,
-                                   replace_with_equation=False, latex_equation=None,
-                                   preserve_fields=True,
-                                   equation_omml_xml=None,
-                                   max_replacements=None):
-    """Helper function to replace text in paragraphs with optional formatting and regex support.
-    
-    This implementation fixes the positioning bugs by properly inserting runs at their
-    correct positions instead of always appending to the end of the paragraph.
-    Supports both literal text matching and regex pattern matching.
+def _range_arguments_error(start_paragraph, end_paragraph, paragraph_indices, char_start, char_end) -> str:
+    """Reject inconsistent paragraph/character range arguments; "" if valid."""
+    if paragraph_indices is not None and (start_paragraph is not None or end_paragraph is not None):
+        return "Error: paragraph_indices cannot be combined with start_paragraph/end_paragraph"
+
+    if (char_start is not None or char_end is not None) and paragraph_indices is None and start_paragraph is None and end_paragraph is None:
+        return "Error: char_start/char_end require a paragraph range to be specified"
+
+    if (char_start is None) != (char_end is None):
+        return "Error: char_start and char_end must both be provided together"
+
+    if char_start is not None and char_end is not None and char_end < char_start:
+        return "Error: char_end cannot be less than char_start"
+    return ""
+
+
+def _target_paragraphs(total_paragraphs, start_paragraph, end_paragraph, paragraph_indices):
+    """Body paragraph numbers a replace may touch, as (set or range, error).
+
+    Note: A valid .docx can contain tables but zero "body paragraphs" as
+    exposed by python-docx. In that case, we still want to process table
+    cell paragraphs when the caller did not specify a paragraph range.
     """
-    import re
-    
-    count = 0
-    match_total_overall = 0  # total matches found (ignores char-range / occurrence filters)
-    equations_inserted = False  # Track if any equations were inserted
-    
-    for para in paragraphs:
-        para_text = para.text
-        
-        # Create search pattern based on options
-        if use_regex:
-            # Respect whole_words_only even in regex mode by wrapping pattern
-            pattern = find_text
-            if whole_words_only:
-                pattern = rf"\b(?:{pattern})\b"
+    if total_paragraphs == 0:
+        if paragraph_indices is not None or start_paragraph is not None or end_paragraph is not None:
+            return None, "Invalid paragraph range. Document has 0 paragraphs."
+        return range(0), ""
+    invalid = f"Invalid paragraph range. Document has {total_paragraphs} paragraphs (0-{total_paragraphs-1})"
+    if paragraph_indices is not None:
+        target_paragraphs = set(paragraph_indices)
+        if any(idx < 0 or idx >= total_paragraphs for idx in target_paragraphs):
+            return None, invalid
+        return target_paragraphs, ""
+    start_idx = start_paragraph if start_paragraph is not None else 0
+    end_idx = end_paragraph if end_paragraph is not None else total_paragraphs - 1
+    if start_idx < 0 or end_idx >= total_paragraphs or start_idx > end_idx:
+        return None, invalid
+    return range(start_idx, end_idx + 1), ""
+
+
+def _regex_refusal(pattern: str, match_case: bool) -> str:
+    """Guardrail and syntax checks for a user regex; "" if it may run."""
+    max_regex_pattern_chars = get_max_regex_pattern_chars()
+    if len(pattern) > max_regex_pattern_chars:
+        return (
+            f"[{LIMIT_EXCEEDED}] Regex pattern too long. "
+            f"len(find_text)={len(pattern)} exceeds EW_MAX_REGEX_PATTERN_CHARS={max_regex_pattern_chars}."
+        )
 
-            flags = re.IGNORECASE if not match_case else 0
-        else:
-            # Escape special regex characters for literal matching
-            escaped_text = re.escape(find_text)
-            if whole_words_only:
-                pattern = r'\b' + escaped_text + r'\b'
-            else:
-                pattern = escaped_text
-            flags = re.IGNORECASE if not match_case else 0
-        
-        # Find all matches in the paragraph text
-        try:
-            matches = list(re.finditer(pattern, para_text, flags))
-        except re.error:
-            continue  # Skip if pattern compilation fails
-        para_match_total = len(matches)
-        match_total_overall += para_match_total
-
-        if not matches:
-            continue
-            
-        matches_to_apply = []
-        occurrence_counter = 0  # counts matches that pass char-range gating
-
-        for idx, m in enumerate(matches, start=1):
-            # Character-range gating
-            if char_start is not None and char_end is not None:
-                if not (char_start <= m.start() and m.end() <= char_end):
-                    continue  # do NOT count this occurrence toward counter
-            # Increment occurrence counter *after* char-range gate
-            occurrence_counter += 1
-
-            # Occurrence-specific gating
-            if target_occurrence is not None and occurrence_counter != target_occurrence:
-                continue
+    complexity_reason = _regex_complexity_reason(pattern)
+    if complexity_reason:
+        return (
+            f"[{REGEX_COMPLEXITY_BLOCKED}] Regex pattern refused by preflight: "
+            f"{complexity_reason}. Refine the expression."
+        )
 
-            matches_to_apply.append(m)
+    try:
+        # Validate with the same flags used at runtime
+        compile_pattern(pattern, re.IGNORECASE if not match_case else 0)
+    except re.error as e:
+        return f"Invalid regex pattern '{pattern}': {str(e)}"
+    return ""
 
-            # If we were targeting a single specific occurrence, we can stop after grabbing it
-            if target_occurrence is not None:
-                break
 
-        if not matches_to_apply:
-            continue
+def _regex_timeout_message(error: RegexTimeout) -> str:
+    return (
+        f"[{REGEX_TIMEOUT}] Regex matching stopped after EW_REGEX_TIMEOUT_MS={error.timeout_ms}; "
+        "no changes were made. Refine the expression or raise the limit."
+    )
 
-        if max_replacements is not None:
-            remaining = max_replacements - count
-            if remaining <= 0:
-                break
-            if len(matches_to_apply) > remaining:
-                matches_to_apply = matches_to_apply[:remaining]
 
-        count += len(matches_to_apply)
-        
-        # Process matches from right to left to avoid position shifting during replacement
-        for match in reversed(matches_to_apply):
-            start_pos = match.start()
-            end_pos = match.end()
-            matched_text_for_fallback = para_text[start_pos:end_pos]
-            
-            # For regex, translate JS back-refs then expand groups
-            if use_regex and not replace_with_equation:
-                converted_repl = _convert_js_backreferences(replace_text)
-                actual_replace_text = match.expand(converted_repl)
-            elif not replace_with_equation:
-                actual_replace_text = replace_text
-            else:
+_RULE_KEYS = {'find', 'replace', 'use_regex', 'match_case', 'whole_words_only', 'formatting'}
+_FORMATTING_KEYS = {'bold', 'italic', 'underline', 'color', 'font_size', 'font_name'}
+
+
+def _compile_rules(rules, defaults):
+    """Validate search/replace rules and fill in defaults, as (rules, error)."""
+    if not isinstance(rules, list) or not rules:
+        return None, "Error: 'rules' must be a non-empty list of {\"find\": ..., \"replace\": ...} objects"
+    compiled = []
+    for number, rule in enumerate(rules, 1):
+        if not isinstance(rule, dict):
+            return None, f"Error: rule {number} must be an object"
+        unknown = set(rule) - _RULE_KEYS
+        if unknown:
+            return None, f"Error: rule {number} has unknown keys: {', '.join(sorted(unknown))}"
+        merged = {**defaults, **rule}
+        if not merged.get('find'):
+            return None, f"Error: rule {number} needs a non-empty 'find'"
+        if merged['replace'] is None:
+            return None, f"Error: rule {number} needs a 'replace' value"
+        formatting = merged['formatting']
+        if formatting is not None:
+            if not isinstance(formatting, dict) or set(formatting) - _FORMATTING_KEYS:
+                return None, (
+                    f"Error: rule {number} 'formatting' must be an object with keys from "
+                    f"{', '.join(sorted(_FORMATTING_KEYS))}"
+                )
+        if merged['use_regex']:
+            regex_error = _regex_refusal(merged['find'], merged['match_case'])
+            if regex_error:
+                return None, f"Error: rule {number}: {regex_error}"
+        compiled.append(_compile_rule(
+            merged['find'], merged['replace'], merged['use_regex'], merged['match_case'],
+            merged['whole_words_only'], formatting,
+        ))
+    return compiled, ""
+
+
+def _compile_rule(find, replace, use_regex, match_case, whole_words_only, formatting):
+    """A search/replace rule with its (cached) compiled pattern."""
+    # Literal text is escaped; whole_words_only wraps regexes too.
+    pattern = find if use_regex else re.escape(find)
+    return {
+        'find': find,
+        'replace': replace,
+        'use_regex': use_regex,
+        'match_case': match_case,
+        'whole_words_only': whole_words_only,
+        'formatting': formatting,
+        'pattern': compile_pattern(pattern, 0 if match_case else re.IGNORECASE, whole_words_only),
+    }
+
+
+class _PlannedMatch(NamedTuple):
+    """One row of a replace plan, in document order."""
+
+    paragraph: WalkedParagraph
+    text: str  # the paragraph's text before any edit
+    start: int
+    end: int
+    occurrence: int  # 1-based, counting matches that pass the char range
+    rule: int
+    match: "re.Match"
+
+
+def _rule_matches(rule_matches, char_start=None, char_end=None):
+    """Non-overlapping (rule number, match) pairs for one paragraph, in text order.
+
+    rule_matches holds each rule's ``finditer`` matches in the paragraph's
+    original text. A single rule keeps all of them. With several rules,
+    where matches overlap the leftmost wins, then the longest, then the
+    earlier rule, and empty matches are ignored.
+    """
+    def in_range(m):
+        return char_start is None or (char_start <= m.start() and m.end() <= char_end)
+
+    if len(rule_matches) == 1:
+        return [(0, m) for m in rule_matches[0] if in_range(m)]
+
+    candidates = []
+    for number, matches in enumerate(rule_matches):
+        for m in matches:
+            if m.end() > m.start() and in_range(m):
+                candidates.append((m.start(), -m.end(), number, m))
+    candidates.sort(key=lambda c: c[:3])
+    chosen = []
+    covered = 0
+    for start, neg_end, number, m in candidates:
+        if start >= covered:
+            chosen.append((number, m))
+            covered = -neg_end
+    return chosen
+
+
+def _plan_replacements(walker, rules, target_paragraphs, body_candidates=None,
+                       char_start=None, char_end=None, occurrence_index=None, max_matches=None,
+                       budget=None):
+    """Scan the document once and return (match table, limit_hit).
+
+    Body paragraphs outside target_paragraphs (or body_candidates, when given)
+    are skipped; table cell paragraphs are always scanned. Occurrences are
+    numbered in document order. With occurrence_index only that occurrence is
+    planned; otherwise at most max_matches rows are, and limit_hit reports
+    whether more matches were left out. Scanning stops as soon as the
+    table is complete. Regex rules are matched within budget (a
+    RegexBudget), which raises RegexTimeout before anything is planned;
+    without occurrence_index, large regex scans are sharded across the
+    process pool.
+    """
+    items = [
+        item for item in walker.paragraphs
+        if item.paragraph_index is None or (
+            item.paragraph_index in target_paragraphs
+            and (body_candidates is None or item.paragraph_index in body_candidates)
+        )
+    ]
+    texts = tee((paragraph_text(item.element) for item in items), len(rules) + 1)
+    scans = [
+        scan(rule['pattern'], texts[number + 1], budget if rule['use_regex'] else None,
+             parallel=rule['use_regex'] and occurrence_index is None)
+        for number, rule in enumerate(rules)
+    ]
+
+    plan: List[_PlannedMatch] = []
+    occurrence = 0
+    for item, para_text, *rule_matches in zip(items, texts[0], *scans):
+        for number, m in _rule_matches(rule_matches, char_start, char_end):
+            occurrence += 1
+            if occurrence_index is not None and occurrence != occurrence_index:
+                continue
+            if max_matches is not None and len(plan) == max_matches:
+                return plan, True
+            plan.append(_PlannedMatch(item, para_text, m.start(), m.end(), occurrence, number, m))
+            if occurrence_index is not None:
+                return plan, False
+    return plan, False
+
+
+def _apply_plan(walker, rules, plan, replace_with_equation=False, equation_omml_xml=None) -> bool:
+    """Carry out a replace plan. Returns True if any equation was inserted."""
+    equations_inserted = False
+    # Rows are grouped by paragraph; each group is applied right to left so
+    # earlier offsets stay valid.
+    end = len(plan)
+    while end:
+        start = end - 1
+        while start and plan[start - 1].paragraph is plan[end - 1].paragraph:
+            start -= 1
+        para = walker.proxy(plan[start].paragraph)
+        run_map = RunMap(para._p)
+        for row in reversed(plan[start:end]):
+            rule = rules[row.rule]
+            if replace_with_equation:
                 # For equation replacement, we don't need replace_text
-                actual_replace_text = None
-            
-            # For case-insensitive matching, preserve the original case pattern
-            if not match_case and not replace_with_equation:
-                matched_text = para_text[start_pos:end_pos]
-                actual_replace_text = _preserve_case(matched_text, actual_replace_text)
-                
-            # Handle space collapsing when deleting text
-            if not replace_with_equation and replace_text == "":
-                # Check if we have spaces before and after the match
-                has_space_before = start_pos > 0 and para_text[start_pos - 1].isspace()
-                has_space_after = end_pos < len(para_text) and para_text[end_pos].isspace()
-                
-                # If we have spaces on both sides, keep one space
-                if has_space_before and has_space_after:
-                    actual_replace_text = " "
-            
-            # NEW APPROACH: Instead of modifying existing runs and appending new ones,
-            # we rebuild the runs in the correct order by collecting all run segments
-            # and then reconstructing the paragraph properly.
-            
-            # Collect all run segments with their formatting and positions
-            run_segments = []
-            current_pos = 0
-            
-            for run in para.runs:
-                run_length = len(run.text)
-                run_start = current_pos
-                run_end = current_pos + run_length
-                
-                # Determine how this run overlaps with the match
-                if run_end <= start_pos:
-                    # Run is completely before the match - keep as is
-                    run_info = format_run_with_citation_awareness(run)
-                    if run.text or run_info.get('fields'):  # Keep runs with text or fields
-                        run_segments.append({
-                            'text': run.text,
-                            'formatting': _extract_run_formatting(run),
-                            'type': 'keep',
-                            'fields': run_info.get('fields'),
-                            'run_element': run._element  # Keep reference to original element
-                        })
-                elif run_start >= end_pos:
-                    # Run is completely after the match - keep as is
-                    run_info = format_run_with_citation_awareness(run)
-                    if run.text or run_info.get('fields'):  # Keep runs with text or fields
-                        run_segments.append({
-                            'text': run.text,
-                            'formatting': _extract_run_formatting(run),
-                            'type': 'keep',
-                            'fields': run_info.get('fields'),
-                            'run_element': run._element  # Keep reference to original element
-                        })
-                else:
-                    # Run overlaps with the match - need to split it
-                    
-                    # Part before the match
-                    if run_start < start_pos:
-                        before_text = run.text[:start_pos - run_start]
-                        run_info = format_run_with_citation_awareness(run)
-                        if before_text:
-                            run_segments.append({
-                                'text': before_text,
-                                'formatting': _extract_run_formatting(run),
-                                'type': 'keep',
-                                'fields': run_info.get('fields') if run_start == 0 else None  # Only preserve fields if at start
-                            })
-                    
-                    # The match replacement (only add once, when we encounter the first overlapping run)
-                    if not any(seg.get('type') == 'replacement' for seg in run_segments):
-                        replacement_formatting = _extract_run_formatting(run)
-                        if apply_formatting:
-                            # Apply new formatting on top of existing
-                            replacement_formatting.update({
-                                'bold': bold if bold is not None else replacement_formatting.get('bold'),
-                                'italic': italic if italic is not None else replacement_formatting.get('italic'),
-                                'underline': underline if underline is not None else replacement_formatting.get('underline'),
-                                'color': color if color else replacement_formatting.get('color'),
-                                'font_size': font_size if font_size else replacement_formatting.get('font_size'),
-                                'font_name': font_name if font_name else replacement_formatting.get('font_name')
-                            })
-                        
-                        if replace_with_equation:
-                            # Equation OMML should have been prevalidated upstream.
-                            if not equation_omml_xml:
-                                # Fall back to reinserting original matched text (no-op semantics).
-                                run_segments.append({
-                                    'text': matched_text_for_fallback,
-                                    'formatting': replacement_formatting,
-                                    'type': 'replacement'
-                                })
-                            else:
-                                run_segments.append({
-                                    'omml_xml': equation_omml_xml,
-                                    'formatting': replacement_formatting,
-                                    'type': 'equation',
-                                    'display_mode': 'inline'  # Default to inline for direct replacement
-                                })
-                                equations_inserted = True
-                        else:
-                            # Parse for equation markers in replacement text
-                            content_segments = _parse_equation_markers(actual_replace_text)
-                            
-                            # If only one text segment, add it as before
-                            if len(content_segments) == 1 and content_segments[0]['type'] == 'text':
-                                run_segments.append({
-                                    'text': actual_replace_text,
-                                    'formatting': replacement_formatting,
-                                    'type': 'replacement'
-                                })
-                            else:
-                                # Multiple segments - add each with appropriate type
-                                for content_seg in content_segments:
-                                    if content_seg['type'] == 'text' and content_seg['content']:
-                                        run_segments.append({
-                                            'text': content_seg['content'],
-                                            'formatting': replacement_formatting,
-                                            'type': 'replacement'
-                                        })
-                                    elif content_seg['type'] == 'equation':
-                                        # Convert LaTeX to OMML
-                                        success, omml_or_err = latex_to_omml(content_seg['content'])
-                                        if success:
-                                            run_segments.append({
-                                                'omml_xml': omml_or_err,
-                                                'formatting': replacement_formatting,
-                                                'type': 'equation',
-                                                'display_mode': content_seg.get('display_mode', 'inline')
-                                            })
-                                            equations_inserted = True
-                                        else:
-                                            # If conversion fails, add as text
-                                            run_segments.append({
-                                                'text': f"{{{{equation:{content_seg['content']}}}}}",
-                                                'formatting': replacement_formatting,
-                                                'type': 'replacement'
-                                            })
-                    
-                    # Part after the match
-                    if run_end > end_pos:
-                        after_text = run.text[end_pos - run_start:]
-                        run_info = format_run_with_citation_awareness(run)
-                        if after_text:
-                            run_segments.append({
-                                'text': after_text,
-                                'formatting': _extract_run_formatting(run),
-                                'type': 'keep',
-                                'fields': run_info.get('fields') if end_pos == run_end else None  # Only preserve fields if at end
-                            })
-                
-                current_pos += run_length
-            
-            # Clear all existing runs
-            for _ in range(len(para.runs)):
-                para.runs[0]._element.getparent().remove(para.runs[0]._element)
-            
-            # Rebuild the paragraph with the correct run segments in order
-            # Collapse duplicate spaces across segment boundaries to avoid
-            # "double-space" artifacts when replacement text is an empty string.
-            cleaned_segments = []
-            for seg in run_segments:
-                # Keep equation segments regardless of text content
-                if seg.get('type') == 'equation':
-                    cleaned_segments.append(seg)
-                    continue
-                # Skip segments with empty text (already handled by check below)
-                if seg.get('text', '') == "":
-                    continue
-                if cleaned_segments:
-                    prev = cleaned_segments[-1]
-                    # Only process spacing for text segments
-                    if 'text' in prev and 'text' in seg:
-                        # If previous ends with space and current starts with space → trim one
-                        if prev['text'].endswith(' ') and seg['text'].startswith(' '):
-                            # Prefer to strip the leading spaces of the current segment to keep formatting of previous run unchanged
-                            seg['text'] = seg['text'].lstrip()
-                            if seg['text'] == "":
-                                # Entire segment became empty → skip it
-                                continue
-                    # NEW: If previous ends with space and current begins with punctuation, trim the trailing space.
-                    punctuation_chars = '.!,?:;)'  # extend as needed
-                    if 'text' in prev and 'text' in seg and prev['text'].endswith(' ') and seg['text'][0] in punctuation_chars:
-                        prev['text'] = prev['text'].rstrip()
-                cleaned_segments.append(seg)
-
-            for segment in cleaned_segments:
-                if segment.get('type') == 'equation':
-                    # Create empty run for equation
-                    # Note: Display mode equations should ideally be in separate paragraphs
-                    # Currently all equations are inserted inline within the paragraph
-                    new_run = para.add_run()
-                    # Parse and append OMML
-                    omml_elem = parse_xml(segment['omml_xml'])
-                    new_run._r.append(omml_elem)
-                    _apply_run_formatting(new_run, segment['formatting'])
-                elif segment.get('fields') and len(segment.get('fields', [])) > 0:
-                    # This segment contains citation fields
-                    # We need to preserve the field structure
-                    new_run = para.add_run()
-                    # Copy field elements from original run
-                    run_element = new_run._element
-                    
-                    # For simple fields, we need to recreate the fldSimple element
-                    for field in segment['fields']:
-                        if 'xml_element' in field:
-                            # Parse the field XML and append to the new run
-                            field_elem = parse_xml(field['xml_element'])
-                            run_element.append(field_elem)
-                    
-                    # Apply formatting to the run
-                    _apply_run_formatting(new_run, segment['formatting'])
-                elif segment.get('text'):
-                    new_run = para.add_run(segment['text'])
-                    _apply_run_formatting(new_run, segment['formatting'])
-    
-    return count, match_total_overall, equations_inserted
+                replacement = None
+            else:
+                replacement = _replacement_text(row.match, row.text, rule['replace'], rule['use_regex'], rule['match_case'])
+            if _replace_span(run_map, para, row.text, row.start, row.end, replacement, rule['formatting'],
+                             replace_with_equation, equation_omml_xml):
+                equations_inserted = True
+        end = start
+    return equations_inserted
+
+
+def _search_and_replace_rules(filename, rules, find_text, defaults, start_paragraph, end_paragraph,
+                              paragraph_indices, occurrence_index, char_start, char_end,
+                              replace_with_equation) -> str:
+    """The ``rules`` mode of enhanced_search_and_replace: every rule, one pass, one save."""
+    if find_text:
+        return "Error: pass either find_text or rules, not both"
+    if occurrence_index is not None or replace_with_equation:
+        return "Error: rules cannot be combined with occurrence_index or replace_with_equation"
+    range_error = _range_arguments_error(start_paragraph, end_paragraph, paragraph_indices, char_start, char_end)
+    if range_error:
+        return range_error
+    rules, rules_error = _compile_rules(rules, defaults)
+    if rules_error:
+        return rules_error
+
+    if not os.path.exists(filename):
+        return f"Document {filename} does not exist"
 
+    size_ok, size_error = check_doc_size_for_operation(filename, "enhanced_search_and_replace")
+    if not size_ok:
+        return size_error
 
-def _extract_run_formatting(run):
-    """Extract formatting properties from a run."""
-    formatting = {}
+    is_writeable, error_message, file_bytes = preflight_write(filename)
+    if not is_writeable:
+        return f"Cannot modify document: {error_message}. Consider creating a copy first."
+
+    max_matches_per_call = get_max_matches_per_call()
+    max_regex_scan_chars = get_max_regex_scan_chars()
     try:
-        formatting['bold'] = run.bold
-        formatting['italic'] = run.italic
-        formatting['underline'] = run.underline
-        if run.font.name:
-            formatting['font_name'] = run.font.name
-        if run.font.size:
-            formatting['font_size'] = run.font.size.pt if run.font.size else None
-        if run.font.color.rgb:
-            formatting['color'] = str(run.font.color.rgb)
-    except Exception:
-        # If any formatting extraction fails, return basic formatting
-        pass
-    return formatting
+        doc = load_document(filename, for_write=True, data=file_bytes)
+        walker = BodyWalker(doc)
+        index = get_paragraph_index(doc)
+
+        if any(rule['use_regex'] for rule in rules):
+            regex_scan_chars = sum(len(paragraph_text(item.element)) for item in walker.paragraphs)
+            if regex_scan_chars > max_regex_scan_chars:
+                return (
+                    f"[{LIMIT_EXCEEDED}] Regex search refused due to scan-size guardrail. "
+                    f"document_chars={regex_scan_chars} exceeds EW_MAX_REGEX_SCAN_CHARS={max_regex_scan_chars}. "
+                    "Refine the query or raise the limit."
+                )
+
+        target_paragraphs, range_error = _target_paragraphs(
+            len(index), start_paragraph, end_paragraph, paragraph_indices
+        )
+        if range_error:
+            return range_error
+
+        plan, replacement_limit_hit = _plan_replacements(
+            walker, rules, target_paragraphs,
+            char_start=char_start,
+            char_end=char_end,
+            max_matches=max_matches_per_call,
+            budget=RegexBudget(get_regex_timeout_ms()),
+        )
+        _apply_plan(walker, rules, plan)
+        count = len(plan)
+        counts = [0] * len(rules)
+        for row in plan:
+            counts[row.rule] += 1
+
+        if not count:
+            mark_operation_succeeded(filename)
+            return f"No occurrences found for any of {len(rules)} rule(s)."
+
+        save_document(doc, filename)
+        mark_operation_succeeded(filename)
+        lines = [f"Replaced {count} occurrence(s) using {len(rules)} rule(s) in one pass."]
+        for number, rule in enumerate(rules):
+            lines.append(f"  {number + 1}. '{rule['find']}' -> '{rule['replace']}': {counts[number]}")
+        response = "\n".join(lines)
+        if replacement_limit_hit:
+            response += (
+                f"\n[{LIMIT_EXCEEDED}] Replacement limit reached: EW_MAX_MATCHES_PER_CALL={max_matches_per_call}. "
+                "Additional matches were not modified."
+            )
+        return _truncate_message(response, get_max_search_output_chars())
+    except RegexTimeout as e:
+        return _regex_timeout_message(e)
+    except FileNotFoundError:
+        return f"Document {filename} not found"
+    except PermissionError:
+        return f"Permission denied accessing {filename}"
+    except Exception as e:
+        return f"Failed to search and replace: {str(e)}"
+
+
+def _replacement_text(match, para_text, replace_text, use_regex, match_case):
+    """Text that replaces one match.
+
+    Regex groups ($1, \\1, ...) are expanded, the matched text's case is kept
+    for case-insensitive matches, and deleting a word between two spaces
+    leaves one space behind.
+    """
+    start_pos = match.start()
+    end_pos = match.end()
+
+    # For regex, translate JS back-refs then expand groups
+    if use_regex:
+        actual_replace_text = match.expand(_convert_js_backreferences(replace_text))
+    else:
+        actual_replace_text = replace_text
+
+    # For case-insensitive matching, preserve the original case pattern
+    if not match_case:
+        actual_replace_text = _preserve_case(para_text[start_pos:end_pos], actual_replace_text)
+
+    # Handle space collapsing when deleting text
+    if replace_text == "":
+        # Check if we have spaces before and after the match
+        has_space_before = start_pos > 0 and para_text[start_pos - 1].isspace()
+        has_space_after = end_pos < len(para_text) and para_text[end_pos].isspace()
+
+        # If we have spaces on both sides, keep one space
+        if has_space_before and has_space_after:
+            actual_replace_text = " "
+    return actual_replace_text
+
+
+def _replace_span(run_map, para, para_text, start_pos, end_pos, actual_replace_text, formatting=None,
+                  replace_with_equation=False, equation_omml_xml=None):
+    """Replace para_text[start_pos:end_pos] in para through its RunMap.
+
+    Only the runs under the span change. The replacement copies the run
+    properties of the text it replaces, with formatting (if given) on top.
+    With replace_with_equation the span becomes an inline equation. Returns
+    True if an equation was inserted.
+    """
+    equations_inserted = False
+    base = run_map.run_at(start_pos)
+    if base is None and start_pos > 0:
+        # Inserting at the end of a run: continue that run's formatting.
+        base = run_map.run_at(start_pos - 1)
+    base_rpr = base.find(qn("w:rPr")) if base is not None else None
+
+    def new_run(text=None, omml_xml=None):
+        r = OxmlElement("w:r")
+        if base_rpr is not None:
+            r.append(deepcopy(base_rpr))
+        run = Run(r, para)
+        if text:
+            run.text = text
+        if omml_xml:
+            r.append(parse_xml(omml_xml))
+        if formatting is not None:
+            _apply_run_formatting(run, formatting)
+        return r
+
+    plain_text = False
+    if replace_with_equation:
+        # Equation OMML should have been prevalidated upstream.
+        if equation_omml_xml:
+            new_runs = [new_run(omml_xml=equation_omml_xml)]
+            equations_inserted = True
+        else:
+            # Fall back to reinserting original matched text (no-op semantics).
+            new_runs = [new_run(para_text[start_pos:end_pos])]
+    else:
+        # Parse for equation markers in replacement text
+        content_segments = _parse_equation_markers(actual_replace_text)
+        if len(content_segments) == 1 and content_segments[0]['type'] == 'text':
+            plain_text = True
+            new_runs = [new_run(actual_replace_text)] if actual_replace_text else []
+        else:
+            new_runs = []
+            for content_seg in content_segments:
+                if content_seg['type'] == 'text' and content_seg['content']:
+                    new_runs.append(new_run(content_seg['content']))
+                elif content_seg['type'] == 'equation':
+                    # Convert LaTeX to OMML
+                    success, omml_or_err = latex_to_omml(content_seg['content'])
+                    if success:
+                        # Display mode equations are inserted inline as well
+                        new_runs.append(new_run(omml_xml=omml_or_err))
+                        equations_inserted = True
+                    else:
+                        # If conversion fails, add as text
+                        new_runs.append(new_run(f"{{{{equation:{content_seg['content']}}}}}"))
+
+    first, last = run_map.replace(start_pos, end_pos, new_runs)
+    if plain_text:
+        _tidy_replacement_edges(run_map, first, last)
+    return equations_inserted
+
+
+# A space before these is dropped where a replacement meets its neighbours.
+_CLOSING_PUNCTUATION = '.!,?:;)'
+
+
+def _tidy_replacement_edges(run_map, first, last):
+    """Avoid double spaces and spaces before punctuation around a replacement.
+
+    Only the boundaries next to the replacement (runs first..last-1) are
+    touched; spacing between untouched runs is the author's. This is what
+    turns deleting "X" from "a X b" into "a b".
+    """
+    def text(index):
+        return run_map.text_of(index)
+
+    before = run_map.text_run_before(first)
+    after = run_map.text_run_after(last)
+    replaced = first if last > first else None
+
+    if replaced is not None and before is not None and text(before).endswith(' '):
+        if text(replaced).startswith(' '):
+            run_map.strip(replaced, leading=True)
+        if not run_map.text_length(replaced):
+            replaced = None
+        elif text(replaced)[0] in _CLOSING_PUNCTUATION:
+            run_map.strip(before, leading=False)
+
+    prev = replaced if replaced is not None else before
+    if prev is not None and after is not None and text(prev).endswith(' '):
+        if text(after).startswith(' '):
+            run_map.strip(after, leading=True)
+        if run_map.text_length(after) and text(after)[0] in _CLOSING_PUNCTUATION:
+            run_map.strip(prev, leading=False)
 
 
 def _apply_run_formatting(run, formatting):
@@ -1306,6 +1382,116 @@ def _apply_color_to_run(run, color):
         run.font.color.rgb = RGBColor(0, 0, 0)
 
 
+def _format_spans(para, run_map, spans) -> None:
+    """Apply formatting to (start, end, formatting) spans of a paragraph's text.
+
+    Runs are split at span edges so only the matched characters change.
+    """
+    for start, end, formatting in spans:
+        first = run_map.split(start)
+        last = run_map.split(end)
+        for index in range(first, last):
+            if run_map.text_length(index):
+                _apply_run_formatting(Run(run_map.runs[index], para), formatting)
+
+
+def _format_term_groups(filename: str, groups, match_case: bool, whole_words_only: bool):
+    """Format every occurrence of several groups of terms in one pass.
+
+    ``groups`` is a list of (terms, formatting) pairs. All terms are combined
+    into one alternation, longest first, so each paragraph is scanned once and
+    the longest term wins where terms overlap. The document is checked,
+    loaded, snapshotted for undo and saved once for the whole set.
+
+    Returns:
+        (error message or None, {term: occurrences formatted}, limit_hit)
+    """
+    valid_path, filename, path_error = validate_docx_path(filename)
+    if not valid_path:
+        return path_error, {}, False
+    if not os.path.exists(filename):
+        return f"Document {filename} does not exist", {}, False
+
+    size_ok, size_error = check_doc_size_for_operation(filename, "format_document")
+    if not size_ok:
+        return size_error, {}, False
+
+    terms = []
+    formats = []
+    counts = {}
+    for words, formatting in groups:
+        for word in words:
+            if word and word not in counts:
+                counts[word] = 0
+                terms.append(word)
+                formats.append(formatting)
+    if not terms:
+        return None, counts, False
+
+    order = sorted(range(len(terms)), key=lambda i: -len(terms[i]))
+    alternatives = []
+    for i in order:
+        escaped = re.escape(terms[i])
+        alternatives.append(rf"(\b{escaped}\b)" if whole_words_only else f"({escaped})")
+    pattern = re.compile("|".join(alternatives), 0 if match_case else re.IGNORECASE)
+
+    is_writeable, error_message, file_bytes = preflight_write(filename)
+    if not is_writeable:
+        return f"Cannot modify document: {error_message}. Consider creating a copy first.", {}, False
+
+    max_matches = get_max_matches_per_call()
+    total = 0
+    limit_hit = False
+    try:
+        doc = load_document(filename, for_write=True, data=file_bytes)
+        walker = BodyWalker(doc)
+        for item in walker.paragraphs:
+            para_text = paragraph_text(item.element)
+            spans = []
+            for m in pattern.finditer(para_text):
+                if total == max_matches:
+                    limit_hit = True
+                    break
+                term_index = order[m.lastindex - 1]
+                spans.append((m.start(), m.end(), formats[term_index]))
+                counts[terms[term_index]] += 1
+                total += 1
+            if spans:
+                _format_spans(walker.proxy(item), RunMap(item.element), spans)
+            if limit_hit:
+                break
+        if total:
+            save_document(doc, filename)
+    except FileNotFoundError:
+        return f"Document {filename} not found", {}, False
+    except PermissionError:
+        return f"Permission denied accessing {filename}", {}, False
+    except Exception as e:
+        return f"Failed to format words: {str(e)}", {}, False
+    return None, counts, limit_hit
+
+
+def _term_report(words: List[str], counts) -> str:
+    lines = []
+    for word in words:
+        if not word:
+            lines.append(f"'{word}': Error: find_text parameter is required")
+        elif counts.get(word):
+            lines.append(f"'{word}': Formatted {counts[word]} occurrence(s) of text '{word}'.")
+        else:
+            lines.append(f"'{word}': No occurrences of text '{word}' found.")
+    return "\n".join(lines)
+
+
+def _limit_note(limit_hit: bool) -> str:
+    if not limit_hit:
+        return ""
+    return (
+        f"\n[{LIMIT_EXCEEDED}] Replacement limit reached: EW_MAX_MATCHES_PER_CALL={get_max_matches_per_call()}. "
+        "Additional matches were not modified."
+    )
+
+
 def format_specific_words(filename: str, word_list: List[str], 
                                 bold: Optional[bool] = None,
                                 italic: Optional[bool] = None,
@@ -1316,7 +1502,10 @@ def format_specific_words(filename: str, word_list: List[str],
                                 match_case: bool = True,
                                 whole_words_only: bool = True,
                                 **extra_kwargs) -> str:
-    """Format specific words throughout the document using enhanced search and replace.
+    """Format specific words throughout the document.
+    
+    All words are matched in a single pass over the document, which is saved
+    once and can be reverted with one undo step.
     
     Args:
         filename: Path to the Word document (resolved path from session management)
@@ -1329,58 +1518,85 @@ def format_specific_words(filename: str, word_list: List[str],
         font_name: Font name/family
         match_case: Whether to match case (default True)
         whole_words_only: Whether to match whole words only (default True)
+        extra_kwargs: enhanced_search_and_replace options (e.g. a paragraph
+            range); words are then formatted one search at a time
     """
-    results = []
-    
-    for word in word_list:
-        # Use enhanced search and replace with same text for find and replace
-        # Pass filename directly since it's already resolved from session management
-        result = enhanced_search_and_replace(
-            filename=filename,  # Already resolved filename
-            find_text=word,
-            replace_text=word,  # Same text, just apply formatting
-            apply_formatting=True,
-            bold=bold,
-            italic=italic,
-            underline=underline,
-            color=color,
-            font_size=font_size,
-            font_name=font_name,
-            match_case=match_case,
-            whole_words_only=whole_words_only,
-            **extra_kwargs
-        )
-        results.append(f"'{word}': {result}")
-    
-    return "\n".join(results)
+    if extra_kwargs:
+        results = []
+        # In a batch, the call succeeds only if every search does.
+        transaction = get_batch_transaction(filename)
+        all_succeeded = True
+        for word in word_list:
+            if transaction is not None:
+                transaction.succeeded = False
+            # Use enhanced search and replace with same text for find and replace
+            # Pass filename directly since it's already resolved from session management
+            result = enhanced_search_and_replace(
+                filename=filename,  # Already resolved filename
+                find_text=word,
+                replace_text=word,  # Same text, just apply formatting
+                apply_formatting=True,
+                bold=bold,
+                italic=italic,
+                underline=underline,
+                color=color,
+                font_size=font_size,
+                font_name=font_name,
+                match_case=match_case,
+                whole_words_only=whole_words_only,
+                **extra_kwargs
+            )
+            results.append(f"'{word}': {result}")
+            if transaction is not None:
+                all_succeeded = all_succeeded and transaction.succeeded
+        if transaction is not None:
+            transaction.succeeded = all_succeeded
+        return "\n".join(results)
+
+    formatting = {
+        'bold': bold,
+        'italic': italic,
+        'underline': underline,
+        'color': color,
+        'font_size': font_size,
+        'font_name': font_name,
+    }
+    error, counts, limit_hit = _format_term_groups(
+        filename, [(word_list, formatting)], match_case, whole_words_only
+    )
+    if error:
+        return error
+    mark_operation_succeeded(filename)
+    return _term_report(word_list, counts) + _limit_note(limit_hit)
+
+
+# Term groups formatted by format_research_paper_terms, with their styling.
+_RESEARCH_TERM_GROUPS = [
+    # Drug names in blue and bold
+    ("Drug names", ["dolutegravir", "meloxicam", "dexamethasone", "DTG", "MLX", "DEX"], {'bold': True, 'color': "blue"}),
+    # Polymer terms in green
+    ("Polymer terms", ["polycaprolactone", "PCL", "mesophase", "crystallinity"], {'color': "green"}),
+    # Statistical terms in red and italic
+    ("Statistical terms", ["p < 0.05", "significant", "correlation", "ANOVA"], {'italic': True, 'color': "red"}),
+    # Temperature values in orange
+    ("Temperature values", ["25°C", "50°C"], {'color': "orange"}),
+]
 
 
 def format_research_paper_terms(filename: str) -> str:
     """Format common research terms in a PCL paper with appropriate styling - Academic research helper."""
-    
-    results = []
-    
-    # Format drug names in blue and bold
-    drug_names = ["dolutegravir", "meloxicam", "dexamethasone", "DTG", "MLX", "DEX"]
-    result = format_specific_words(filename, drug_names, bold=True, color="blue")
-    results.append("Drug names: " + result)
-    
-    # Format polymer terms in green
-    polymer_terms = ["polycaprolactone", "PCL", "mesophase", "crystallinity"]
-    result = format_specific_words(filename, polymer_terms, color="green")
-    results.append("Polymer terms: " + result)
-    
-    # Format statistical terms in red and italic
-    stats_terms = ["p < 0.05", "significant", "correlation", "ANOVA"]
-    result = format_specific_words(filename, stats_terms, italic=True, color="red")
-    results.append("Statistical terms: " + result)
-    
-    # Format temperature values in orange
-    temp_terms = ["25°C", "50°C"]
-    result = format_specific_words(filename, temp_terms, color="orange")
-    results.append("Temperature values: " + result)
-    
-    return "Research paper terms formatted:\n" + "\n".join(results)
+    error, counts, limit_hit = _format_term_groups(
+        filename,
+        [(words, formatting) for _, words, formatting in _RESEARCH_TERM_GROUPS],
+        match_case=True,
+        whole_words_only=True,
+    )
+    if error:
+        return error
+    mark_operation_succeeded(filename)
+
+    results = [f"{label}: " + _term_report(words, counts) for label, words, _ in _RESEARCH_TERM_GROUPS]
+    return "Research paper terms formatted:\n" + "\n".join(results) + _limit_note(limit_hit)
 
 
 
@@ -2,9 +2,13 @@
 Document creation and manipulation tools for Word Document Server.
 """
 import os
+import functools
 import json
-from typing import Dict, List, Optional, Any
+import re
+from typing import Any, Dict, Iterator, List, Optional
 from docx import Document
+from docx.text.run import Run
+from lxml import etree
 
 from word_document_server.utils.file_utils import (
     check_file_writeable,
@@ -12,6 +16,21 @@ from word_document_server.utils.file_utils import (
     create_document_copy,
     validate_docx_path,
 )
+from word_document_server.session_manager import get_session_manager
+from word_document_server.utils.session_utils import load_document, save_document
+from word_document_server.utils.body_walker import BodyWalker
+from word_document_server.utils.cursors import (
+    DEFAULT_PAGE_SIZE,
+    decode_cursor,
+    document_stamp,
+    encode_cursor,
+    fill_page,
+    listing_key,
+)
+from word_document_server.utils.paragraph_index import get_paragraph_index
+from word_document_server.utils.run_map import RunMap
+from word_document_server.utils.search_index import get_search_index
+from word_document_server.utils.text_stream import paragraph_text, run_text
 from word_document_server.utils.document_utils import get_document_properties, extract_document_text, get_document_structure
 from word_document_server.utils.extended_document_utils import get_paragraph_text, find_text
 from word_document_server.utils.citation_utils import format_run_with_citation_awareness
@@ -57,6 +76,286 @@ def _json_dumps_with_char_limit(payload: Dict[str, Any], max_chars: int) -> str:
     return text[: max_chars - 24] + "... [output truncated]"
 
 
+def _formatted_occurrences(doc, filename, search_term, match_case, whole_word, formatting_detail,
+                           paragraph_formatting, run_formatting, resume=(0, 0)):
+    """
+    Yield (occurrence, resume position) for get_text's formatted search.
+
+    Paragraphs and table cells are searched in document order, as find_text.
+    The resume position after an occurrence, (global paragraph number,
+    character), continues the search just past it.
+    """
+    walker = BodyWalker(doc)
+    search_lower = search_term.lower() if not match_case else search_term
+
+    # The search index (numbered the same way) skips paragraphs that cannot
+    # contain the term.
+    index = get_search_index(filename)
+    candidates = None
+    if index is not None:
+        if whole_word:
+            candidates = index.regex_candidates(
+                r'\b' + re.escape(search_lower) + r'\b', re.IGNORECASE if not match_case else 0
+            )
+        else:
+            candidates = index.candidates(search_term)
+    items = walker.paragraphs if candidates is None else [walker[pid] for pid in candidates]
+    resume_pid, resume_pos = resume
+
+    for item in items:
+        if item.index < resume_pid:
+            continue
+        para_text = paragraph_text(item.element)
+        if not para_text:
+            continue
+        paragraph = walker.proxy(item)
+        run_map = None
+        if item.cell is None:
+            location = {"paragraph_index": item.paragraph_index}
+        else:
+            table_idx, row_idx, col_idx = item.cell.location
+            location = {"location": f"Table {table_idx}, Row {row_idx}, Column {col_idx}"}
+        search_text = para_text.lower() if not match_case else para_text
+
+        # Find all occurrences in this paragraph
+        start = resume_pos if item.index == resume_pid else 0
+        while True:
+            if whole_word:
+                # Simple whole word matching
+                pattern = r'\b' + re.escape(search_lower) + r'\b'
+                match = re.search(pattern, search_text[start:], re.IGNORECASE if not match_case else 0)
+                if match:
+                    pos = start + match.start()
+                    end_pos = start + match.end()
+                else:
+                    break
+            else:
+                pos = search_text.find(search_lower, start)
+                if pos == -1:
+                    break
+                end_pos = pos + len(search_term)
+
+            # Extract context and formatting
+            context_start = max(0, pos - 50)
+            context_end = min(len(para_text), end_pos + 50)
+            context = para_text[context_start:context_end]
+
+            # Find which run contains this text and extract its formatting
+            if run_map is None:
+                run_map = RunMap(item.element)
+            containing_run = run_map.run_at(pos)
+            run_formatting_info = {}
+            if containing_run is not None:
+                run_formatting_info = run_formatting(Run(containing_run, paragraph), formatting_detail)
+
+            occurrence = {
+                **location,
+                "character_position": pos,
+                "matched_text": para_text[pos:end_pos],
+                "context": context,
+                "paragraph_formatting": paragraph_formatting(paragraph, formatting_detail),
+                "run_formatting": run_formatting_info
+            }
+            yield occurrence, (item.index, end_pos)
+
+            start = end_pos
+
+
+def _formatted_paragraph(paragraph, index: int, text: str, formatting_detail, paragraph_formatting, style_name=None):
+    """get_text's formatted entry for one body paragraph."""
+    para_info = {
+        "index": index,
+        "text": text,
+        "paragraph_formatting": paragraph_formatting(paragraph, formatting_detail, style_name),
+        "runs": []
+    }
+    for run in paragraph.runs:
+        # Use citation-aware formatting to capture field content
+        formatted_run = format_run_with_citation_awareness(run, formatting_detail)
+        # Include runs with text or field content
+        if run.text.strip() or formatted_run.get('fields'):
+            para_info["runs"].append(formatted_run)
+    return para_info
+
+
+class _StyleTable:
+    """Distinct formatting dicts, numbered in order of first use."""
+
+    def __init__(self) -> None:
+        self.styles: List[Dict[str, Any]] = []
+        self._ids: Dict[str, int] = {}
+
+    def id_for(self, formatting: Dict[str, Any]) -> int:
+        key = json.dumps(formatting, sort_keys=True)
+        style_id = self._ids.get(key)
+        if style_id is None:
+            style_id = self._ids[key] = len(self.styles)
+            self.styles.append(formatting)
+        return style_id
+
+
+# Per-run details kept out of the style table: they are rarely shared.
+_RUN_EXTRAS = ("fields", "display_text")
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_FIELD_MARKERS = (".//" + _W + "fldSimple", ".//" + _W + "fldChar")
+
+
+def _properties_key(props) -> bytes:
+    return b"" if props is None else etree.tostring(props)
+
+
+def _iter_compact_formatted(index, first: int, last: int, formatting_detail, paragraph_formatting,
+                            ndjson: bool = False) -> Iterator[str]:
+    """
+    Chunks of get_text's "compact" or "ndjson" output for paragraphs first..last.
+
+    Records are serialised one paragraph at a time, without indentation, and
+    each formatting dict is emitted once in the style table instead of with
+    every run that uses it. Formatting is read once per distinct ``w:pPr`` /
+    ``w:rPr`` (it depends on nothing else), so repeated formatting costs a
+    dictionary lookup rather than a walk through python-docx properties.
+    """
+    dumps = functools.partial(json.dumps, ensure_ascii=False, separators=(",", ":"))
+    table = _StyleTable()
+    paragraph_styles: Dict[bytes, int] = {}
+    run_styles: Dict[bytes, int] = {}
+    if ndjson:
+        yield dumps({"formatting_detail": formatting_detail}) + "\n"
+    else:
+        yield '{"formatting_detail":' + dumps(formatting_detail) + ',"paragraphs":['
+
+    for i in range(first, last + 1):
+        paragraph = index.paragraph(i)
+        known = len(table.styles)
+        key = _properties_key(paragraph._p.pPr)
+        paragraph_style = paragraph_styles.get(key)
+        if paragraph_style is None:
+            paragraph_style = paragraph_styles[key] = table.id_for(
+                paragraph_formatting(paragraph, formatting_detail, index.style_name(i))
+            )
+        runs = []
+        for run in paragraph.runs:
+            r = run._r
+            if not any(r.find(marker) is not None for marker in _FIELD_MARKERS):
+                # No fields: the entry is the text plus the rPr's formatting.
+                text = run_text(r)
+                if not text.strip():
+                    continue
+                props_key = _properties_key(r.rPr)
+                run_style = run_styles.get(props_key)
+                if run_style is None:
+                    formatted_run = format_run_with_citation_awareness(run, formatting_detail)
+                    del formatted_run["text"]
+                    run_style = run_styles[props_key] = table.id_for(formatted_run)
+                runs.append([text, run_style])
+                continue
+            formatted_run = format_run_with_citation_awareness(run, formatting_detail)
+            if not (run.text.strip() or formatted_run.get('fields')):
+                continue
+            text = formatted_run.pop("text")
+            extras = {key: formatted_run.pop(key) for key in _RUN_EXTRAS if key in formatted_run}
+            entry = [text, table.id_for(formatted_run)]
+            if extras:
+                entry.append(extras)
+            runs.append(entry)
+        record = dumps({"index": i, "text": index.text(i), "format": paragraph_style, "runs": runs})
+        if ndjson:
+            new_styles = "".join(
+                dumps({"style": n, "format": table.styles[n]}) + "\n" for n in range(known, len(table.styles))
+            )
+            yield new_styles + record + "\n"
+        else:
+            yield record if i == first else "," + record
+
+    if not ndjson:
+        yield '],"styles":' + dumps(table.styles) + "}"
+
+
+def _get_text_page(filename, scope, search_term, start_paragraph, end_paragraph, include_formatting,
+                   formatting_detail, max_results, match_case, whole_word, cursor, page_size,
+                   paragraph_formatting, run_formatting) -> str:
+    """One page of get_text output; its next_cursor resumes the listing."""
+    listing = listing_key(
+        "get_text", scope=scope, search_term=search_term, start_paragraph=start_paragraph,
+        end_paragraph=end_paragraph, include_formatting=include_formatting,
+        formatting_detail=formatting_detail, match_case=match_case, whole_word=whole_word,
+    )
+    if page_size is None:
+        page_size = max_results if scope == "search" else DEFAULT_PAGE_SIZE
+
+    doc = load_document(filename)
+    stamp = document_stamp(filename)
+    position = None
+    if cursor is not None:
+        position, cursor_error = decode_cursor(cursor, listing, stamp)
+        if cursor_error:
+            return cursor_error
+
+    if scope == "search":
+        result = {
+            "query": search_term,
+            "match_case": match_case,
+            "whole_word": whole_word,
+        }
+        if include_formatting:
+            result["formatting_detail"] = formatting_detail
+            entries = _formatted_occurrences(
+                doc, filename, search_term, match_case, whole_word, formatting_detail,
+                paragraph_formatting, run_formatting, resume=position or (0, 0),
+            )
+        else:
+            found = find_text(filename, search_term, match_case, whole_word)
+            if "error" in found:
+                return json.dumps(found, indent=2)
+            occurrences = found["occurrences"]
+            result["total_count"] = len(occurrences)
+            start = position or 0
+            entries = ((occurrences[k], k + 1) for k in range(start, len(occurrences)))
+        items, next_position = fill_page(entries, page_size, get_max_search_output_chars())
+        result["returned_count"] = len(items)
+        result["occurrences"] = items
+    elif scope == "all" and not include_formatting:
+        # Paragraphs and table cells in document order, as the unpaged text.
+        walker = BodyWalker(doc)
+        start = position or 0
+        entries = ((paragraph_text(walker[i].element), i + 1) for i in range(start, len(walker)))
+        items, next_position = fill_page(entries, page_size, get_max_search_output_chars())
+        result = {"first_paragraph": start, "paragraph_count": len(items), "text": "\n".join(items)}
+    else:
+        index = get_paragraph_index(doc)
+        paragraph_count = len(index)
+        if scope == "range":
+            if start_paragraph >= paragraph_count:
+                return f"Invalid start_paragraph: {start_paragraph}. Document has {paragraph_count} paragraphs (0-{paragraph_count-1})"
+            if end_paragraph >= paragraph_count:
+                return f"Invalid end_paragraph: {end_paragraph}. Document has {paragraph_count} paragraphs (0-{paragraph_count-1})"
+            if start_paragraph > end_paragraph:
+                return f"Invalid range: start_paragraph ({start_paragraph}) must be <= end_paragraph ({end_paragraph})"
+            first, last = start_paragraph, end_paragraph
+        else:
+            first, last = 0, paragraph_count - 1
+        start = first if position is None else position
+        if include_formatting:
+            entries = (
+                (_formatted_paragraph(index.paragraph(i), i, index.text(i), formatting_detail, paragraph_formatting,
+                                      index.style_name(i)), i + 1)
+                for i in range(start, last + 1)
+            )
+        else:
+            entries = ((f"[Paragraph {i}] {index.text(i)}", i + 1) for i in range(start, last + 1))
+        items, next_position = fill_page(entries, page_size, get_max_search_output_chars())
+        if include_formatting:
+            result = {"formatting_detail": formatting_detail, "paragraphs": items}
+            if scope == "all":
+                result["document_text"] = "".join(item["text"] + "\n" for item in items)
+        else:
+            result = {"first_paragraph": start, "paragraph_count": len(items), "text": "\n".join(items)}
+
+    result["next_cursor"] = None if next_position is None else encode_cursor(listing, stamp, next_position)
+    return json.dumps(result, indent=2)
+
+
 async def create_document(filename: str, title: Optional[str] = None, author: Optional[str] = None) -> str:
     """Create a new Word document with optional metadata.
     
@@ -88,7 +387,7 @@ async def create_document(filename: str, title: Optional[str] = None, author: Op
         ensure_table_style(doc)
         
         # Save the document
-        doc.save(filename)
+        save_document(doc, filename)
         
         return f"Document {filename} created successfully"
     except Exception as e:
@@ -125,7 +424,10 @@ async def get_text(
     formatting_detail: str = "basic",
     max_results: int = 100,
     match_case: bool = True,
-    whole_word: bool = False
+    whole_word: bool = False,
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = None,
+    output_format: str = "json"
 ) -> str:
     """Unified text extraction function combining document, paragraph, and search functionality.
     
@@ -179,6 +481,27 @@ async def get_text(
         whole_word (bool): Match whole words only for scope="search" (default: False)
             - True: "cat" won't match "catch"
             - False: "cat" will match "catch"
+        
+        page_size (int, optional): Return scope="all"|"range"|"search" one page at a time
+            - At most this many paragraphs (or search matches) per page
+            - Pages also stay within EW_MAX_SEARCH_OUTPUT_CHARS; what does not
+              fit moves to the next page instead of being cut off
+            - The JSON page includes "next_cursor" (null on the last page)
+        
+        cursor (str, optional): A "next_cursor" from the previous page
+            - Pass back unchanged, with the same other arguments
+            - Refused once the document has changed; start again without it
+        
+        output_format (str): Encoding of formatted scope="all"|"range" output (default: "json")
+            - "json": Indented JSON, every run with its full formatting
+            - "compact": One unindented JSON object. Each distinct paragraph or run
+              formatting is listed once under "styles" and referenced by number;
+              paragraphs are {"index", "text", "format", "runs"} with runs as
+              [text, style] (plus {"fields", "display_text"} for field runs)
+            - "ndjson": The compact records one per line, each new style
+              ({"style": n, "format": {...}}) on a line before its first use
+            - "compact"/"ndjson" require include_formatting=True and omit
+              "document_text" (join the paragraph texts instead)
     
     Returns:
         str: Extracted content in format determined by scope and formatting options:
@@ -223,6 +546,12 @@ async def get_text(
         # Academic paper abstract extraction (assuming it's paragraph 2)
         abstract = await get_text(document_id="paper", scope="paragraph", paragraph_index=1)
         # Returns: Plain text of abstract paragraph
+        
+        # Page through a long document 500 paragraphs at a time
+        page = json.loads(await get_text(document_id="thesis", page_size=500))
+        while page["next_cursor"]:
+            page = json.loads(await get_text(document_id="thesis", page_size=500,
+                                             cursor=page["next_cursor"]))
     
     Error Handling:
         - Document not found: Returns "Document '{document_id}' not found in sessions"
@@ -290,6 +619,27 @@ async def get_text(
         except (ValueError, TypeError):
             return "Invalid parameter: end_paragraph must be an integer"
     
+    valid_output_formats = ["json", "compact", "ndjson"]
+    if output_format not in valid_output_formats:
+        return f"Invalid output_format: {output_format}. Must be one of: {', '.join(valid_output_formats)}"
+
+    paged = cursor is not None or page_size is not None
+    if output_format != "json" and (not include_formatting or scope not in ("all", "range") or paged):
+        return (
+            f"Invalid parameter: output_format='{output_format}' applies to scope='all' or 'range' "
+            "with include_formatting=True, without cursor/page_size"
+        )
+    if paged and scope == "paragraph":
+        return "Invalid parameter: cursor and page_size apply to scope='all', 'range' and 'search'"
+
+    if page_size is not None:
+        try:
+            page_size = int(page_size)
+            if page_size < 1:
+                return "Invalid parameter: page_size must be a positive integer"
+        except (ValueError, TypeError):
+            return "Invalid parameter: page_size must be an integer"
+
     if not os.path.exists(filename):
         return f"Document {filename} does not exist"
 
@@ -350,14 +700,20 @@ async def get_text(
         # Clean up None values for cleaner output
         return {k: v for k, v in formatting.items() if v is not None}
     
-    def extract_paragraph_formatting(paragraph, detail_level="basic"):
-        """Extract formatting information from a paragraph."""
+    def extract_paragraph_formatting(paragraph, detail_level="basic", style_name=None):
+        """Extract formatting information from a paragraph.
+
+        style_name, when the caller already resolved it (ParagraphIndex.style_name),
+        saves looking the paragraph's style up again.
+        """
         formatting = {}
         
         if detail_level in ["basic", "detailed", "comprehensive"]:
             # Basic paragraph formatting
+            if style_name is None and paragraph.style:
+                style_name = paragraph.style.name
             formatting.update({
-                "style": paragraph.style.name if paragraph.style else None,
+                "style": style_name,
                 "alignment": str(paragraph.alignment) if paragraph.alignment else None,
             })
         
@@ -390,52 +746,53 @@ async def get_text(
         return {k: v for k, v in formatting.items() if v is not None}
     
     try:
+        if paged:
+            return _get_text_page(
+                filename, scope, search_term, start_paragraph, end_paragraph, include_formatting,
+                formatting_detail, max_results, match_case, whole_word, cursor, page_size,
+                extract_paragraph_formatting, extract_run_formatting,
+            )
+
         if scope == "all":
             # Original get_document_text functionality with optional formatting
             if not include_formatting:
                 return extract_document_text(filename)
             else:
-                doc = Document(filename)
+                doc = load_document(filename)
+                index = get_paragraph_index(doc)
+                if output_format != "json":
+                    return "".join(_iter_compact_formatted(
+                        index, 0, len(index) - 1, formatting_detail, extract_paragraph_formatting,
+                        ndjson=output_format == "ndjson",
+                    ))
+                paragraphs = [
+                    _formatted_paragraph(index.paragraph(i), i, index.text(i), formatting_detail,
+                                         extract_paragraph_formatting, index.style_name(i))
+                    for i in range(len(index))
+                ]
                 result = {
-                    "document_text": "",
-                    "paragraphs": [],
+                    "document_text": "".join(para["text"] + "\n" for para in paragraphs),
+                    "paragraphs": paragraphs,
                     "formatting_detail": formatting_detail
                 }
                 
-                for i, paragraph in enumerate(doc.paragraphs):
-                    para_info = {
-                        "index": i,
-                        "text": paragraph.text,
-                        "paragraph_formatting": extract_paragraph_formatting(paragraph, formatting_detail),
-                        "runs": []
-                    }
-                    
-                    for run in paragraph.runs:
-                        # Use citation-aware formatting to capture field content
-                        formatted_run = format_run_with_citation_awareness(run, formatting_detail)
-                        # Include runs with text or field content
-                        if run.text.strip() or formatted_run.get('fields'):
-                            para_info["runs"].append(formatted_run)
-                    
-                    result["paragraphs"].append(para_info)
-                    result["document_text"] += paragraph.text + "\n"
-                
                 return json.dumps(result, indent=2)
         
         elif scope == "paragraph":
             # Enhanced: citation-aware formatting to align with 'all'/'range'
-            doc = Document(filename)
+            doc = load_document(filename)
+            index = get_paragraph_index(doc)
+            paragraph_count = len(index)
             
             # Validate paragraph index
-            if paragraph_index >= len(doc.paragraphs):
-                return f"Invalid paragraph index: {paragraph_index}. Document has {len(doc.paragraphs)} paragraphs (0-{len(doc.paragraphs)-1})"
-            
-            paragraph = doc.paragraphs[paragraph_index]
+            if paragraph_index >= paragraph_count:
+                return f"Invalid paragraph index: {paragraph_index}. Document has {paragraph_count} paragraphs (0-{paragraph_count-1})"
             
             if not include_formatting:
                 result = get_paragraph_text(filename, paragraph_index)
                 return json.dumps(result, indent=2)
             else:
+                paragraph = index.paragraph(paragraph_index)
                 result = {
                     "paragraph_index": paragraph_index,
                     "text": paragraph.text,
@@ -465,73 +822,17 @@ async def get_text(
                     result["truncated"] = True
                 return _json_dumps_with_char_limit(result, max_output_chars)
             else:
-                doc = Document(filename)
+                doc = load_document(filename)
                 occurrences = []
-                hit_result_limit = False
-                
-                search_lower = search_term.lower() if not match_case else search_term
-                
-                for para_idx, paragraph in enumerate(doc.paragraphs):
-                    para_text = paragraph.text
-                    search_text = para_text.lower() if not match_case else para_text
-                    
-                    # Find all occurrences in this paragraph
-                    start = 0
-                    while True:
-                        if whole_word:
-                            # Simple whole word matching
-                            import re
-                            pattern = r'\b' + re.escape(search_lower) + r'\b'
-                            match = re.search(pattern, search_text[start:], re.IGNORECASE if not match_case else 0)
-                            if match:
-                                pos = start + match.start()
-                                end_pos = start + match.end()
-                            else:
-                                break
-                        else:
-                            pos = search_text.find(search_lower, start)
-                            if pos == -1:
-                                break
-                            end_pos = pos + len(search_term)
-                        
-                        # Extract context and formatting
-                        context_start = max(0, pos - 50)
-                        context_end = min(len(para_text), end_pos + 50)
-                        context = para_text[context_start:context_end]
-                        
-                        # Find which run contains this text and extract its formatting
-                        char_count = 0
-                        containing_run = None
-                        run_formatting = {}
-                        
-                        for run in paragraph.runs:
-                            if char_count <= pos < char_count + len(run.text):
-                                containing_run = run
-                                run_formatting = extract_run_formatting(run, formatting_detail)
-                                break
-                            char_count += len(run.text)
-                        
-                        occurrence = {
-                            "paragraph_index": para_idx,
-                            "character_position": pos,
-                            "matched_text": para_text[pos:end_pos],
-                            "context": context,
-                            "paragraph_formatting": extract_paragraph_formatting(paragraph, formatting_detail),
-                            "run_formatting": run_formatting
-                        }
-                        
-                        occurrences.append(occurrence)
-                        
-                        if len(occurrences) >= max_results:
-                            hit_result_limit = True
-                            break
-                        
-                        start = end_pos
-                    
+                for occurrence, _ in _formatted_occurrences(
+                    doc, filename, search_term, match_case, whole_word, formatting_detail,
+                    extract_paragraph_formatting, extract_run_formatting,
+                ):
+                    occurrences.append(occurrence)
                     if len(occurrences) >= max_results:
-                        hit_result_limit = True
                         break
-                
+                hit_result_limit = len(occurrences) >= max_results
+
                 result = {
                     "query": search_term,
                     "match_case": match_case,
@@ -547,29 +848,35 @@ async def get_text(
         
         elif scope == "range":
             # New functionality: extract paragraph range with optional formatting
-            doc = Document(filename)
+            doc = load_document(filename)
+            index = get_paragraph_index(doc)
+            paragraph_count = len(index)
             
             # Validate range parameters
-            if start_paragraph >= len(doc.paragraphs):
-                return f"Invalid start_paragraph: {start_paragraph}. Document has {len(doc.paragraphs)} paragraphs (0-{len(doc.paragraphs)-1})"
+            if start_paragraph >= paragraph_count:
+                return f"Invalid start_paragraph: {start_paragraph}. Document has {paragraph_count} paragraphs (0-{paragraph_count-1})"
             
-            if end_paragraph >= len(doc.paragraphs):
-                return f"Invalid end_paragraph: {end_paragraph}. Document has {len(doc.paragraphs)} paragraphs (0-{len(doc.paragraphs)-1})"
+            if end_paragraph >= paragraph_count:
+                return f"Invalid end_paragraph: {end_paragraph}. Document has {paragraph_count} paragraphs (0-{paragraph_count-1})"
             
             if start_paragraph > end_paragraph:
                 return f"Invalid range: start_paragraph ({start_paragraph}) must be <= end_paragraph ({end_paragraph})"
             
             # Extract text from paragraph range
-            paragraphs = doc.paragraphs[start_paragraph:end_paragraph + 1]
-            
             if not include_formatting:
                 text_parts = []
-                for i, paragraph in enumerate(paragraphs):
+                for i, text in enumerate(index.texts(start_paragraph, end_paragraph)):
                     actual_index = start_paragraph + i
-                    text_parts.append(f"[Paragraph {actual_index}] {paragraph.text}")
+                    text_parts.append(f"[Paragraph {actual_index}] {text}")
                 
                 return "\n".join(text_parts)
+            elif output_format != "json":
+                return "".join(_iter_compact_formatted(
+                    index, start_paragraph, end_paragraph, formatting_detail, extract_paragraph_formatting,
+                    ndjson=output_format == "ndjson",
+                ))
             else:
+                paragraphs = [index.paragraph(i) for i in range(start_paragraph, end_paragraph + 1)]
                 result = {
                     "start_paragraph": start_paragraph,
                     "end_paragraph": end_paragraph,
@@ -579,21 +886,12 @@ async def get_text(
                 
                 for i, paragraph in enumerate(paragraphs):
                     actual_index = start_paragraph + i
-                    para_info = {
-                        "index": actual_index,
-                        "text": paragraph.text,
-                        "paragraph_formatting": extract_paragraph_formatting(paragraph, formatting_detail),
-                        "runs": []
-                    }
-                    
-                    for run in paragraph.runs:
-                        # Use citation-aware formatting to capture field content
-                        formatted_run = format_run_with_citation_awareness(run, formatting_detail)
-                        # Include runs with text or field content
-                        if run.text.strip() or formatted_run.get('fields'):
-                            para_info["runs"].append(formatted_run)
-                    
-                    result["paragraphs"].append(para_info)
+                    result["paragraphs"].append(
+                        _formatted_paragraph(
+                            paragraph, actual_index, index.text(actual_index), formatting_detail,
+                            extract_paragraph_formatting, index.style_name(actual_index)
+                        )
+                    )
                 
                 return json.dumps(result, indent=2)
         
@@ -651,6 +949,12 @@ async def copy_document(source_filename: str, destination_filename: Optional[str
     
     if destination_filename:
         destination_filename = ensure_docx_extension(destination_filename)
+
+    # Copy what the session sees, not a file that still lacks pending edits.
+    try:
+        get_session_manager().flush_path(source_filename)
+    except Exception as e:
+        return f"Failed to copy document: {str(e)}"
     
     success, message, new_path = create_document_copy(source_filename, destination_filename)
     if success:
@@ -703,7 +1007,7 @@ async def merge_documents(target_filename: str, source_filenames: List[str], add
         # Process each source document
         for i, filename in enumerate(source_filenames):
             doc_filename = ensure_docx_extension(filename)
-            source_doc = Document(doc_filename)
+            source_doc = load_document(doc_filename)
             
             # Add page break between documents (except before the first one)
             if add_page_breaks and i > 0:
@@ -742,7 +1046,7 @@ async def merge_documents(target_filename: str, source_filenames: List[str], add
                 copy_table(table, target_doc)
         
         # Save the merged document
-        target_doc.save(target_filename)
+        save_document(target_doc, target_filename)
         return f"Successfully merged {len(source_filenames)} documents into {target_filename}"
     except Exception as e:
         return f"Failed to merge documents: {str(e)}"
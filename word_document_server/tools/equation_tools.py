@@ -9,12 +9,16 @@ from __future__ import annotations
 
 from typing import Optional
 
-from docx import Document
 from docx.oxml import OxmlElement, parse_xml
 
-from word_document_server.utils.session_utils import resolve_document_path
+from word_document_server.utils.session_utils import (
+    load_document,
+    mark_operation_succeeded,
+    resolve_document_path,
+    save_document,
+)
 from word_document_server.utils.equation_utils import latex_to_omml
-from word_document_server.utils.file_utils import check_file_writeable
+from word_document_server.utils.file_utils import preflight_write
 
 
 async def insert_equation(
@@ -58,7 +62,7 @@ async def insert_equation(
         return error
 
     # Check writeable and trigger undo snapshot
-    ok, err_msg = check_file_writeable(file_path)
+    ok, err_msg, file_bytes = preflight_write(file_path)
     if not ok:
         return err_msg
 
@@ -69,7 +73,7 @@ async def insert_equation(
     omml_xml = omml_or_err
 
     try:
-        doc = Document(file_path)
+        doc = load_document(file_path, for_write=True, data=file_bytes)
 
         total_paras = len(doc.paragraphs)
 
@@ -115,7 +119,8 @@ async def insert_equation(
         if "m" not in root.nsmap:
             root.set(qn("xmlns:m"), "http://schemas.openxmlformats.org/officeDocument/2006/math")
 
-        doc.save(file_path)
+        save_document(doc, file_path)
+        mark_operation_succeeded(file_path)
         return "Equation inserted successfully"
     except Exception as e:
         return f"Failed to insert equation: {e}"
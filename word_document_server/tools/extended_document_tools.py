@@ -12,6 +12,7 @@ from docx import Document
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension, sanitize_file_path
 from word_document_server.utils.session_utils import resolve_document_path
+from word_document_server.session_manager import get_session_manager
 
 
 async def convert_to_pdf(document_id: str = None, filename: str = None, output_filename: Optional[str] = None) -> str:
@@ -38,6 +39,12 @@ async def convert_to_pdf(document_id: str = None, filename: str = None, output_f
     
     if not os.path.exists(filename):
         return f"Document {filename} does not exist"
+
+    # The converter reads the file on disk; write pending session edits first.
+    try:
+        get_session_manager().flush_path(filename)
+    except Exception as e:
+        return f"Failed to save pending changes before conversion: {str(e)}"
     
     # Generate output filename if not provided
     if not output_filename:
@@ -11,8 +11,8 @@ import datetime
 from typing import List, Optional, Dict, Any
 from docx import Document
 
-from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
-from word_document_server.utils.session_utils import resolve_document_path
+from word_document_server.utils.file_utils import check_file_writeable, preflight_write, ensure_docx_extension
+from word_document_server.utils.session_utils import resolve_document_path, load_document, save_document
 
 
 
@@ -51,12 +51,12 @@ async def add_digital_signature(document_id: str = None, filename: str = None, s
         return f"Document {filename} does not exist"
 
     # Check if file is writeable
-    is_writeable, error_message = check_file_writeable(filename)
+    is_writeable, error_message, file_bytes = preflight_write(filename)
     if not is_writeable:
         return f"Cannot add signature to document: {error_message}"
 
     try:
-        doc = Document(filename)
+        doc = load_document(filename, for_write=True, data=file_bytes)
 
         # Add a visible signature block to the document.
         #
@@ -70,9 +70,9 @@ async def add_digital_signature(document_id: str = None, filename: str = None, s
         signature_para.add_run(f"\nDate: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
         # Save first, then compute the signature hash on the final signed content.
-        doc.save(filename)
+        save_document(doc, filename)
 
-        signed_doc = Document(filename)
+        signed_doc = load_document(filename)
         signature_info = create_signature_info(signed_doc, signer_name, reason)
 
         success = add_protection_info(
@@ -130,7 +130,7 @@ async def verify_document(document_id: str = None, filename: str = None, passwor
 
                     if original_hash:
                         # Calculate current content hash
-                        doc = Document(filename)
+                        doc = load_document(filename)
                         text_content = "\n".join([p.text for p in doc.paragraphs])
                         current_hash = hashlib.sha256(text_content.encode()).hexdigest()
 
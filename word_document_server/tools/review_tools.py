@@ -6,13 +6,18 @@ and review management for academic research workflows.
 """
 import os
 from typing import List, Optional, Dict, Any
-from docx import Document
 from docx.oxml.ns import qn
 from docx.shared import RGBColor
 from lxml import etree as ET
 
-from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
-from word_document_server.utils.session_utils import resolve_document_path
+from word_document_server.utils.file_utils import preflight_write, ensure_docx_extension
+from word_document_server.utils.session_utils import (
+    load_document,
+    mark_operation_succeeded,
+    resolve_document_path,
+    save_document,
+)
+from word_document_server.utils.body_walker import BodyWalker
 
 class WordDocumentError(Exception):
     """Base exception for Word document operations."""
@@ -77,7 +82,7 @@ def manage_comments(
         return f"Document {filename} does not exist"
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
 
         # Handle list action - search for text-based comment markers
         comments_info = []
@@ -142,55 +147,33 @@ def extract_track_changes(document_id: str = None, filename: str = None) -> str:
         return f"Document {filename} does not exist"
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
+        walker = BodyWalker(doc)
         changes_info = []
         
-        # Access the document's XML to extract revision information
-        document_xml = doc.element.xml
-        root = ET.fromstring(document_xml)
-        
-        # Extract track changes with namespace handling
-        ns = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
-        
-        # Find insertions
-        for ins in root.findall('.//w:ins', ns):
-            author = ins.get(qn('w:author'), 'Unknown')
-            date = ins.get(qn('w:date'), 'Unknown')
-            change_id = ins.get(qn('w:id'), 'Unknown')
+        # Insertions and deletions straight from the parsed body, in document order
+        for change in doc.element.body.iter(qn('w:ins'), qn('w:del')):
+            is_insertion = change.tag == qn('w:ins')
+            text_tag = qn('w:t') if is_insertion else qn('w:delText')
+            change_text = "".join(t.text for t in change.iter(text_tag) if t.text)
             
-            # Extract inserted text
-            inserted_text = ""
-            for text_elem in ins.findall('.//w:t', ns):
-                if text_elem.text:
-                    inserted_text += text_elem.text
-            
-            changes_info.append({
-                'type': 'insertion',
-                'id': change_id,
-                'author': author,
-                'date': date,
-                'text': inserted_text
-            })
-        
-        # Find deletions
-        for del_elem in root.findall('.//w:del', ns):
-            author = del_elem.get(qn('w:author'), 'Unknown')
-            date = del_elem.get(qn('w:date'), 'Unknown')
-            change_id = del_elem.get(qn('w:id'), 'Unknown')
+            change_info = {
+                'type': 'insertion' if is_insertion else 'deletion',
+                'id': change.get(qn('w:id'), 'Unknown'),
+                'author': change.get(qn('w:author'), 'Unknown'),
+                'date': change.get(qn('w:date'), 'Unknown'),
+                'text': change_text
+            }
             
-            # Extract deleted text
-            deleted_text = ""
-            for text_elem in del_elem.findall('.//w:delText', ns):
-                if text_elem.text:
-                    deleted_text += text_elem.text
+            paragraph = walker.find(change)
+            if paragraph is not None:
+                if paragraph.cell is None:
+                    change_info['location'] = f"Paragraph {paragraph.paragraph_index}"
+                else:
+                    table_idx, row_idx, col_idx = paragraph.cell.location
+                    change_info['location'] = f"Table {table_idx}, Row {row_idx}, Column {col_idx}"
             
-            changes_info.append({
-                'type': 'deletion',
-                'id': change_id,
-                'author': author,
-                'date': date,
-                'text': deleted_text
-            })
+            changes_info.append(change_info)
         
         if not changes_info:
             return "No track changes found in the document."
@@ -200,6 +183,8 @@ def extract_track_changes(document_id: str = None, filename: str = None) -> str:
         for i, change in enumerate(changes_info, 1):
             result += f"Change {i} (ID: {change['id']}):\n"
             result += f"  Type: {change['type'].title()}\n"
+            if 'location' in change:
+                result += f"  Location: {change['location']}\n"
             result += f"  Author: {change['author']}\n"
             result += f"  Date: {change['date']}\n"
             result += f"  Text: '{change['text']}'\n\n"
@@ -391,12 +376,12 @@ async def manage_track_changes(
         return f"Document {filename} does not exist"
     
     # Check if file is writeable
-    is_writeable, error_message = check_file_writeable(filename)
+    is_writeable, error_message, file_bytes = preflight_write(filename)
     if not is_writeable:
         return f"Cannot modify document: {error_message}. Consider creating a copy first."
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename, for_write=True, data=file_bytes)
         document_xml = doc.element
         ns = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
         
@@ -462,7 +447,8 @@ async def manage_track_changes(
                 del_elem.getparent().remove(del_elem)
                 changes_processed += 1
         
-        doc.save(filename)
+        save_document(doc, filename)
+        mark_operation_succeeded(filename)
         
         # Build response message
         action_past_tense = {
@@ -7,12 +7,26 @@ academic research document management and thesis synthesis.
 import os
 import json
 from typing import List, Optional, Dict, Any
-from docx import Document
 from docx.shared import Inches, Pt
 import re
 
-from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
-from word_document_server.utils.session_utils import resolve_document_path
+from word_document_server.utils.file_utils import preflight_write, ensure_docx_extension
+from word_document_server.utils.session_utils import (
+    load_document,
+    mark_operation_succeeded,
+    resolve_document_path,
+    save_document,
+)
+from word_document_server.utils.body_walker import BodyWalker
+from word_document_server.utils.cursors import (
+    DEFAULT_PAGE_SIZE,
+    decode_cursor,
+    document_stamp,
+    encode_cursor,
+    fill_page,
+    listing_key,
+)
+from word_document_server.utils.limits import get_max_search_output_chars
 
 
 async def get_sections(
@@ -26,7 +40,9 @@ async def get_sections(
     case_sensitive: bool = False,
     output_format: str = "text",
     include_formatting: bool = False,
-    formatting_detail: str = "basic"
+    formatting_detail: str = "basic",
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = None
 ) -> str:
     """Unified section extraction function for comprehensive document structure analysis.
     
@@ -86,6 +102,15 @@ async def get_sections(
             - "basic": Font name, size, bold/italic status
             - "detailed": Basic + color, alignment, spacing
             - "comprehensive": Detailed + advanced formatting properties
+        
+        page_size (int, optional): Return the top-level sections one page at a time
+            - At most this many sections per page, within EW_MAX_SEARCH_OUTPUT_CHARS
+            - JSON output gains "next_cursor" (null on the last page); text
+              output ends with a "next_cursor: ..." line while more remain
+        
+        cursor (str, optional): The next_cursor of the previous page
+            - Pass back unchanged, with the same other arguments
+            - Refused once the document has changed; start again without it
     
     Returns:
         str: Document structure or content in requested format:
@@ -222,6 +247,14 @@ async def get_sections(
     except (ValueError, TypeError):
         return "Invalid parameter: max_level must be an integer between 1 and 9"
     
+    if page_size is not None:
+        try:
+            page_size = int(page_size)
+            if page_size < 1:
+                return "Invalid parameter: page_size must be a positive integer"
+        except (ValueError, TypeError):
+            return "Invalid parameter: page_size must be an integer"
+    
     if not os.path.exists(filename):
         return f"Document {filename} does not exist"
     
@@ -295,7 +328,7 @@ async def get_sections(
         return {k: v for k, v in formatting.items() if v is not None}
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         paragraphs = doc.paragraphs
         
         if not paragraphs:
@@ -323,19 +356,6 @@ async def get_sections(
                     "subsections": []
                 }
                 
-                # Add formatting information if requested
-                if include_formatting:
-                    section_info["heading_formatting"] = {
-                        "paragraph_formatting": extract_paragraph_formatting(paragraph, formatting_detail),
-                        "runs": []
-                    }
-                    
-                    for run in paragraph.runs:
-                        if run.text.strip():
-                            section_info["heading_formatting"]["runs"].append(
-                                extract_run_formatting(run, formatting_detail)
-                            )
-                
                 # Add to appropriate location
                 if heading_level == 1 or not sections:
                     sections.append(section_info)
@@ -362,20 +382,6 @@ async def get_sections(
                         "paragraph_index": i,
                         "text": content_text
                     }
-                    
-                    # Add formatting information if requested
-                    if include_formatting:
-                        content_item["formatting"] = {
-                            "paragraph_formatting": extract_paragraph_formatting(paragraph, formatting_detail),
-                            "runs": []
-                        }
-                        
-                        for run in paragraph.runs:
-                            if run.text.strip():
-                                content_item["formatting"]["runs"].append(
-                                    extract_run_formatting(run, formatting_detail)
-                                )
-                    
                     current_section["content"].append(content_item)
         
         if not sections:
@@ -397,6 +403,45 @@ async def get_sections(
             
             sections = filtered_sections
         
+        def paragraph_formatting(paragraph):
+            return {
+                "paragraph_formatting": extract_paragraph_formatting(paragraph, formatting_detail),
+                "runs": [extract_run_formatting(run, formatting_detail) for run in paragraph.runs if run.text.strip()]
+            }
+        
+        def with_formatting(section):
+            # Formatting is read only for the sections being returned.
+            if include_formatting:
+                section["heading_formatting"] = paragraph_formatting(paragraphs[section["paragraph_index"]])
+                for content_item in section["content"]:
+                    content_item["formatting"] = paragraph_formatting(paragraphs[content_item["paragraph_index"]])
+                for subsection in section["subsections"]:
+                    with_formatting(subsection)
+            return section
+        
+        next_cursor = None
+        if cursor is not None or page_size is not None:
+            listing = listing_key(
+                "get_sections", mode=mode, section_title=section_title, max_level=max_level,
+                include_subsections=include_subsections, full_content=full_content,
+                case_sensitive=case_sensitive, output_format=output_format,
+                include_formatting=include_formatting, formatting_detail=formatting_detail,
+            )
+            stamp = document_stamp(filename)
+            start = 0
+            if cursor is not None:
+                start, cursor_error = decode_cursor(cursor, listing, stamp)
+                if cursor_error:
+                    return cursor_error
+            entries = ((with_formatting(sections[k]), k + 1) for k in range(start, len(sections)))
+            sections, next_position = fill_page(
+                entries, page_size or DEFAULT_PAGE_SIZE, get_max_search_output_chars()
+            )
+            if next_position is not None:
+                next_cursor = encode_cursor(listing, stamp, next_position)
+        else:
+            sections = [with_formatting(section) for section in sections]
+        
         # Format output based on mode and output_format
         if output_format == "json":
             result = {
@@ -405,6 +450,8 @@ async def get_sections(
                 "formatting_detail": formatting_detail if include_formatting else None,
                 "sections": sections
             }
+            if cursor is not None or page_size is not None:
+                result["next_cursor"] = next_cursor
             return json.dumps(result, indent=2)
         
         # Text output formatting
@@ -498,6 +545,8 @@ async def get_sections(
                 
                 extract_section_content(section)
         
+        if next_cursor:
+            result_lines.append(f"next_cursor: {next_cursor}")
         return "\\n".join(result_lines)
     
     except Exception as e:
@@ -527,16 +576,18 @@ async def generate_table_of_contents(document_id: str = None, filename: str = No
         return f"Document {filename} does not exist"
     
     # Check if file is writeable
-    is_writeable, error_message = check_file_writeable(filename)
+    is_writeable, error_message, file_bytes = preflight_write(filename)
     if not is_writeable:
         return f"Cannot modify document: {error_message}. Consider creating a copy first."
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename, for_write=True, data=file_bytes)
+        walker = BodyWalker(doc)
+        paragraphs = [walker.proxy(item) for item in walker.body_paragraphs]
         
         # Collect all headings
         headings = []
-        for i, paragraph in enumerate(doc.paragraphs):
+        for i, paragraph in enumerate(paragraphs):
             if paragraph.style and paragraph.style.name.startswith('Heading '):
                 try:
                     level = int(paragraph.style.name.split(' ')[1])
@@ -556,7 +607,7 @@ async def generate_table_of_contents(document_id: str = None, filename: str = No
         toc_inserted = False
         
         # Look for existing "Table of Contents" or "Contents" heading
-        for i, paragraph in enumerate(doc.paragraphs):
+        for i, paragraph in enumerate(paragraphs):
             if (paragraph.text.lower().strip() in ['table of contents', 'contents', 'toc'] or
                 'table of contents' in paragraph.text.lower()):
                 
@@ -564,8 +615,8 @@ async def generate_table_of_contents(document_id: str = None, filename: str = No
                     # Remove existing ToC content (next few paragraphs that aren't headings)
                     j = i + 1
                     to_remove = []
-                    while j < len(doc.paragraphs):
-                        next_para = doc.paragraphs[j]
+                    while j < len(paragraphs):
+                        next_para = paragraphs[j]
                         if (next_para.style and 
                             (next_para.style.name.startswith('Heading ') or
                              next_para.style.name == 'Normal')):
@@ -580,11 +631,11 @@ async def generate_table_of_contents(document_id: str = None, filename: str = No
                     
                     # Remove old ToC entries
                     for idx in reversed(to_remove):
-                        p = doc.paragraphs[idx]._p
+                        p = paragraphs[idx]._p
                         p.getparent().remove(p)
                 
                 # Insert new ToC after the ToC heading
-                toc_para = doc.paragraphs[i]
+                toc_para = paragraphs[i]
                 for heading in headings:
                     # Create ToC entry
                     indent = "    " * (heading['level'] - 1)
@@ -593,11 +644,7 @@ async def generate_table_of_contents(document_id: str = None, filename: str = No
                     # Insert paragraph after ToC heading
                     new_para = doc.add_paragraph(toc_text)
                     # Move the paragraph to correct position
-                    new_para._p.getparent().remove(new_para._p)
-                    toc_para._p.getparent().insert(
-                        list(toc_para._p.getparent()).index(toc_para._p) + 1,
-                        new_para._p
-                    )
+                    toc_para._p.addnext(new_para._p)
                 
                 toc_inserted = True
                 break
@@ -605,7 +652,7 @@ async def generate_table_of_contents(document_id: str = None, filename: str = No
         # If no existing ToC found, create one at the beginning
         if not toc_inserted:
             # Insert ToC at the beginning (after any title)
-            toc_heading = doc.paragraphs[0] if doc.paragraphs else doc.add_paragraph()
+            toc_heading = paragraphs[0] if paragraphs else doc.add_paragraph()
             toc_heading.text = "Table of Contents"
             toc_heading.style = doc.styles['Heading 1']
             
@@ -616,16 +663,13 @@ async def generate_table_of_contents(document_id: str = None, filename: str = No
                 toc_para = doc.add_paragraph(toc_text)
                 
                 # Move to correct position (after ToC heading)
-                toc_para._p.getparent().remove(toc_para._p)
-                toc_heading._p.getparent().insert(
-                    list(toc_heading._p.getparent()).index(toc_heading._p) + 1,
-                    toc_para._p
-                )
+                toc_heading._p.addnext(toc_para._p)
             
             # Add page break after ToC
             doc.add_page_break()
         
-        doc.save(filename)
+        save_document(doc, filename)
+        mark_operation_succeeded(filename)
         
         return f"Table of contents {'updated' if update_existing else 'created'} with {len(headings)} entries (max level {max_level})."
     
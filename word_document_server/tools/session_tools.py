@@ -89,7 +89,7 @@ def close_document(document_id: str) -> str:
         - If closed document was active, another open document becomes active
         - If no other documents open, no active document is set
         - Document ID becomes available for reuse immediately
-        - File remains unchanged on disk
+        - Unsaved in-memory edits are written to disk before closing
     
     Error Handling:
         - Document ID not found: Returns error with available IDs
@@ -261,6 +261,8 @@ def session_manager(
             - "list": List all open document sessions
             - "set_active": Set active document (requires document_id)
             - "close_all": Close all document sessions
+            - "save": Write unsaved in-memory edits to disk (document_id optional;
+              saves every open document with pending changes when omitted)
         document_id (str, optional): Session document identifier for targeted operations
         file_path (str, optional): File path for opening documents
         
@@ -282,9 +284,19 @@ def session_manager(
         
         # Close all documents
         session_manager("close_all")
+        
+        # Flush pending write-behind edits
+        session_manager("save", document_id="main")
+    
+    Note:
+        Tools addressed by document_id (or by the path of an open document)
+        work on the already-parsed in-memory document. Edits are written
+        behind: flushed every EW_SESSION_FLUSH_OPS operations (default 1),
+        after EW_SESSION_FLUSH_IDLE_MS of inactivity, on "save", on "close",
+        and at shutdown.
     """
     # Validate action parameter
-    valid_actions = ["open", "close", "list", "set_active", "close_all"]
+    valid_actions = ["open", "close", "list", "set_active", "close_all", "save"]
     if action not in valid_actions:
         return f"Invalid action: {action}. Must be one of: {', '.join(valid_actions)}"
     
@@ -309,6 +321,9 @@ def session_manager(
         
     elif action == "close_all":
         return close_all_documents()
+        
+    elif action == "save":
+        return get_session_manager().save_document(document_id)
 
 
 # Export consolidated tool list for reference
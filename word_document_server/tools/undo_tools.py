@@ -77,10 +77,20 @@ def session_undo(
 
     undo_mgr = get_undo_manager()
 
-    if action == "undo":
-        return undo_mgr.undo(file_path, steps)
-    if action == "redo":
-        return undo_mgr.redo(file_path, steps)
+    if action in {"undo", "redo"}:
+        # Snapshots are file bytes, so pending in-memory session edits must hit
+        # disk first, and the resident parse is stale once the file is rewritten.
+        session_mgr = get_session_manager()
+        try:
+            session_mgr.flush_path(file_path)
+        except Exception as e:
+            return f"Error: Failed to save pending changes before {action}: {str(e)}"
+        if action == "undo":
+            result = undo_mgr.undo(file_path, steps)
+        else:
+            result = undo_mgr.redo(file_path, steps)
+        session_mgr.invalidate_path(file_path)
+        return result
     if action == "list":
         if file_path is None:
             # Aggregate list for all documents
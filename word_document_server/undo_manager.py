@@ -4,32 +4,75 @@ from __future__ import annotations
 
 This module keeps an in-memory history (list of binary snapshots) for every
 .docx file path that is being modified by the tools.  The history is captured
-just before a file is written – see utils.file_utils.check_file_writeable,
-which calls ``snapshot``.
+just before a file is written – see utils.file_utils.preflight_write,
+which calls ``snapshot`` with the bytes it has just read. Restores replace
+the file atomically (utils.file_utils.atomic_write_bytes).
+
+Snapshots are stored per package part in a content-addressed store (see
+utils.snapshot_store): parts that did not change between edits – media,
+styles, numbering – are held once and shared by every snapshot of every
+document, so the byte budget covers far more undo steps than whole-file
+copies would.  When the memory tier exceeds EW_MAX_UNDO_BYTES_TOTAL, the
+coldest segments are compressed into a spill file (EW_MAX_UNDO_DISK_BYTES)
+instead of being dropped; history is only evicted once both tiers are full.
+
+Budget accounting is O(1): the store keeps running byte counters per tier,
+stacks are deques, and a min-heap of snapshot sequence numbers yields the
+globally oldest snapshot for eviction without scanning every tracked path.
+
+Locking is two-level: a short-lived manager lock guards the history tables
+and byte-budget bookkeeping, while a per-path lock serializes the file reads
+and writes of one document. Snapshotting or restoring a large file therefore
+never blocks undo/redo on a different file.
+
+With EW_UNDO_JOURNAL_DIR set, every stack change is also appended to a
+per-document journal on disk (see utils.undo_journal). A path's journal is
+replayed the first time the path is used, so undo keeps working after the
+server restarts; journaled snapshots that are evicted from memory stay
+restorable from disk instead of being forgotten.
 
 A single public tool (see tools/undo_tools.py) exposes user-facing operations
 without increasing the overall MCP tool count dramatically.
 """
 
 # Standard Library
+import heapq
 import os
+from collections import deque
 from pathlib import Path
 from threading import Lock
-from typing import Dict, List, Optional
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from word_document_server.utils.file_utils import atomic_write_bytes
 from word_document_server.utils.limits import (
     UNDO_BUDGET_EXCEEDED,
     get_max_undo_bytes_total,
+    get_max_undo_disk_bytes,
+    get_undo_journal_dir,
+    get_undo_journal_max_bytes,
 )
+from word_document_server.utils.snapshot_store import (
+    Manifest,
+    SnapshotStore,
+    digest_segments,
+)
+from word_document_server.utils.undo_journal import UndoJournal
 
 
 class _Snapshot:
-    """Single history snapshot with creation order for deterministic eviction."""
+    """Single history snapshot with creation order for deterministic eviction.
+
+    ``resident`` snapshots hold references in the in-memory/spill store;
+    others live only in their document's journal.
+    """
 
-    __slots__ = ("seq", "data")
+    __slots__ = ("seq", "manifest", "resident", "journal")
 
-    def __init__(self, seq: int, data: bytes) -> None:
+    def __init__(self, seq: int, manifest: Manifest, resident: bool = True,
+                 journal: Optional[UndoJournal] = None) -> None:
         self.seq = seq
-        self.data = data
+        self.manifest = manifest
+        self.resident = resident
+        self.journal = journal
 
 
 class _HistoryStacks:
@@ -38,8 +81,9 @@ class _HistoryStacks:
     __slots__ = ("undo", "redo")
 
     def __init__(self) -> None:
-        self.undo: List[_Snapshot] = []
-        self.redo: List[_Snapshot] = []
+        # Both deques stay ordered by seq: every append is a new snapshot.
+        self.undo: Deque[_Snapshot] = deque()
+        self.redo: Deque[_Snapshot] = deque()
 
 
 class UndoManager:
@@ -49,9 +93,23 @@ class UndoManager:
         # path -> _HistoryStacks
         self._stacks: Dict[str, _HistoryStacks] = {}
         self._max_depth = max_depth
+        # Guards _stacks, _path_locks, sequence numbers and budget counters.
+        # Never held across file I/O.
         self._lock = Lock()
+        # path -> Lock serializing snapshot/undo/redo I/O on that file
+        self._path_locks: Dict[str, Lock] = {}
+        # Package segments shared by all snapshots of all paths
+        self._store = SnapshotStore()
         self._next_seq = 0
         self._budget_evictions = 0
+        # seq -> (path, stack, snapshot) for every stacked resident snapshot,
+        # and a min-heap of (seq, path, stack) over them. Heap entries whose
+        # seq is no longer in _resident are skipped lazily when popped.
+        self._resident: Dict[int, Tuple[str, str, _Snapshot]] = {}
+        self._eviction_heap: List[Tuple[int, str, str]] = []
+        # path -> journal (None when journaling was off at first use)
+        self._journals: Dict[str, Optional[UndoJournal]] = {}
+        self._loaded_paths: Set[str] = set()
 
     # ------------------------------------------------------------------
     # Internal helpers
@@ -62,78 +120,232 @@ class UndoManager:
             self._stacks[path] = _HistoryStacks()
         return self._stacks[path]
 
-    def _new_snapshot(self, data: bytes) -> _Snapshot:
-        snapshot = _Snapshot(self._next_seq, data)
+    def _path_lock(self, path: str) -> Lock:
+        with self._lock:
+            lock = self._path_locks.get(path)
+            if lock is None:
+                lock = Lock()
+                self._path_locks[path] = lock
+            return lock
+
+    def _new_snapshot(self, manifest: Manifest, journal: Optional[UndoJournal] = None,
+                      resident: bool = True) -> _Snapshot:
+        snapshot = _Snapshot(self._next_seq, manifest, resident, journal)
         self._next_seq += 1
         return snapshot
 
-    def _total_snapshot_bytes(self) -> int:
-        total = 0
-        for stacks in self._stacks.values():
-            total += sum(len(s.data) for s in stacks.undo)
-            total += sum(len(s.data) for s in stacks.redo)
-        return total
+    def _push(self, path: str, which: str, snapshot: _Snapshot) -> None:
+        """Append snapshot to a stack and register it for eviction (lock held)."""
+        stacks = self._get_stacks(path)
+        (stacks.undo if which == "undo" else stacks.redo).append(snapshot)
+        if not snapshot.resident:
+            return
+        self._resident[snapshot.seq] = (path, which, snapshot)
+        heapq.heappush(self._eviction_heap, (snapshot.seq, path, which))
+        if len(self._eviction_heap) > 2 * len(self._resident) + 64:
+            self._rebuild_eviction_heap()
+
+    def _pop(self, stack: Deque[_Snapshot], newest: bool = True) -> _Snapshot:
+        """Take a snapshot off either end of a stack (lock held)."""
+        snapshot = stack.pop() if newest else stack.popleft()
+        self._resident.pop(snapshot.seq, None)
+        return snapshot
 
-    def _enforce_total_budget(self) -> None:
-        limit = get_max_undo_bytes_total()
-        while self._total_snapshot_bytes() > limit:
-            oldest_path = None
-            oldest_stack = None
-            oldest_seq = None
-
-            for path, stacks in self._stacks.items():
-                if stacks.undo:
-                    seq = stacks.undo[0].seq
-                    if oldest_seq is None or seq < oldest_seq:
-                        oldest_path = path
-                        oldest_stack = "undo"
-                        oldest_seq = seq
-                if stacks.redo:
-                    seq = stacks.redo[0].seq
-                    if oldest_seq is None or seq < oldest_seq:
-                        oldest_path = path
-                        oldest_stack = "redo"
-                        oldest_seq = seq
+    def _rebuild_eviction_heap(self) -> None:
+        """Drop stale heap entries; amortized O(1) per snapshot."""
+        heap = [(seq, path, which) for seq, (path, which, _) in self._resident.items()]
+        heapq.heapify(heap)
+        self._eviction_heap = heap
 
-            if oldest_path is None or oldest_stack is None:
-                break
+    def _discard(self, snapshot: _Snapshot) -> None:
+        """Release a snapshot that has left its stack for good."""
+        if snapshot.resident:
+            snapshot.resident = False
+            self._store.release(snapshot.manifest)
 
-            stacks = self._stacks[oldest_path]
-            if oldest_stack == "undo":
-                stacks.undo.pop(0)
+    def _restore_bytes(self, snapshot: _Snapshot) -> bytes:
+        if snapshot.resident:
+            return self._store.materialize(snapshot.manifest)
+        return snapshot.journal.materialize(snapshot.manifest)
+
+    def _total_snapshot_bytes(self) -> int:
+        return self._store.total_bytes
+
+    def _evict_oldest(self) -> bool:
+        """Evict the oldest resident snapshot across all paths (lock held).
+
+        Journaled snapshots stay in their stack and are read back from the
+        journal; others are dropped. Returns False when nothing is left.
+        """
+        heap = self._eviction_heap
+        while heap:
+            seq, path, which = heapq.heappop(heap)
+            entry = self._resident.pop(seq, None)
+            if entry is None:
+                continue
+            snapshot = entry[2]
+            if snapshot.journal is not None:
+                self._discard(snapshot)
+                return True
+            stacks = self._stacks[path]
+            stack = stacks.undo if which == "undo" else stacks.redo
+            # Without a journal there are no non-resident snapshots, and the
+            # stacks are seq-ordered, so the oldest one is at the front.
+            if stack and stack[0] is snapshot:
+                stack.popleft()
             else:
-                stacks.redo.pop(0)
+                stack.remove(snapshot)
+            self._discard(snapshot)
             self._budget_evictions += 1
+            return True
+        return False
+
+    def _enforce_total_budget(self) -> None:
+        memory_limit = get_max_undo_bytes_total()
+        disk_limit = get_max_undo_disk_bytes()
+        while self._store.memory_bytes > memory_limit or self._store.disk_bytes > disk_limit:
+            if not self._evict_oldest():
+                break
+
+    def _rebalance(self) -> None:
+        """Spill cold segments to disk, then evict history while a tier is over budget."""
+        if get_max_undo_disk_bytes() > 0:
+            try:
+                self._store.spill(get_max_undo_bytes_total())
+            except OSError:
+                pass  # Disk tier unavailable: fall back to evicting history
+        with self._lock:
+            self._enforce_total_budget()
+
+    def _ensure_loaded(self, path: str) -> Optional[UndoJournal]:
+        """Attach path's journal on first use, replaying its history (path lock held)."""
+        if path in self._loaded_paths:
+            return self._journals.get(path)
+        journal = None
+        root = get_undo_journal_dir()
+        if root:
+            journal = UndoJournal(root, path, get_undo_journal_max_bytes())
+            try:
+                undo, redo = journal.load()
+            except OSError:
+                journal, undo, redo = None, [], []
+            with self._lock:
+                for which, manifests in (("undo", undo), ("redo", redo)):
+                    for manifest in manifests:
+                        snapshot = self._new_snapshot(manifest, journal, resident=False)
+                        self._push(path, which, snapshot)
+        with self._lock:
+            self._journals[path] = journal
+            self._loaded_paths.add(path)
+        return journal
+
+    def _journal_record(self, journal: Optional[UndoJournal], operations: List[Tuple]) -> Tuple[Optional[UndoJournal], int]:
+        """Append operations to the journal before the stacks change.
+
+        Returns the journal to attach to new snapshots (None if journaling is
+        off or just failed) and how many oldest undo entries the journal's
+        size cap dropped.
+        """
+        if journal is None or not journal.enabled:
+            return None, 0
+        try:
+            return journal, journal.record(operations)
+        except OSError:
+            return None, 0
+
+    def _drop_oldest_undo(self, stacks: _HistoryStacks, count: int) -> None:
+        for _ in range(min(count, len(stacks.undo))):
+            self._discard(self._pop(stacks.undo, newest=False))
+
+    def _read_segments(self, path: str):
+        try:
+            with open(path, "rb") as f:
+                return digest_segments(f.read())
+        except Exception:
+            return None
+
+    def _step(self, path: str, source: str) -> Optional[str]:
+        """Move one state from the source stack onto the file (path lock held).
+
+        The file's current state goes onto the opposite stack. Returns an
+        error message, or None on success.
+        """
+        target = "redo" if source == "undo" else "undo"
+        with self._lock:
+            stacks = self._stacks[path]
+            from_stack = stacks.undo if source == "undo" else stacks.redo
+            chosen = self._pop(from_stack)
+            trim = target == "undo" and len(stacks.undo) + 1 > self._max_depth
+
+        segments = self._read_segments(path)
+        try:
+            data = self._restore_bytes(chosen)
+            atomic_write_bytes(path, data, kind="undo")
+        except Exception as e:
+            with self._lock:
+                self._push(path, source, chosen)
+            return str(e)
+
+        operations: List[Tuple] = [("pop", source)]
+        if segments is not None:
+            operations.append(("push", target, segments))
+            if trim:
+                operations.append(("drop", "undo"))
+        journal, dropped = self._journal_record(self._journals.get(path), operations)
+
+        manifest = self._store.add_segments(segments) if segments is not None else None
+        with self._lock:
+            self._discard(chosen)
+            if manifest is not None:
+                self._push(path, target, self._new_snapshot(manifest, journal))
+                if len(stacks.undo) > self._max_depth:
+                    self._discard(self._pop(stacks.undo, newest=False))
+            self._drop_oldest_undo(stacks, dropped)
+        return None
 
     # ------------------------------------------------------------------
     # Public history operations (used by tools & tests)
     # ------------------------------------------------------------------
 
-    def snapshot(self, path: str) -> None:
+    def snapshot(self, path: str, data: Optional[bytes] = None) -> None:
         """Capture current file bytes before it gets modified.
 
         This should be called as *early* as possible, ideally right before
         a tool opens the document for editing.  New snapshots clear the redo
         stack (standard application behaviour).
+
+        Pass *data* when the caller has already read the file (see
+        utils.file_utils.preflight_write) to avoid reading it again.
         """
         normalized = str(Path(path).resolve())
-        if not os.path.isfile(normalized):
+        if data is None and not os.path.isfile(normalized):
             # Nothing to snapshot
             return
 
-        with self._lock:
-            stacks = self._get_stacks(normalized)
-            try:
-                with open(normalized, "rb") as f:
-                    data = f.read()
-            except Exception:
+        with self._path_lock(normalized):
+            journal = self._ensure_loaded(normalized)
+            segments = self._read_segments(normalized) if data is None else digest_segments(data)
+            if segments is None:
                 return  # Skip snapshot on read error
 
-            stacks.undo.append(self._new_snapshot(data))
-            if len(stacks.undo) > self._max_depth:
-                stacks.undo.pop(0)
-            stacks.redo.clear()
-            self._enforce_total_budget()
+            with self._lock:
+                stacks = self._get_stacks(normalized)
+                operations: List[Tuple] = [("push", "undo", segments)]
+                if len(stacks.undo) + 1 > self._max_depth:
+                    operations.append(("drop", "undo"))
+                if stacks.redo:
+                    operations.append(("clear", "redo"))
+            journal, dropped = self._journal_record(journal, operations)
+
+            manifest = self._store.add_segments(segments)
+            with self._lock:
+                self._push(normalized, "undo", self._new_snapshot(manifest, journal))
+                if len(stacks.undo) > self._max_depth:
+                    self._discard(self._pop(stacks.undo, newest=False))
+                while stacks.redo:
+                    self._discard(self._pop(stacks.redo))
+                self._drop_oldest_undo(stacks, dropped)
+            self._rebalance()
 
     def undo(self, path: str, steps: int = 1) -> str:
         """Restore *steps* previous states for *path*.
@@ -144,32 +356,25 @@ class UndoManager:
             return "Error: steps must be >= 1"
 
         normalized = str(Path(path).resolve())
-        with self._lock:
-            stacks = self._stacks.get(normalized)
-            if not stacks or not stacks.undo:
-                return f"No undo history for {normalized}"
+        with self._path_lock(normalized):
+            self._ensure_loaded(normalized)
+            with self._lock:
+                stacks = self._stacks.get(normalized)
+                if not stacks or not stacks.undo:
+                    return f"No undo history for {normalized}"
 
             requested = steps
             processed = 0
-            for _ in range(min(steps, len(stacks.undo))):
-                previous = stacks.undo.pop()
-                try:
-                    with open(normalized, "rb") as f:
-                        current_bytes = f.read()
-                    stacks.redo.append(self._new_snapshot(current_bytes))
-                except Exception:
-                    pass
-
-                try:
-                    with open(normalized, "wb") as f:
-                        f.write(previous.data)
-                except Exception as e:
-                    stacks.undo.append(previous)
-                    return f"Failed to restore snapshot: {e}"
-
+            for _ in range(steps):
+                with self._lock:
+                    if not stacks.undo:
+                        break
+                error = self._step(normalized, "undo")
+                if error is not None:
+                    return f"Failed to restore snapshot: {error}"
                 processed += 1
-                self._enforce_total_budget()
 
+            self._rebalance()
             return f"Undo successful (requested {requested}, restored {processed}) for {normalized}"
 
     def redo(self, path: str, steps: int = 1) -> str:
@@ -177,58 +382,81 @@ class UndoManager:
             return "Error: steps must be >= 1"
 
         normalized = str(Path(path).resolve())
-        with self._lock:
-            stacks = self._stacks.get(normalized)
-            if not stacks or not stacks.redo:
-                return f"No redo history for {normalized}"
+        with self._path_lock(normalized):
+            self._ensure_loaded(normalized)
+            with self._lock:
+                stacks = self._stacks.get(normalized)
+                if not stacks or not stacks.redo:
+                    return f"No redo history for {normalized}"
 
             requested = steps
             processed = 0
-            for _ in range(min(steps, len(stacks.redo))):
-                next_state = stacks.redo.pop()
-                try:
-                    with open(normalized, "rb") as f:
-                        current_bytes = f.read()
-                    stacks.undo.append(self._new_snapshot(current_bytes))
-                    if len(stacks.undo) > self._max_depth:
-                        stacks.undo.pop(0)
-                except Exception:
-                    pass
-
-                try:
-                    with open(normalized, "wb") as f:
-                        f.write(next_state.data)
-                except Exception as e:
-                    stacks.redo.append(next_state)
-                    return f"Failed to re-apply snapshot: {e}"
-
+            for _ in range(steps):
+                with self._lock:
+                    if not stacks.redo:
+                        break
+                error = self._step(normalized, "redo")
+                if error is not None:
+                    return f"Failed to re-apply snapshot: {error}"
                 processed += 1
-                self._enforce_total_budget()
 
+            self._rebalance()
             return f"Redo successful (requested {requested}, applied {processed}) for {normalized}"
 
     def list_history(self, path: str) -> str:
         normalized = str(Path(path).resolve())
+        with self._path_lock(normalized):
+            journal = self._ensure_loaded(normalized)
         with self._lock:
             stacks = self._stacks.get(normalized)
             undo_len = len(stacks.undo) if stacks else 0
             redo_len = len(stacks.redo) if stacks else 0
             total_bytes = self._total_snapshot_bytes()
+            memory_bytes = self._store.memory_bytes
+            disk_bytes = self._store.disk_bytes
             evictions = self._budget_evictions
-        suffix = f", total_snapshot_bytes={total_bytes}, budget_evictions={evictions}"
+        suffix = (
+            f", total_snapshot_bytes={total_bytes}, memory_bytes={memory_bytes}, "
+            f"disk_bytes={disk_bytes}, budget_evictions={evictions}"
+        )
+        if journal is not None and journal.enabled:
+            suffix += f", journal_bytes={journal.size}"
         if evictions > 0:
             suffix += f" [{UNDO_BUDGET_EXCEEDED}]"
         return f"History for {normalized}: undo={undo_len}, redo={redo_len}{suffix}"
 
     def clear_history(self, path: Optional[str] = None) -> str:
+        if path:
+            normalized = str(Path(path).resolve())
+            with self._path_lock(normalized):
+                with self._lock:
+                    stacks = self._stacks.pop(normalized, None)
+                    if stacks:
+                        for stack in (stacks.undo, stacks.redo):
+                            while stack:
+                                self._discard(self._pop(stack))
+                    journal = self._journals.pop(normalized, None)
+                    self._loaded_paths.discard(normalized)
+                if journal is not None:
+                    journal.delete()
+                elif get_undo_journal_dir():
+                    # Not used yet in this process: forget the on-disk history too.
+                    UndoJournal(get_undo_journal_dir(), normalized, 0).delete()
+            return f"Cleared history for {normalized}"
+
+        # Clear all
         with self._lock:
-            if path:
-                normalized = str(Path(path).resolve())
-                self._stacks.pop(normalized, None)
-                return f"Cleared history for {normalized}"
-            # Clear all
+            journals = [j for j in self._journals.values() if j is not None]
             self._stacks.clear()
-            return "Cleared history for all documents"
+            self._store.clear()
+            self._resident.clear()
+            self._eviction_heap.clear()
+            self._journals.clear()
+            self._loaded_paths.clear()
+            self._budget_evictions = 0
+        for journal in journals:
+            journal.delete()
+        return "Cleared history for all documents"
 
 
 # ----------------------------------------------------------------------
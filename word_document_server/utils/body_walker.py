@@ -0,0 +1,166 @@
+"""
+Document-order walk over ``w:body``.
+
+python-docx exposes body content as two unrelated lists, ``doc.paragraphs``
+and ``doc.tables``, so code that visits both loses the order in which they
+appear. ``doc.paragraphs`` also rebuilds its list on every access, which makes
+``doc.paragraphs[i]`` inside a loop quadratic, and ``row.cells`` returns a
+merged cell once for every grid column it spans.
+
+``BodyWalker`` reads the body XML once and records, in document order:
+
+* every paragraph, whether directly in the body or in a table cell at any
+  nesting depth, under a stable global index;
+* every table cell once: horizontally merged cells are not repeated and
+  vertically merged continuation cells are skipped. Cells of nested tables are
+  attributed to the enclosing top-level cell.
+
+Lookups by global index, by ``doc.paragraphs`` index or by element are O(1).
+The walk is a snapshot of the structure: build a new one after inserting or
+removing paragraphs or tables.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from docx.table import Table, _Cell
+from docx.text.paragraph import Paragraph
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_P = _W + "p"
+_TBL = _W + "tbl"
+_TR = _W + "tr"
+_TC = _W + "tc"
+_TCPR = _W + "tcPr"
+_GRID_SPAN = _W + "gridSpan"
+_V_MERGE = _W + "vMerge"
+_VAL = _W + "val"
+
+
+def cell_layout(tc) -> Tuple[int, bool]:
+    """(grid span, is a vertical-merge continuation) for a ``w:tc``."""
+    tc_pr = tc.find(_TCPR)
+    if tc_pr is None:
+        return 1, False
+    span_el = tc_pr.find(_GRID_SPAN)
+    try:
+        span = int(span_el.get(_VAL)) if span_el is not None else 1
+    except (TypeError, ValueError):
+        span = 1
+    merge_el = tc_pr.find(_V_MERGE)
+    continuation = merge_el is not None and merge_el.get(_VAL, "continue") == "continue"
+    return max(span, 1), continuation
+
+
+class WalkedCell:
+    """A table cell, visited once."""
+
+    __slots__ = ("index", "element", "location", "depth", "paragraphs")
+
+    def __init__(self, index: int, element, location: Tuple[int, int, int], depth: int) -> None:
+        self.index = index  # position among all cells, in document order
+        self.element = element  # the w:tc
+        self.location = location  # (table, row, column) of the top-level cell
+        self.depth = depth  # 0 for top-level tables
+        self.paragraphs: List[WalkedParagraph] = []  # direct children only
+
+
+class WalkedParagraph:
+    """A paragraph in the body or in a table cell."""
+
+    __slots__ = ("index", "element", "paragraph_index", "cell")
+
+    def __init__(self, index: int, element, paragraph_index: Optional[int], cell: Optional[WalkedCell]) -> None:
+        self.index = index  # global position, in document order
+        self.element = element  # the w:p
+        self.paragraph_index = paragraph_index  # index in doc.paragraphs, body paragraphs only
+        self.cell = cell
+
+
+class BodyWalker:
+    """Paragraphs and table cells of a python-docx ``Document`` in document order."""
+
+    def __init__(self, doc) -> None:
+        self._doc = doc
+        self.paragraphs: List[WalkedParagraph] = []
+        self.body_paragraphs: List[WalkedParagraph] = []
+        self.cells: List[WalkedCell] = []
+        self._blocks: List[Union[WalkedParagraph, WalkedCell]] = []
+        self._by_element: Dict[object, WalkedParagraph] = {}
+        self._table_count = 0
+        self._walk(doc.element.body, None)
+
+    def __len__(self) -> int:
+        return len(self.paragraphs)
+
+    def __getitem__(self, index: int) -> WalkedParagraph:
+        return self.paragraphs[index]
+
+    def _walk(self, container, cell: Optional[WalkedCell]) -> None:
+        for child in container:
+            tag = child.tag
+            if tag == _P:
+                body_index = len(self.body_paragraphs) if cell is None else None
+                item = WalkedParagraph(len(self.paragraphs), child, body_index, cell)
+                self.paragraphs.append(item)
+                self._by_element[child] = item
+                if cell is None:
+                    self.body_paragraphs.append(item)
+                    self._blocks.append(item)
+                else:
+                    cell.paragraphs.append(item)
+            elif tag == _TBL:
+                table_idx = self._table_count
+                if cell is None:
+                    self._table_count += 1
+                self._walk_table(child, table_idx, cell)
+
+    def _walk_table(self, tbl, table_idx: int, outer: Optional[WalkedCell]) -> None:
+        for row_idx, tr in enumerate(tr for tr in tbl if tr.tag == _TR):
+            column = 0
+            for tc in tr:
+                if tc.tag != _TC:
+                    continue
+                span, continuation = cell_layout(tc)
+                if not continuation:
+                    if outer is None:
+                        cell = WalkedCell(len(self.cells), tc, (table_idx, row_idx, column), 0)
+                    else:
+                        cell = WalkedCell(len(self.cells), tc, outer.location, outer.depth + 1)
+                    self.cells.append(cell)
+                    self._blocks.append(cell)
+                    self._walk(tc, cell)
+                column += span
+
+    def blocks(self) -> Iterator[Union[WalkedParagraph, WalkedCell]]:
+        """Body paragraphs and table cells, each once, in document order."""
+        return iter(self._blocks)
+
+    def find(self, element) -> Optional[WalkedParagraph]:
+        """The walked paragraph that is, or contains, ``element``."""
+        while element is not None:
+            item = self._by_element.get(element)
+            if item is not None:
+                return item
+            element = element.getparent()
+        return None
+
+    def paragraph(self, paragraph_index: int) -> Paragraph:
+        """``doc.paragraphs[paragraph_index]`` without rebuilding the list."""
+        return self.proxy(self.body_paragraphs[paragraph_index])
+
+    def proxy(self, item: WalkedParagraph) -> Paragraph:
+        """python-docx ``Paragraph`` for a walked paragraph."""
+        if item.cell is None:
+            return Paragraph(item.element, self._doc._body)
+        return Paragraph(item.element, self._cell_proxy(item.cell))
+
+    def cell_paragraphs(self, cell: WalkedCell) -> List[Paragraph]:
+        """python-docx ``Paragraph`` objects for a cell, as ``cell.paragraphs``."""
+        parent = self._cell_proxy(cell)
+        return [Paragraph(item.element, parent) for item in cell.paragraphs]
+
+    def _cell_proxy(self, cell: WalkedCell) -> _Cell:
+        tbl = cell.element.getparent().getparent()
+        return _Cell(cell.element, Table(tbl, self._doc._body))
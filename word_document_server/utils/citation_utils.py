@@ -11,6 +11,8 @@ from docx.text.paragraph import Paragraph
 from docx.text.run import Run
 from docx.oxml.ns import qn
 from lxml import etree
+
+from word_document_server.utils.body_walker import BodyWalker
 import re
 import json
 
@@ -324,16 +326,23 @@ def extract_all_citations_from_document(doc: Document) -> Dict[str, Any]:
         'citation_summary': {}
     }
     
-    for para_idx, paragraph in enumerate(doc.paragraphs):
+    # Body paragraphs and table cells in document order; cell paragraphs have
+    # no paragraph_index and are identified by their table location instead.
+    walker = BodyWalker(doc)
+    for item in walker.paragraphs:
+        paragraph = walker.proxy(item)
         citations = extract_citations_from_paragraph(paragraph)
         
         if citations:
             para_info = {
-                'paragraph_index': para_idx,
+                'paragraph_index': item.paragraph_index,
                 'paragraph_text': paragraph.text,
                 'citations': citations,
                 'citation_count': len(citations)
             }
+            if item.cell is not None:
+                table_idx, row_idx, col_idx = item.cell.location
+                para_info['location'] = f"Table {table_idx}, Row {row_idx}, Column {col_idx}"
             
             result['citations_by_paragraph'].append(para_info)
             result['total_citations'] += len(citations)
@@ -0,0 +1,102 @@
+"""
+Opaque continuation cursors for paged tool output.
+
+``get_text`` and ``get_sections`` can return a large listing one page at a
+time. Each page carries a ``next_cursor``; passing it back returns the next
+page, starting right where the previous one ended, so earlier pages are
+never built or serialised again.
+
+A cursor records the listing it continues (the tool and the arguments that
+shape its results), the document state it was issued for, and the position
+of the next page. It is URL-safe base64 of compact JSON; clients pass it
+back unchanged. The document state is the file's size and modification time
+plus the in-memory content version (``utils.paragraph_index``), so once the
+document is edited, saved over or re-parsed its cursors are refused and the
+client starts again instead of mixing pages of two versions.
+
+Pages hold at most ``page_size`` items and stay within the output budget
+(EW_MAX_SEARCH_OUTPUT_CHARS); items that do not fit are left for the next
+page rather than dropped.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+import os
+from typing import Any, Iterable, List, Optional, Tuple
+
+from word_document_server.utils.paragraph_index import get_document_versions
+
+# Items per page when a cursor is passed without page_size.
+DEFAULT_PAGE_SIZE = 100
+
+# Room left for the fields around a page's items.
+_ENVELOPE_CHARS = 512
+
+
+def document_stamp(file_path: str) -> str:
+    """Identify the current state of file_path's document."""
+    from word_document_server.utils.session_utils import get_loaded_document
+
+    stat = os.stat(file_path)
+    doc = get_loaded_document(file_path)
+    version = get_document_versions().version(doc) if doc is not None else 0
+    return f"{stat.st_mtime_ns:x}.{stat.st_size:x}.{version}"
+
+
+def listing_key(tool: str, **arguments: Any) -> str:
+    """Name one listing: a tool plus the arguments that shape its results."""
+    digest = hashlib.blake2b(
+        json.dumps(arguments, sort_keys=True, default=str).encode(), digest_size=8
+    ).hexdigest()
+    return f"{tool}:{digest}"
+
+
+def encode_cursor(listing: str, stamp: str, position: Any) -> str:
+    raw = json.dumps([listing, stamp, position], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, listing: str, stamp: str) -> Tuple[Any, str]:
+    """The position stored in cursor, as (position, error)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_listing, cursor_stamp, position = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        return None, "Invalid cursor: pass back a next_cursor value unchanged"
+    if cursor_listing != listing:
+        return None, "Invalid cursor: it was issued for different arguments; repeat the original call's arguments"
+    if cursor_stamp != stamp:
+        return None, "Stale cursor: the document changed after the first page was read. Start again without a cursor."
+    return position, ""
+
+
+def _json_size(item: Any) -> int:
+    # Items are nested two levels deep in an indent=2 payload.
+    text = json.dumps(item, indent=2)
+    return len(text) + 4 * text.count("\n") + 6
+
+
+def fill_page(entries: Iterable[Tuple[Any, Any]], page_size: int, max_chars: int) -> Tuple[List[Any], Optional[Any]]:
+    """
+    Collect one page from (item, position after item) entries.
+
+    Returns the items and the position the next page starts at, or None
+    when the entries are exhausted. A page holds at least one item, even
+    one larger than max_chars.
+    """
+    budget = max(max_chars - _ENVELOPE_CHARS, max_chars // 2)
+    items: List[Any] = []
+    used = 0
+    resume = None
+    for item, after in entries:
+        size = _json_size(item)
+        if items and (len(items) >= page_size or used + size > budget):
+            return items, resume
+        items.append(item)
+        used += size
+        resume = after
+    return items, None
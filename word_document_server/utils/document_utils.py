@@ -3,7 +3,6 @@ Document utility functions for Word Document Server.
 """
 import json
 from typing import Dict, List, Any
-from docx import Document
 
 
 def get_document_properties(doc_path: str) -> Dict[str, Any]:
@@ -13,7 +12,8 @@ def get_document_properties(doc_path: str) -> Dict[str, Any]:
         return {"error": f"Document {doc_path} does not exist"}
     
     try:
-        doc = Document(doc_path)
+        from word_document_server.utils.session_utils import load_document
+        doc = load_document(doc_path)
         core_props = doc.core_properties
         
         return {
@@ -43,19 +43,10 @@ def extract_document_text(doc_path: str) -> str:
         return f"Document {doc_path} does not exist"
     
     try:
-        doc = Document(doc_path)
-        text = []
-        
-        for paragraph in doc.paragraphs:
-            text.append(paragraph.text)
-            
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        text.append(paragraph.text)
-        
-        return "\n".join(text)
+        from word_document_server.utils.text_stream import iter_paragraph_texts
+
+        # Streamed in document order; table cells follow the paragraphs around them.
+        return "\n".join(iter_paragraph_texts(doc_path))
     except Exception as e:
         return f"Failed to extract text: {str(e)}"
 
@@ -67,7 +58,8 @@ def get_document_structure(doc_path: str) -> Dict[str, Any]:
         return {"error": f"Document {doc_path} does not exist"}
     
     try:
-        doc = Document(doc_path)
+        from word_document_server.utils.session_utils import load_document
+        doc = load_document(doc_path)
         structure = {
             "paragraphs": [],
             "tables": []
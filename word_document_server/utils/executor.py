@@ -0,0 +1,155 @@
+"""
+Bounded executors for keeping blocking document work off the asyncio loop.
+
+python-docx parsing/saving, zip I/O and external converters are synchronous.
+MCP tool entry points are wrapped with ``offload_tool`` so each call runs on a
+shared thread pool (EW_IO_WORKERS) instead of the server's event loop. Each
+call holds its document's reader/writer lock: read-only tools on one document
+run together, mutating tools run alone, and different documents never
+contend.
+
+``get_cpu_executor`` provides a lazily created process pool (EW_CPU_WORKERS)
+for CPU-bound work with picklable inputs and outputs, such as the sharded
+regex scans in ``utils.regex_runtime``; python-docx Documents themselves
+cannot cross process boundaries.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import inspect
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from word_document_server.utils.limits import get_cpu_workers, get_io_workers
+from word_document_server.utils.locks import get_path_lock
+
+_executor_lock = threading.Lock()
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+
+# Tools that never modify (or flush) their target document and may therefore
+# share it with other readers.
+READ_ONLY_TOOLS = frozenset({
+    "get_text",
+    "get_sections",
+    "manage_comments",
+    "extract_track_changes",
+    "generate_review_summary",
+    "verify_document",
+    "citations",
+    "document_utility",
+    "get_document_info",
+    "get_document_outline",
+    "list_citations",
+    "get_citation_at_position",
+    "copy_existing_citation",
+    "analyze_citation_distribution",
+})
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool used for blocking tool calls."""
+    global _io_executor
+    with _executor_lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(
+                max_workers=get_io_workers(), thread_name_prefix="ew-io"
+            )
+        return _io_executor
+
+
+def get_cpu_executor() -> Optional[Executor]:
+    """Return the shared process pool, or None when EW_CPU_WORKERS=0."""
+    global _cpu_executor
+    workers = get_cpu_workers()
+    if workers <= 0:
+        return None
+    with _executor_lock:
+        if _cpu_executor is None:
+            # "spawn" avoids forking a process that already runs worker threads.
+            _cpu_executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _cpu_executor
+
+
+async def run_io(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking callable on the I/O pool, preserving context variables."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(get_io_executor(), call)
+
+
+def _document_key(kwargs: Dict[str, Any]) -> Optional[str]:
+    """Map a tool call's document_id/filename arguments to a resolved path."""
+    document_id = kwargs.get("document_id")
+    if document_id:
+        from word_document_server.session_manager import get_session_manager
+
+        path = get_session_manager().get_document_path(document_id)
+        if path:
+            return str(Path(path).resolve())
+    for name in ("filename", "target_filename", "source_filename"):
+        value = kwargs.get(name)
+        if isinstance(value, str) and value.strip():
+            from word_document_server.utils.file_utils import ensure_docx_extension
+
+            return str(Path(ensure_docx_extension(value.strip())).resolve())
+    return None
+
+
+def _invoke(fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+    result = fn(*args, **kwargs)
+    if inspect.iscoroutine(result):
+        # Async tools are blocking code with awaits on other tools; give them a
+        # private loop on this worker thread.
+        result = asyncio.run(result)
+    return result
+
+
+def _call_tool(fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+    key = _document_key(kwargs)
+    if key is None:
+        return _invoke(fn, args, kwargs)
+    lock = get_path_lock(key)
+    guard = lock.read_locked() if fn.__name__ in READ_ONLY_TOOLS else lock.write_locked()
+    with guard:
+        return _invoke(fn, args, kwargs)
+
+
+def offload_tool(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap a tool (sync or async) so it executes on the I/O thread pool.
+
+    The wrapper keeps fn's name, docstring and signature (via __wrapped__), so
+    MCP schema generation is unchanged.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await run_io(_call_tool, fn, args, kwargs)
+
+    return wrapper
+
+
+def shutdown_executors() -> None:
+    """Stop the shared pools (registered to run at interpreter exit)."""
+    global _io_executor, _cpu_executor
+    with _executor_lock:
+        if _cpu_executor is not None:
+            _cpu_executor.shutdown(wait=False, cancel_futures=True)
+            _cpu_executor = None
+        if _io_executor is not None:
+            _io_executor.shutdown(wait=True)
+            _io_executor = None
+
+
+atexit.register(shutdown_executors)
@@ -2,7 +2,6 @@
 Extended document utilities for Word Document Server.
 """
 from typing import Dict, List, Any, Tuple
-from docx import Document
 
 
 def get_paragraph_text(doc_path: str, paragraph_index: int) -> Dict[str, Any]:
@@ -21,19 +20,21 @@ def get_paragraph_text(doc_path: str, paragraph_index: int) -> Dict[str, Any]:
         return {"error": f"Document {doc_path} does not exist"}
     
     try:
-        doc = Document(doc_path)
+        from word_document_server.utils.paragraph_index import get_paragraph_index
+        from word_document_server.utils.session_utils import load_document
+        doc = load_document(doc_path)
+        index = get_paragraph_index(doc)
         
         # Check if paragraph index is valid
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return {"error": f"Invalid paragraph index: {paragraph_index}. Document has {len(doc.paragraphs)} paragraphs."}
-        
-        paragraph = doc.paragraphs[paragraph_index]
+        if paragraph_index < 0 or paragraph_index >= len(index):
+            return {"error": f"Invalid paragraph index: {paragraph_index}. Document has {len(index)} paragraphs."}
         
+        style_name = index.style_name(paragraph_index)
         return {
             "index": paragraph_index,
-            "text": paragraph.text,
-            "style": paragraph.style.name if paragraph.style else "Normal",
-            "is_heading": paragraph.style.name.startswith("Heading") if paragraph.style else False
+            "text": index.text(paragraph_index),
+            "style": style_name or "Normal",
+            "is_heading": bool(style_name) and style_name.startswith("Heading")
         }
     except Exception as e:
         return {"error": f"Failed to get paragraph text: {str(e)}"}
@@ -60,7 +61,9 @@ def find_text(doc_path: str, text_to_find: str, match_case: bool = True, whole_w
         return {"error": "Search text cannot be empty"}
     
     try:
-        doc = Document(doc_path)
+        from word_document_server.utils.search_index import get_search_index, match_positions
+        from word_document_server.utils.text_stream import iter_paragraphs
+
         results = {
             "query": text_to_find,
             "match_case": match_case,
@@ -68,97 +71,33 @@ def find_text(doc_path: str, text_to_find: str, match_case: bool = True, whole_w
             "occurrences": [],
             "total_count": 0
         }
-        
-        # Search in paragraphs
-        for i, para in enumerate(doc.paragraphs):
-            # Prepare text for comparison
-            para_text = para.text
-            search_text = text_to_find
-            
-            if not match_case:
-                para_text = para_text.lower()
-                search_text = search_text.lower()
-            
-            # Find all occurrences (simple implementation)
-            start_pos = 0
-            while True:
-                if whole_word:
-                    # For whole word search, we need to check word boundaries
-                    words = para_text.split()
-                    found = False
-                    for word_idx, word in enumerate(words):
-                        if (word == search_text or 
-                            (not match_case and word.lower() == search_text.lower())):
-                            results["occurrences"].append({
-                                "paragraph_index": i,
-                                "position": word_idx,
-                                "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                            })
-                            results["total_count"] += 1
-                            found = True
-                    
-                    # Break after checking all words
-                    break
-                else:
-                    # For substring search
-                    pos = para_text.find(search_text, start_pos)
-                    if pos == -1:
-                        break
-                    
-                    results["occurrences"].append({
-                        "paragraph_index": i,
-                        "position": pos,
-                        "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                    })
-                    results["total_count"] += 1
-                    start_pos = pos + len(search_text)
-        
-        # Search in tables
-        for table_idx, table in enumerate(doc.tables):
-            for row_idx, row in enumerate(table.rows):
-                for col_idx, cell in enumerate(row.cells):
-                    for para_idx, para in enumerate(cell.paragraphs):
-                        # Prepare text for comparison
-                        para_text = para.text
-                        search_text = text_to_find
-                        
-                        if not match_case:
-                            para_text = para_text.lower()
-                            search_text = search_text.lower()
-                        
-                        # Find all occurrences (simple implementation)
-                        start_pos = 0
-                        while True:
-                            if whole_word:
-                                # For whole word search, check word boundaries
-                                words = para_text.split()
-                                found = False
-                                for word_idx, word in enumerate(words):
-                                    if (word == search_text or 
-                                        (not match_case and word.lower() == search_text.lower())):
-                                        results["occurrences"].append({
-                                            "location": f"Table {table_idx}, Row {row_idx}, Column {col_idx}",
-                                            "position": word_idx,
-                                            "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                                        })
-                                        results["total_count"] += 1
-                                        found = True
-                                
-                                # Break after checking all words
-                                break
-                            else:
-                                # For substring search
-                                pos = para_text.find(search_text, start_pos)
-                                if pos == -1:
-                                    break
-                                
-                                results["occurrences"].append({
-                                    "location": f"Table {table_idx}, Row {row_idx}, Column {col_idx}",
-                                    "position": pos,
-                                    "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                                })
-                                results["total_count"] += 1
-                                start_pos = pos + len(search_text)
+
+        index = get_search_index(doc_path)
+        if index is not None:
+            # Paragraphs and table cells in document order, looked up in the
+            # document's search index
+            paragraphs = index.paragraphs
+            matches = index.find(text_to_find, match_case, whole_word)
+        else:
+            # Indexing disabled: stream and scan every paragraph
+            paragraphs = []
+            matches = []
+            for paragraph in iter_paragraphs(doc_path):
+                positions = match_positions(paragraph.text, text_to_find, match_case, whole_word)
+                if positions:
+                    matches.extend((len(paragraphs), position) for position in positions)
+                    paragraphs.append(paragraph)
+
+        for pid, position in matches:
+            paragraph = paragraphs[pid]
+            if paragraph.cell is None:
+                location = {"paragraph_index": paragraph.paragraph_index}
+            else:
+                table_idx, row_idx, col_idx = paragraph.cell
+                location = {"location": f"Table {table_idx}, Row {row_idx}, Column {col_idx}"}
+            context = paragraph.text[:100] + ("..." if len(paragraph.text) > 100 else "")
+            results["occurrences"].append({**location, "position": position, "context": context})
+            results["total_count"] += 1
         
         return results
     except Exception as e:
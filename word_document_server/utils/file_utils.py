@@ -1,23 +1,56 @@
 """
 File utility functions for Word Document Server.
 """
+import io
 import os
-from typing import Tuple, Optional, List
+import time
+from typing import BinaryIO, Callable, Tuple, Optional, List
 import shutil
 
 
-def check_file_writeable(filepath: str) -> Tuple[bool, str]:
+def check_file_writeable(filepath: str, snapshot: bool = True) -> Tuple[bool, str]:
     """
     Check if a file can be written to, with special handling for Word documents.
     
     Args:
         filepath: Path to the file
+        snapshot: Capture an undo snapshot once the checks pass
         
     Returns:
         Tuple of (is_writeable, error_message)
     """
+    is_writeable, error_message, _ = preflight_write(filepath, snapshot=snapshot, keep_data=False)
+    return is_writeable, error_message
+
+
+def preflight_write(
+    filepath: str, snapshot: bool = True, keep_data: bool = True
+) -> Tuple[bool, str, Optional[bytes]]:
+    """
+    Run every pre-write check on a document with a single read of the file.
+
+    The file is opened once; the exclusive-lock probe, the undo snapshot and
+    the caller's parse (``load_document(..., data=...)``) all use that one
+    handle and its bytes.
+
+    Args:
+        filepath: Path to the file
+        snapshot: Capture an undo snapshot once the checks pass
+        keep_data: Read the bytes for the caller even when no snapshot is taken
+
+    Returns:
+        Tuple of (is_writeable, error_message, data). data holds the file
+        bytes (for a session document with unsaved edits, its serialised
+        in-memory state), or None when the file does not exist, is served
+        from a batch transaction, was not requested, or the checks failed.
+    """
     import platform
-    import tempfile
+
+    # Inside batch_edit the whole batch was checked (and will be snapshotted) once.
+    from word_document_server.utils.session_utils import get_batch_transaction
+
+    if get_batch_transaction(filepath) is not None:
+        return True, "", None
     
     # If file doesn't exist, check if directory is writeable
     if not os.path.exists(filepath):
@@ -26,17 +59,19 @@ def check_file_writeable(filepath: str) -> Tuple[bool, str]:
         if directory == '':
             directory = '.'
         if not os.path.exists(directory):
-            return False, f"Directory {directory} does not exist"
+            return False, f"Directory {directory} does not exist", None
         if not os.access(directory, os.W_OK):
-            return False, f"Directory {directory} is not writeable"
-        return True, ""
+            return False, f"Directory {directory} is not writeable", None
+        return True, "", None
     
     # Check basic file permissions
     if not os.access(filepath, os.W_OK):
-        return False, f"File {filepath} is not writeable (permission denied)"
+        return False, f"File {filepath} is not writeable (permission denied)", None
     
+    is_word_file = filepath.lower().endswith(('.docx', '.doc'))
+
     # Check for Word-specific lock files
-    if filepath.lower().endswith(('.docx', '.doc')):
+    if is_word_file:
         directory = os.path.dirname(filepath)
         filename = os.path.basename(filepath)
         
@@ -50,74 +85,201 @@ def check_file_writeable(filepath: str) -> Tuple[bool, str]:
         for lock_pattern in word_lock_patterns:
             lock_file = os.path.join(directory, lock_pattern)
             if os.path.exists(lock_file):
-                return False, f"Document appears to be open in Word (lock file: {lock_pattern})"
-    
-    # Try to open the file for writing with exclusive access
+                return False, f"Document appears to be open in Word (lock file: {lock_pattern})", None
+
+    from word_document_server.session_manager import get_session_manager
+
+    # A session document with unsaved edits is newer than the file: snapshot
+    # its in-memory state instead, so every edit stays its own undo step.
+    pending = get_session_manager().pending_data(filepath) if snapshot or keep_data else None
+    wanted = (snapshot or keep_data) and pending is None
+
     try:
-        # Create a temporary backup to test exclusive access
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_path = temp_file.name
-        
-        # Try to copy the file to temp location (tests read access)
-        try:
-            import shutil
-            shutil.copy2(filepath, temp_path)
-        except Exception as e:
-            os.unlink(temp_path) if os.path.exists(temp_path) else None
-            return False, f"Cannot read file {filepath}: {str(e)}"
-        
-        # Try to open original file for writing (tests write access and locks)
+        f = open(filepath, 'r+b')
+    except Exception as e:
+        return False, f"Cannot read file {filepath}: {str(e)}", None
+
+    with f:
+        # Take an exclusive lock on the open handle (tests write access and
+        # foreign locks), then read the bytes through the same handle.
         try:
-            # Use different approach based on platform
             if platform.system() == "Windows":
-                # On Windows, try to open with exclusive access
                 import msvcrt
                 try:
-                    with open(filepath, 'r+b') as f:
-                        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
-                        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
                 except (OSError, IOError):
-                    os.unlink(temp_path) if os.path.exists(temp_path) else None
-                    return False, f"File {filepath} is locked (likely open in Word)"
+                    return False, f"File {filepath} is locked (likely open in Word)", None
+                data = f.read() if wanted else None
             else:
-                # On Unix-like systems, try to get an exclusive lock
                 import fcntl
                 try:
-                    with open(filepath, 'r+b') as f:
-                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
                 except (OSError, IOError):
-                    os.unlink(temp_path) if os.path.exists(temp_path) else None
-                    return False, f"File {filepath} is locked (likely open in Word)"
-        
+                    return False, f"File {filepath} is locked (likely open in Word)", None
+                try:
+                    data = f.read() if wanted else None
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
         except Exception as e:
-            os.unlink(temp_path) if os.path.exists(temp_path) else None
-            return False, f"File {filepath} is not writeable: {str(e)}"
-        
-        # Clean up temp file
-        os.unlink(temp_path) if os.path.exists(temp_path) else None
-
-        # --------------------------------------------------------------
-        # Capture undo snapshot *after* we have verified the file can be
-        # written to but *before* the caller mutates the document.  This
-        # guarantees that every successful modification path has a
-        # corresponding restore point.
-        # --------------------------------------------------------------
+            return False, f"Cannot read file {filepath}: {str(e)}", None
+    if pending is not None:
+        data = pending
+
+    # ------------------------------------------------------------------
+    # Capture undo snapshot *after* we have verified the file can be
+    # written to but *before* the caller mutates the document.  This
+    # guarantees that every successful modification path has a
+    # corresponding restore point.
+    # ------------------------------------------------------------------
+    if snapshot and is_word_file and data is not None:
         try:
             from word_document_server.undo_manager import get_undo_manager
 
-            if filepath.lower().endswith((".docx", ".doc")) and os.path.isfile(filepath):
-                undo_mgr = get_undo_manager()
-                undo_mgr.snapshot(filepath)
+            get_undo_manager().snapshot(filepath, data=data)
         except Exception:
             # We never want undo bookkeeping to block the actual operation.
             pass
 
-        return True, ""
-        
-    except Exception as e:
-        return False, f"Error checking file permissions: {str(e)}"
+    return True, "", data
+
+
+def get_file_signature(filepath: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Return a cheap change-detection signature for a file.
+
+    Args:
+        filepath: Path to the file
+
+    Returns:
+        Tuple of (mtime_ns, size, inode), or None if the file cannot be stat'ed
+    """
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _create_sibling_temp(filepath: str) -> Tuple[int, str]:
+    """Create an empty temp file next to filepath; return (fd, path)."""
+    import secrets
+
+    directory = os.path.dirname(os.path.abspath(filepath))
+    prefix = f".{os.path.basename(filepath)}."
+    while True:
+        temp_path = os.path.join(directory, f"{prefix}{secrets.token_hex(6)}.tmp")
+        try:
+            # 0o666 lets the umask decide the mode of files that are new.
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+            return fd, temp_path
+        except FileExistsError:
+            continue
+
+
+def _fsync_directory(directory: str) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows, where directories cannot be opened
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(filepath: str, write: Callable[[BinaryIO], None], kind: str = "save") -> int:
+    """
+    Replace filepath with the output of write() without ever exposing a
+    partial file.
+
+    write() fills a temporary file in the same directory, which is fsync'ed
+    according to EW_SAVE_DURABILITY and renamed over the destination. An
+    existing destination keeps its file mode. Latency and size are reported
+    to utils.instrumentation under kind.
+
+    Args:
+        filepath: Destination path
+        write: Callable that writes the new contents to a binary file object
+        kind: Instrumentation category
+
+    Returns:
+        Number of bytes written
+    """
+    from word_document_server.utils.instrumentation import get_write_stats
+    from word_document_server.utils.limits import get_save_durability
+
+    durability = get_save_durability()
+    started = time.perf_counter()
+    fd, temp_path = _create_sibling_temp(filepath)
+    fsyncs = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            nbytes = f.tell()
+            if durability != "none":
+                os.fsync(f.fileno())
+                fsyncs += 1
+        try:
+            os.chmod(temp_path, os.stat(filepath).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    if durability == "full":
+        # Make the rename itself survive a power loss.
+        _fsync_directory(os.path.dirname(os.path.abspath(filepath)))
+        fsyncs += 1
+    get_write_stats().record(kind, time.perf_counter() - started, nbytes, fsyncs)
+    return nbytes
+
+
+def atomic_write_bytes(filepath: str, data: bytes, kind: str = "save") -> int:
+    """Atomically replace filepath with data (see atomic_write)."""
+    return atomic_write(filepath, lambda f: f.write(data), kind)
+
+
+def atomic_save_document(doc, filepath: str) -> int:
+    """
+    Save a python-docx Document without ever exposing a partial file.
+
+    The document is written through atomic_write. Parts that did not change
+    are copied from the current file without being recompressed (see
+    utils.package_writer).
+
+    Args:
+        doc: python-docx Document object
+        filepath: Destination path
+
+    Returns:
+        Number of bytes written
+    """
+    from word_document_server.utils.package_writer import write_package
+
+    return atomic_write(filepath, lambda f: write_package(doc, f, source=filepath))
+
+
+def atomic_save_document_data(doc, filepath: str) -> bytes:
+    """
+    Like atomic_save_document, but serialise the package in memory first.
+
+    Returns:
+        The bytes written, so callers can cache or hash them without reading
+        the file back
+    """
+    from word_document_server.utils.package_writer import write_package
 
+    buffer = io.BytesIO()
+    write_package(doc, buffer, source=filepath)
+    data = buffer.getvalue()
+    atomic_write_bytes(filepath, data)
+    return data
 
 
 def create_document_copy(source_path: str, dest_path: Optional[str] = None) -> Tuple[bool, str, Optional[str]]:
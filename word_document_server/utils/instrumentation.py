@@ -0,0 +1,54 @@
+"""
+Process-wide counters for document writes.
+
+Every atomic write (see utils.file_utils.atomic_write) reports its kind
+(``save`` for document saves and session flushes, ``undo`` for undo/redo
+restores, ``protection`` for encryption rewrites), the bytes written and the
+wall time from opening the temporary file to the final rename, including any
+fsync. ``stats`` returns totals per kind so slow volumes or an expensive
+durability setting show up without external tooling.
+"""
+
+from __future__ import annotations
+
+from threading import Lock
+from typing import Dict
+
+
+class WriteStats:
+    """Thread-safe per-kind totals of write count, bytes and latency."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._totals: Dict[str, Dict[str, float]] = {}
+
+    def record(self, kind: str, seconds: float, nbytes: int, fsyncs: int = 0) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(
+                kind, {"writes": 0, "bytes": 0, "seconds": 0.0, "max_seconds": 0.0, "fsyncs": 0}
+            )
+            totals["writes"] += 1
+            totals["bytes"] += nbytes
+            totals["seconds"] += seconds
+            totals["max_seconds"] = max(totals["max_seconds"], seconds)
+            totals["fsyncs"] += fsyncs
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {kind: dict(totals) for kind, totals in self._totals.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+
+# ----------------------------------------------------------------------
+# Global accessor
+# ----------------------------------------------------------------------
+
+_write_stats = WriteStats()
+
+
+def get_write_stats() -> WriteStats:
+    """Return the global singleton WriteStats."""
+    return _write_stats
@@ -11,6 +11,7 @@ from typing import Tuple
 # Shared error taxonomy tags for deterministic client handling.
 LIMIT_EXCEEDED = "LIMIT_EXCEEDED"
 REGEX_COMPLEXITY_BLOCKED = "REGEX_COMPLEXITY_BLOCKED"
+REGEX_TIMEOUT = "REGEX_TIMEOUT"
 DOC_TOO_LARGE = "DOC_TOO_LARGE"
 UNDO_BUDGET_EXCEEDED = "UNDO_BUDGET_EXCEEDED"
 SESSION_CONSISTENCY_WARNING = "SESSION_CONSISTENCY_WARNING"
@@ -52,6 +53,58 @@ def get_max_undo_bytes_total() -> int:
     return env_int("EW_MAX_UNDO_BYTES_TOTAL", 200_000_000, minimum=1_024)
 
 
+def get_max_undo_disk_bytes() -> int:
+    return env_int("EW_MAX_UNDO_DISK_BYTES", 1_000_000_000, minimum=0)
+
+
+def get_undo_spill_dir() -> str:
+    return os.getenv("EW_UNDO_SPILL_DIR", "").strip()
+
+
+def get_undo_journal_dir() -> str:
+    return os.getenv("EW_UNDO_JOURNAL_DIR", "").strip()
+
+
+def get_undo_journal_max_bytes() -> int:
+    return env_int("EW_UNDO_JOURNAL_MAX_BYTES", 500_000_000, minimum=1_024)
+
+
+def get_docx_compression_level() -> int:
+    return min(env_int("EW_DOCX_COMPRESSION_LEVEL", 6, minimum=0), 9)
+
+
+def get_save_durability() -> str:
+    """How hard saves push data to stable storage: "none", "file" or "full"."""
+    value = os.getenv("EW_SAVE_DURABILITY", "file").strip().lower()
+    return value if value in ("none", "file", "full") else "file"
+
+
+def get_max_batch_operations() -> int:
+    return env_int("EW_MAX_BATCH_OPERATIONS", 500, minimum=1)
+
+
+def get_io_workers() -> int:
+    return env_int("EW_IO_WORKERS", min(32, (os.cpu_count() or 1) + 4), minimum=1)
+
+
+def get_cpu_workers() -> int:
+    return env_int("EW_CPU_WORKERS", os.cpu_count() or 1, minimum=0)
+
+
+def get_parallel_scan_min_chars() -> int:
+    """Smallest regex scan (in text characters) sharded across the process pool."""
+    return env_int("EW_PARALLEL_SCAN_MIN_CHARS", 250_000, minimum=1)
+
+
+def get_parse_cache_bytes() -> int:
+    return env_int("EW_PARSE_CACHE_BYTES", 256_000_000, minimum=0)
+
+
+def get_search_index_max_chars() -> int:
+    """Largest document (in text characters) given a search index; 0 disables it."""
+    return env_int("EW_SEARCH_INDEX_MAX_CHARS", 5_000_000, minimum=0)
+
+
 def get_regex_timeout_ms() -> int:
     return env_int("EW_REGEX_TIMEOUT_MS", 0, minimum=0)
 
@@ -60,8 +113,16 @@ def get_long_session_op_limit() -> int:
     return env_int("EW_LONG_SESSION_OP_LIMIT", 2000, minimum=1)
 
 
+def get_session_flush_ops() -> int:
+    return env_int("EW_SESSION_FLUSH_OPS", 1, minimum=0)
+
+
+def get_session_flush_idle_ms() -> int:
+    return env_int("EW_SESSION_FLUSH_IDLE_MS", 0, minimum=0)
+
+
 def is_regex_timeout_supported() -> bool:
-    """Report whether runtime regex timeout handling is available."""
+    """Report whether the ``regex`` module (native match timeouts) is installed."""
     try:
         import regex  # noqa: F401
     except Exception:
@@ -0,0 +1,108 @@
+"""
+Per-document reader/writer locks.
+
+Read-only tools on one document may run together; a mutating tool gets the
+document to itself. Locks are keyed by resolved path, so calls on different
+documents never contend.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+
+class ReadWriteLock:
+    """Writer-preferring reader/writer lock.
+
+    Writers are reentrant (a thread holding the write lock may take it again,
+    or take the read lock); readers waiting behind a queued writer block so a
+    stream of reads cannot starve writes.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None  # ident of the owning thread
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._release_write_locked()
+                return
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def _release_write_locked(self) -> None:
+        self._writer_depth -= 1
+        if not self._writer_depth:
+            self._writer = None
+            self._cond.notify_all()
+
+    def release_write(self) -> None:
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("release_write() called by a thread that does not hold the lock")
+            self._release_write_locked()
+
+    @contextmanager
+    def read_locked(self) -> Iterator[None]:
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self) -> Iterator[None]:
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+_registry_lock = threading.Lock()
+_path_locks: Dict[str, ReadWriteLock] = {}
+
+
+def get_path_lock(path: str) -> ReadWriteLock:
+    """Return the reader/writer lock guarding the document at path."""
+    key = str(Path(path).resolve())
+    with _registry_lock:
+        lock = _path_locks.get(key)
+        if lock is None:
+            lock = ReadWriteLock()
+            _path_locks[key] = lock
+        return lock
@@ -0,0 +1,216 @@
+"""
+.docx package writer that passes unchanged zip entries through untouched.
+
+python-docx's ``Document.save`` recompresses every part on every save, so a
+one-word edit to a manuscript full of figures pays for deflating all of its
+images again. ``write_package`` writes the same package, but each part whose
+content is unchanged from the corresponding entry of the source archive (same
+name, CRC-32 and size) is copied as the raw compressed bytes from that
+archive; only parts that changed are compressed, at EW_DOCX_COMPRESSION_LEVEL.
+
+The source is normally the file being overwritten, i.e. the previous save of
+the same document. Packages that need ZIP64 (entries or archives over 4 GiB)
+are written by python-docx instead.
+"""
+
+from __future__ import annotations
+
+import struct
+import time
+import zipfile
+import zlib
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from docx.opc.pkgwriter import _ContentTypesItem
+
+from word_document_server.utils.limits import get_docx_compression_level
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_LOCAL_SIGNATURE = b"PK\x03\x04"
+_CENTRAL_SIGNATURE = b"PK\x01\x02"
+_END_SIGNATURE = b"PK\x05\x06"
+
+_VERSION = 20
+_FLAG_ENCRYPTED = 0x1
+_FLAG_UTF8 = 0x800
+_EXTERNAL_ATTR = 0o600 << 16  # what zipfile.writestr records
+_ZIP32_LIMIT = 0xFFFFFFFF
+_MAX_ENTRIES = 0xFFFF
+
+
+class _Zip64Required(Exception):
+    pass
+
+
+class _SourceArchive:
+    """Raw entry data of an existing package, looked up by member name."""
+
+    def __init__(self, handle: BinaryIO) -> None:
+        self._handle = handle
+        with zipfile.ZipFile(handle) as zf:
+            self._entries: Dict[str, zipfile.ZipInfo] = {
+                info.filename: info
+                for info in zf.infolist()
+                if info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+                and not info.flag_bits & _FLAG_ENCRYPTED
+            }
+
+    def raw_entry(self, name: str, crc: int, size: int) -> Optional[Tuple[zipfile.ZipInfo, bytes]]:
+        """Return (info, compressed bytes) if the source holds identical content."""
+        info = self._entries.get(name)
+        if info is None or info.CRC != crc or info.file_size != size:
+            return None
+        self._handle.seek(info.header_offset)
+        header = self._handle.read(_LOCAL_HEADER.size)
+        if len(header) != _LOCAL_HEADER.size or header[:4] != _LOCAL_SIGNATURE:
+            return None
+        name_len, extra_len = struct.unpack_from("<HH", header, 26)
+        self._handle.seek(info.header_offset + _LOCAL_HEADER.size + name_len + extra_len)
+        data = self._handle.read(info.compress_size)
+        if len(data) != info.compress_size:
+            return None
+        return info, data
+
+
+def _open_source(source: Optional[str]) -> Tuple[Optional[BinaryIO], Optional[_SourceArchive]]:
+    if not source:
+        return None, None
+    try:
+        handle = open(source, "rb")
+    except OSError:
+        return None, None
+    try:
+        return handle, _SourceArchive(handle)
+    except (zipfile.BadZipFile, ValueError, OSError):
+        handle.close()
+        return None, None
+
+
+def _dos_time(date_time: Tuple[int, ...]) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = date_time[:6]
+    dosdate = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dostime = hour << 11 | minute << 5 | (second // 2)
+    return dostime, dosdate
+
+
+def _package_items(doc) -> List[Tuple[str, bytes]]:
+    """(member name, content) pairs in the order python-docx writes them."""
+    package = doc.part.package
+    parts = list(package.parts)
+    for part in parts:
+        part.before_marshal()
+    items = [
+        (CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob),
+        (PACKAGE_URI.rels_uri.membername, package.rels.xml),
+    ]
+    for part in parts:
+        items.append((part.partname.membername, part.blob))
+        if len(part.rels):
+            items.append((part.partname.rels_uri.membername, part.rels.xml))
+    return items
+
+
+def _write_archive(
+    stream: BinaryIO,
+    items: List[Tuple[str, bytes]],
+    archive: Optional[_SourceArchive],
+    level: int,
+) -> int:
+    """Write items as a zip archive; return how many entries were copied raw."""
+    if len(items) > _MAX_ENTRIES:
+        raise _Zip64Required()
+    now = _dos_time(time.localtime(time.time()))
+    central: List[bytes] = []
+    offset = 0
+    copied = 0
+    for name, content in items:
+        crc = zlib.crc32(content)
+        size = len(content)
+        raw = archive.raw_entry(name, crc, size) if archive is not None else None
+        if raw is not None:
+            info, data = raw
+            method = info.compress_type
+            dostime, dosdate = _dos_time(info.date_time)
+            copied += 1
+        elif level == 0:
+            method, data = zipfile.ZIP_STORED, content
+            dostime, dosdate = now
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+            method, data = zipfile.ZIP_DEFLATED, compressor.compress(content) + compressor.flush()
+            dostime, dosdate = now
+
+        if max(size, len(data), offset) > _ZIP32_LIMIT:
+            raise _Zip64Required()
+        try:
+            encoded, flags = name.encode("ascii"), 0
+        except UnicodeEncodeError:
+            encoded, flags = name.encode("utf-8"), _FLAG_UTF8
+
+        stream.write(_LOCAL_HEADER.pack(
+            _LOCAL_SIGNATURE, _VERSION, flags, method, dostime, dosdate,
+            crc, len(data), size, len(encoded), 0,
+        ))
+        stream.write(encoded)
+        stream.write(data)
+        central.append(_CENTRAL_HEADER.pack(
+            _CENTRAL_SIGNATURE, _VERSION, _VERSION, flags, method, dostime, dosdate,
+            crc, len(data), size, len(encoded), 0, 0, 0, 0, _EXTERNAL_ATTR, offset,
+        ) + encoded)
+        offset += _LOCAL_HEADER.size + len(encoded) + len(data)
+
+    directory = b"".join(central)
+    if offset + len(directory) > _ZIP32_LIMIT:
+        raise _Zip64Required()
+    stream.write(directory)
+    stream.write(_END_RECORD.pack(
+        _END_SIGNATURE, 0, 0, len(central), len(central), len(directory), offset, 0,
+    ))
+    return copied
+
+
+def write_package(
+    doc,
+    target: Union[str, BinaryIO],
+    source: Optional[str] = None,
+    compression_level: Optional[int] = None,
+) -> int:
+    """
+    Save a python-docx Document, reusing unchanged entries of source.
+
+    Args:
+        doc: python-docx Document object
+        target: Destination path or writable binary stream. It must not be the
+            source file itself; write to a sibling and rename instead (see
+            utils.file_utils.atomic_save_document).
+        source: Existing .docx to copy unchanged entries from, usually the
+            previous version of the destination
+        compression_level: zlib level 0-9 for changed parts; defaults to
+            EW_DOCX_COMPRESSION_LEVEL
+
+    Returns:
+        Number of zip entries copied from source without recompression
+    """
+    level = get_docx_compression_level() if compression_level is None else compression_level
+    items = _package_items(doc)
+    handle, archive = _open_source(source)
+    try:
+        if isinstance(target, str):
+            with open(target, "wb") as stream:
+                return _write_archive(stream, items, archive, level)
+        start = target.tell()
+        try:
+            return _write_archive(target, items, archive, level)
+        except _Zip64Required:
+            target.seek(start)
+            target.truncate()
+            raise
+    except _Zip64Required:
+        doc.save(target)
+        return 0
+    finally:
+        if handle is not None:
+            handle.close()
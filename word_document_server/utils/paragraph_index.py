@@ -0,0 +1,179 @@
+"""
+Per-document paragraph index, rebuilt only after the document changes.
+
+Tools that address paragraphs by number (``get_text`` paragraph/range scopes,
+``get_paragraph_text``, ``add_text_content`` before/after,
+``enhanced_search_and_replace(paragraph_indices=...)``) used to rebuild
+``doc.paragraphs`` and recompute each paragraph's text on every call.
+``ParagraphIndex`` captures the body paragraphs once in compact form: all text
+concatenated into a single string with ``array('I')`` offsets, paragraph style
+IDs as small ints into a per-index table, and the ``w:p`` elements, so lookup
+by index is O(1) and a range of k paragraphs costs O(k).
+
+Each in-memory Document carries a content version (``DocumentVersions``).
+``load_document(for_write=True)`` checks a document out for writing and
+``save_document`` commits it, bumping the version; a write that ends without
+saving is detected at the next load (or session flush) and bumps the version
+as well, since the tree may have been partly changed; session documents are
+then rolled back (see ``utils.session_utils.load_document``).
+``get_paragraph_index`` reuses the cached index while the version is
+unchanged.
+"""
+
+from __future__ import annotations
+
+import weakref
+from array import array
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from docx.enum.style import WD_STYLE_TYPE
+from docx.text.paragraph import Paragraph
+
+from word_document_server.utils.text_stream import paragraph_text
+
+_P = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}p"
+
+
+class DocumentVersions:
+    """Thread-safe content version per in-memory Document."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        # Keyed by the document's root element: python-docx Documents compare
+        # by element and are not hashable themselves.
+        self._versions: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._writing: "weakref.WeakSet" = weakref.WeakSet()
+
+    def version(self, doc) -> int:
+        with self._lock:
+            return self._versions.get(doc.element, 0)
+
+    def checkout(self, doc, for_write: bool) -> bool:
+        """
+        Record that doc was handed out, and whether it may be modified.
+
+        Returns True when the previous write checkout of doc never reached
+        save_document, i.e. doc may hold a half-applied edit.
+        """
+        root = doc.element
+        with self._lock:
+            abandoned = self._release(root)
+            if for_write:
+                self._writing.add(root)
+        return abandoned
+
+    def release(self, doc) -> bool:
+        """End an uncommitted write checkout of doc; returns whether there was one."""
+        with self._lock:
+            return self._release(doc.element)
+
+    def _release(self, root) -> bool:
+        if root not in self._writing:
+            return False
+        # The write never reached save_document; the tree may be partly changed.
+        self._versions[root] = self._versions.get(root, 0) + 1
+        self._writing.discard(root)
+        return True
+
+    def commit(self, doc) -> None:
+        """Record that doc was modified and saved."""
+        root = doc.element
+        with self._lock:
+            self._versions[root] = self._versions.get(root, 0) + 1
+            self._writing.discard(root)
+
+
+class ParagraphIndex:
+    """Text, style and element of every body paragraph, in ``doc.paragraphs`` order."""
+
+    def __init__(self, doc) -> None:
+        self._doc = weakref.ref(doc)
+        self._elements: List = list(doc.element.body.iterchildren(_P))
+        self._offsets = array("I", [0])
+        self._style_ids = array("H")
+        self._style_table: List[Optional[str]] = []
+        self._style_names: Dict[int, str] = {}
+        style_numbers: Dict[Optional[str], int] = {}
+        parts: List[str] = []
+        end = 0
+        for p in self._elements:
+            text = paragraph_text(p)
+            parts.append(text)
+            end += len(text)
+            self._offsets.append(end)
+            style_id = p.style
+            number = style_numbers.get(style_id)
+            if number is None:
+                number = style_numbers[style_id] = len(self._style_table)
+                self._style_table.append(style_id)
+            self._style_ids.append(number)
+        self._text = "".join(parts)
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    def text(self, index: int) -> str:
+        """Text of paragraph ``index``, as ``Paragraph.text``."""
+        if index < 0:
+            index += len(self._elements)
+        return self._text[self._offsets[index]:self._offsets[index + 1]]
+
+    def texts(self, start: int, end: int) -> List[str]:
+        """Texts of paragraphs ``start`` to ``end`` inclusive."""
+        offsets = self._offsets
+        return [self._text[offsets[i]:offsets[i + 1]] for i in range(start, end + 1)]
+
+    def style_id(self, index: int) -> Optional[str]:
+        """The paragraph's ``w:pStyle`` value, or None for the default style."""
+        return self._style_table[self._style_ids[index]]
+
+    def style_name(self, index: int) -> str:
+        """Name of the paragraph's style, resolved as ``Paragraph.style.name``."""
+        number = self._style_ids[index]
+        name = self._style_names.get(number)
+        if name is None:
+            style = self._document().part.get_style(self._style_table[number], WD_STYLE_TYPE.PARAGRAPH)
+            name = self._style_names[number] = style.name
+        return name
+
+    def element(self, index: int):
+        """The paragraph's ``w:p`` element."""
+        return self._elements[index]
+
+    def paragraph(self, index: int) -> Paragraph:
+        """python-docx ``Paragraph`` for paragraph ``index``."""
+        return Paragraph(self._elements[index], self._document()._body)
+
+    def _document(self):
+        doc = self._doc()
+        if doc is None:
+            raise ValueError("the indexed document is no longer loaded")
+        return doc
+
+
+# ----------------------------------------------------------------------
+# Global accessors
+# ----------------------------------------------------------------------
+
+_document_versions = DocumentVersions()
+_index_lock = Lock()
+_indexes: "weakref.WeakKeyDictionary[object, Tuple[int, ParagraphIndex]]" = weakref.WeakKeyDictionary()
+
+
+def get_document_versions() -> DocumentVersions:
+    """Return the global singleton DocumentVersions."""
+    return _document_versions
+
+
+def get_paragraph_index(doc) -> ParagraphIndex:
+    """Return doc's paragraph index, building it if the document changed."""
+    version = _document_versions.version(doc)
+    with _index_lock:
+        cached = _indexes.get(doc.element)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    index = ParagraphIndex(doc)
+    with _index_lock:
+        _indexes[doc.element] = (version, index)
+    return index
@@ -0,0 +1,239 @@
+"""
+Process-wide cache of parsed python-docx Documents for filename-addressed calls.
+
+Parsing a .docx (unzip + lxml parse of every XML part) dominates the cost of
+read-only tools. Entries are keyed by resolved path and revalidated on every
+lookup against the file's (mtime_ns, size, inode) signature. When the file was
+modified within the filesystem's timestamp granularity of being cached, a
+same-size rewrite could keep an identical signature, so such "racy" entries
+are additionally verified against a BLAKE2b hash of the file contents. Files
+this process has just written are trusted instead: ``put(trusted=True)``
+takes their bytes from the writer and they are checked by stat alone.
+
+Readers share the cached Document, so callers that mutate must use ``take``
+(which removes the entry) and re-insert the saved Document with ``put``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import time
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from docx import Document
+
+from word_document_server.utils.file_utils import get_file_signature
+from word_document_server.utils.limits import get_parse_cache_bytes
+
+# Coarsest common mtime granularity (FAT); newer files are hash-verified.
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+def _hash_bytes(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _content_hash(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return _hash_bytes(f.read())
+    except OSError:
+        return None
+
+
+def _estimate_weight(source: Any, fallback: int) -> int:
+    """Approximate resident size by the package's uncompressed part bytes."""
+    try:
+        with zipfile.ZipFile(source) as zf:
+            return sum(info.file_size for info in zf.infolist()) or fallback
+    except Exception:
+        return fallback
+
+
+def is_racy_signature(signature: Tuple[int, int, int]) -> bool:
+    """True if the file changed too recently for its signature to be trusted."""
+    return time.time_ns() - signature[0] < _RACY_WINDOW_NS
+
+
+class _CacheEntry:
+    __slots__ = ("document", "signature", "weight", "content_hash")
+
+    def __init__(self, document: Any, signature: Tuple[int, int, int], weight: int,
+                 content_hash: Optional[bytes]) -> None:
+        self.document = document
+        self.signature = signature
+        self.weight = weight
+        self.content_hash = content_hash
+
+
+class ParseCache:
+    """LRU of parsed Documents with byte-based eviction (EW_PARSE_CACHE_BYTES)."""
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return str(Path(path).resolve())
+
+    def _drop(self, key: str) -> Optional[_CacheEntry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.weight
+        return entry
+
+    def _validate(self, key: str) -> Tuple[Optional[_CacheEntry], bool,
+                                           Optional[Tuple[int, int, int]]]:
+        """Check key's entry against the file without holding the lock."""
+        with self._lock:
+            entry = self._entries.get(key)
+            content_hash = entry.content_hash if entry is not None else None
+        if entry is None:
+            return None, False, None
+        signature = get_file_signature(key)
+        valid = signature == entry.signature
+        if valid and content_hash is not None:
+            valid = _content_hash(key) == content_hash
+        return entry, valid, signature
+
+    def _settle(self, key: str, entry: Optional[_CacheEntry], valid: bool,
+                signature: Optional[Tuple[int, int, int]]) -> Optional[_CacheEntry]:
+        """Apply a _validate result under the lock; a replaced entry is a miss."""
+        if entry is None or self._entries.get(key) is not entry:
+            return None
+        if not valid:
+            self._drop(key)
+            return None
+        if entry.content_hash is not None and not is_racy_signature(signature):
+            # Timestamp is now unambiguous; stat alone suffices from here on.
+            entry.content_hash = None
+        return entry
+
+    def _evict_to_budget(self, limit: int) -> None:
+        while self._entries and self._bytes > limit:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.weight
+            self._evictions += 1
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, path: str) -> Optional[Any]:
+        """Return the cached Document for path if it still matches the file."""
+        key = self._key(path)
+        checked = self._validate(key)
+        with self._lock:
+            entry = self._settle(key, *checked)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.document
+
+    def take(self, path: str) -> Optional[Any]:
+        """Remove and return the cached Document for path (for mutation)."""
+        key = self._key(path)
+        checked = self._validate(key)
+        with self._lock:
+            entry = self._settle(key, *checked)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._drop(key)
+            self._hits += 1
+            return entry.document
+
+    def put(self, path: str, document: Any,
+            signature: Optional[Tuple[int, int, int]] = None,
+            data: Optional[bytes] = None,
+            trusted: bool = False) -> None:
+        """
+        Cache document as the parsed form of path.
+
+        Args:
+            path: Document path
+            document: Parsed Document matching the file contents
+            signature: File signature captured *before* the file was read;
+                defaults to the current signature
+            data: The exact bytes document was parsed from (or saved as), if
+                available
+            trusted: path was just written from document by this process, so
+                a racy signature is not hash-verified
+        """
+        limit = get_parse_cache_bytes()
+        key = self._key(path)
+        if signature is None:
+            signature = get_file_signature(key)
+        if limit <= 0 or signature is None:
+            return
+        source = io.BytesIO(data) if data is not None else key
+        weight = _estimate_weight(source, signature[1])
+        if weight > limit:
+            return
+        content_hash = None
+        if is_racy_signature(signature) and not trusted:
+            content_hash = _hash_bytes(data) if data is not None else _content_hash(key)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = _CacheEntry(document, signature, weight, content_hash)
+            self._bytes += weight
+            self._evict_to_budget(limit)
+
+    def load(self, path: str) -> Any:
+        """Return a cached Document for path, parsing and caching it on a miss."""
+        document = self.get(path)
+        if document is not None:
+            return document
+        signature = get_file_signature(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        document = Document(io.BytesIO(data))
+        self.put(path, document, signature, data)
+        return document
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop the entry for path, or every entry when path is None."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._drop(self._key(path))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+
+# ----------------------------------------------------------------------
+# Global accessor
+# ----------------------------------------------------------------------
+
+_parse_cache = ParseCache()
+
+
+def get_parse_cache() -> ParseCache:
+    """Return the global singleton ParseCache."""
+    return _parse_cache
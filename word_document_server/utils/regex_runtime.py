@@ -0,0 +1,267 @@
+"""
+Compiled-pattern cache and enforced time limits for user regular expressions.
+
+``_regex_complexity_reason`` refuses the catastrophic shapes it recognises,
+but a pattern it does not recognise can still backtrack for minutes on one
+paragraph. When EW_REGEX_TIMEOUT_MS is set, the regex scans of one operation
+share that much matching time (a ``RegexBudget``):
+
+* with the third-party ``regex`` module installed, patterns are also compiled
+  with it and ``finditer(..., timeout=...)`` stops a runaway match natively;
+* otherwise the scan runs in a helper process, because stdlib ``re`` cannot
+  be interrupted from Python. The helper is killed when the budget runs out
+  and started again on the next call. It sends back match positions only;
+  the parent rebuilds each match at its known position, which costs no more
+  than the helper spent finding it.
+
+Running out of budget raises ``RegexTimeout`` before anything is modified.
+
+Without a time limit, a large scan (EW_PARALLEL_SCAN_MIN_CHARS or more) can
+be sharded across the shared process pool (EW_CPU_WORKERS): contiguous runs
+of texts go to the workers, which return match spans, and the spans are
+merged back in order. Pool workers cannot be killed one by one, so timed
+scans always use the helper process instead.
+
+Patterns are compiled once per (pattern, flags, whole-word wrapping) and kept
+in an LRU cache, so repeated calls with the same query skip ``re.compile``.
+"""
+
+from __future__ import annotations
+
+import functools
+import multiprocessing
+import re
+import threading
+import time
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from word_document_server.utils.executor import get_cpu_executor
+from word_document_server.utils.limits import get_cpu_workers, get_parallel_scan_min_chars, is_regex_timeout_supported
+
+_CACHE_SIZE = 256
+
+# Shards per pool worker, so one paragraph-heavy shard does not leave the
+# other workers idle.
+_SHARDS_PER_WORKER = 4
+
+# Generous bound on starting the helper process; this is not charged to
+# the regex budget.
+_WORKER_START_TIMEOUT_S = 60.0
+
+
+class RegexTimeout(Exception):
+    """A regex scan ran past its EW_REGEX_TIMEOUT_MS budget."""
+
+    def __init__(self, timeout_ms: int) -> None:
+        super().__init__(f"regex matching exceeded {timeout_ms} ms")
+        self.timeout_ms = timeout_ms
+
+
+class RegexBudget:
+    """Matching time shared by the regex scans of one operation (0 = unlimited)."""
+
+    def __init__(self, timeout_ms: int) -> None:
+        self.timeout_ms = timeout_ms
+        self._left = timeout_ms / 1000.0
+
+    @property
+    def limited(self) -> bool:
+        return self.timeout_ms > 0
+
+    def remaining(self) -> float:
+        """Seconds left; raises RegexTimeout once the budget is spent."""
+        if self._left <= 0:
+            raise RegexTimeout(self.timeout_ms)
+        return self._left
+
+    def charge(self, seconds: float) -> None:
+        self._left -= seconds
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def compile_pattern(pattern: str, flags: int = 0, whole_word: bool = False) -> "re.Pattern":
+    """Compile pattern, wrapped in ``\\b(?:...)\\b`` for whole_word; cached."""
+    if whole_word:
+        pattern = rf"\b(?:{pattern})\b"
+    return re.compile(pattern, flags)
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _native_pattern(pattern: str, flags: int):
+    import regex
+
+    return regex.compile(pattern, flags)
+
+
+def scan(pattern: "re.Pattern", texts: Iterable[str], budget: Optional[RegexBudget] = None,
+         parallel: bool = False) -> Iterator[List]:
+    """
+    Yield the ``finditer`` matches of pattern in each of texts, in order.
+
+    Without a limited budget the texts are matched lazily in this process,
+    or, with parallel and enough text, all at once in the process pool.
+    With a limited budget, matching stops with RegexTimeout when it is spent.
+    """
+    if budget is None or not budget.limited:
+        if parallel:
+            texts = list(texts)
+            spans = _parallel_spans(pattern, texts)
+            if spans is not None:
+                for text, text_spans in zip(texts, spans):
+                    yield _rebuild_matches(pattern, text, text_spans)
+                return
+        for text in texts:
+            yield list(pattern.finditer(text))
+        return
+
+    if is_regex_timeout_supported():
+        native = _native_pattern(pattern.pattern, pattern.flags)
+        for text in texts:
+            started = time.monotonic()
+            try:
+                matches = list(native.finditer(text, timeout=budget.remaining()))
+            except TimeoutError:
+                raise RegexTimeout(budget.timeout_ms) from None
+            finally:
+                budget.charge(time.monotonic() - started)
+            yield matches
+        return
+
+    texts = list(texts)
+    for text, spans in zip(texts, _worker.scan(pattern.pattern, pattern.flags, texts, budget)):
+        yield _rebuild_matches(pattern, text, spans)
+
+
+def _rebuild_matches(pattern: "re.Pattern", text: str, spans: Sequence[Tuple[int, int]]) -> List:
+    """Match objects for spans found in another process."""
+    matches = []
+    previous = None
+    for start, end in spans:
+        if previous == (start, start):
+            # finditer retries after an empty match without allowing another
+            # empty one there; match(text, start) would repeat the empty match.
+            m = next(islice(pattern.finditer(text, start), 1, None))
+        else:
+            m = pattern.match(text, start)
+        matches.append(m)
+        previous = (start, end)
+    return matches
+
+
+def _scan_spans(pattern: str, flags: int, texts: Sequence[str]) -> List[List[Tuple[int, int]]]:
+    """Match spans of pattern in each of texts; runs in worker processes."""
+    compiled = re.compile(pattern, flags)
+    return [[m.span() for m in compiled.finditer(text)] for text in texts]
+
+
+# ---------------------------------------------------------------------------
+# Process pool
+# ---------------------------------------------------------------------------
+
+def _shards(lengths: Sequence[int], count: int) -> List[Tuple[int, int]]:
+    """Split texts into about count contiguous [start, end) ranges of similar size."""
+    target = max(1, sum(lengths) // count)
+    bounds = []
+    start = size = 0
+    for i, length in enumerate(lengths):
+        size += length
+        if size >= target:
+            bounds.append((start, i + 1))
+            start, size = i + 1, 0
+    if start < len(lengths):
+        bounds.append((start, len(lengths)))
+    return bounds
+
+
+def _parallel_spans(pattern: "re.Pattern", texts: List[str]) -> Optional[List[List[Tuple[int, int]]]]:
+    """Spans for every text from the process pool, or None when not worth it."""
+    workers = get_cpu_workers()
+    lengths = [len(text) for text in texts]
+    if workers < 2 or sum(lengths) < get_parallel_scan_min_chars():
+        return None
+    executor = get_cpu_executor()
+    if executor is None:
+        return None
+    futures = [
+        executor.submit(_scan_spans, pattern.pattern, pattern.flags, texts[start:end])
+        for start, end in _shards(lengths, workers * _SHARDS_PER_WORKER)
+    ]
+    spans: List[List[Tuple[int, int]]] = []
+    for future in futures:
+        spans.extend(future.result())
+    return spans
+
+
+# ---------------------------------------------------------------------------
+# Helper process
+# ---------------------------------------------------------------------------
+
+def _serve(conn) -> None:
+    """Helper process loop: (pattern, flags, texts) in, match spans out."""
+    conn.send("ready")
+    while True:
+        try:
+            pattern, flags, texts = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(("ok", _scan_spans(pattern, flags, texts)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class _ScanWorker:
+    """One killable helper process; scans are serialised through it."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._process = None
+        self._conn = None
+
+    def _connection(self):
+        if self._process is not None and self._process.is_alive():
+            return self._conn
+        self._stop()
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(target=_serve, args=(child_conn,), name="ew-regex", daemon=True)
+        process.start()
+        child_conn.close()
+        self._process, self._conn = process, parent_conn
+        if not parent_conn.poll(_WORKER_START_TIMEOUT_S):
+            self._stop()
+            raise RuntimeError("regex helper process did not start")
+        parent_conn.recv()
+        return parent_conn
+
+    def _stop(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+        if self._conn is not None:
+            self._conn.close()
+        self._process = self._conn = None
+
+    def scan(self, pattern: str, flags: int, texts: List[str], budget: RegexBudget) -> List[List[Tuple[int, int]]]:
+        with self._lock:
+            conn = self._connection()
+            timeout = budget.remaining()
+            started = time.monotonic()
+            try:
+                conn.send((pattern, flags, texts))
+                if not conn.poll(timeout):
+                    self._stop()
+                    raise RegexTimeout(budget.timeout_ms)
+                status, payload = conn.recv()
+            except (EOFError, OSError):
+                self._stop()
+                raise RuntimeError("regex helper process exited unexpectedly") from None
+            finally:
+                budget.charge(time.monotonic() - started)
+        if status == "error":
+            raise re.error(payload)
+        return payload
+
+
+_worker = _ScanWorker()
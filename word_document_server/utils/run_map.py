@@ -0,0 +1,233 @@
+"""
+Character offsets of a paragraph's runs, for editing text spans in place.
+
+Matches are found in a paragraph's text (``Paragraph.text``, hyperlink runs
+included) and have to be mapped back onto the ``w:r`` elements that hold
+those characters. ``RunMap`` keeps each run's start offset as a prefix sum,
+so the run at a position is found with ``bisect`` instead of summing
+``len(run.text)`` from the start of the paragraph for every match.
+
+Edits are surgical: ``split`` cuts only the run that straddles a position,
+keeping every non-text child (field characters, drawings, page breaks) on
+the side it was on, and ``replace`` changes only the runs inside a span.
+Offsets left of an edit stay valid, so the matches of one paragraph are
+applied right to left through a single map.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from copy import deepcopy
+from itertools import accumulate
+from typing import List, Optional, Sequence, Tuple
+
+from word_document_server.utils.text_stream import run_text
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_R = _W + "r"
+_RPR = _W + "rPr"
+_T = _W + "t"
+_HYPERLINK = _W + "hyperlink"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+
+def _iter_runs(p):
+    for child in p:
+        if child.tag == _R:
+            yield child
+        elif child.tag == _HYPERLINK:
+            yield from (run for run in child if run.tag == _R)
+
+
+def _set_text(t, text: str) -> None:
+    t.text = text
+    if text != text.strip():
+        t.set(_XML_SPACE, "preserve")
+
+
+def _keep_range(r, start: int, end: Optional[int]) -> None:
+    """Drop r's content outside characters [start, end).
+
+    Zero-width children (drawings, field characters, page breaks) are kept
+    when they sit inside the range, so splitting a run never loses them.
+    """
+    pos = 0
+    for child in list(r):
+        if child.tag == _RPR:
+            continue
+        length = len(run_text([child]))
+        child_start = pos
+        pos += length
+        inside_end = end is None or child_start < end
+        if length == 0:
+            if not (start <= child_start and inside_end):
+                r.remove(child)
+        elif pos <= start or not inside_end:
+            r.remove(child)
+        elif child.tag == _T and (child_start < start or (end is not None and pos > end)):
+            text = child.text or ""
+            _set_text(child, text[max(0, start - child_start):(None if end is None else end - child_start)])
+
+
+def _drop_text(r) -> None:
+    """Remove r's text content, keeping its properties and zero-width children."""
+    for child in list(r):
+        if child.tag != _RPR and run_text([child]):
+            r.remove(child)
+
+
+def _strip_edge(r, leading: bool) -> int:
+    """Remove whitespace at one end of r's text; returns the characters removed."""
+    removed = 0
+    children = [child for child in r if child.tag != _RPR]
+    for child in (children if leading else reversed(children)):
+        text = run_text([child])
+        if not text:
+            continue
+        stripped = text.lstrip() if leading else text.rstrip()
+        removed += len(text) - len(stripped)
+        if stripped:
+            _set_text(child, stripped)
+            break
+        r.remove(child)
+    return removed
+
+
+class RunMap:
+    """The runs of one ``w:p`` element with their character offsets."""
+
+    def __init__(self, p) -> None:
+        self.paragraph_element = p
+        self.runs: List = list(_iter_runs(p))
+        self._lengths: List[int] = [len(run_text(r)) for r in self.runs]
+        self._starts: List[int] = [0, *accumulate(self._lengths)][:len(self.runs)]
+        # _starts[:_valid] are current; later entries are refreshed on demand.
+        self._valid = len(self.runs)
+
+    def __len__(self) -> int:
+        return len(self.runs)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _refresh_for(self, pos: int) -> None:
+        valid = self._valid
+        if valid == len(self.runs):
+            return
+        if valid and pos < self._starts[valid - 1] + self._lengths[valid - 1]:
+            return
+        start = self._starts[valid - 1] + self._lengths[valid - 1] if valid else 0
+        for i in range(valid, len(self.runs)):
+            self._starts[i] = start
+            start += self._lengths[i]
+        self._valid = len(self.runs)
+
+    def index_at(self, pos: int) -> Optional[int]:
+        """Index of the run holding character pos, or None."""
+        self._refresh_for(pos)
+        i = bisect_right(self._starts, pos, 0, self._valid) - 1
+        while i >= 0 and self._lengths[i] == 0:
+            i -= 1
+        if i < 0 or pos >= self._starts[i] + self._lengths[i]:
+            return None
+        return i
+
+    def run_at(self, pos: int):
+        """The ``w:r`` element holding character pos, or None."""
+        i = self.index_at(pos)
+        return None if i is None else self.runs[i]
+
+    def text_length(self, index: int) -> int:
+        return self._lengths[index]
+
+    def text_run_before(self, index: int) -> Optional[int]:
+        """Nearest run before index that holds text."""
+        for i in range(index - 1, -1, -1):
+            if self._lengths[i]:
+                return i
+        return None
+
+    def text_run_after(self, index: int) -> Optional[int]:
+        """Nearest run at or after index that holds text."""
+        for i in range(index, len(self.runs)):
+            if self._lengths[i]:
+                return i
+        return None
+
+    # ------------------------------------------------------------------
+    # Edits
+    # ------------------------------------------------------------------
+
+    def split(self, pos: int) -> int:
+        """Make pos a run boundary; return the index of the first run at or after it."""
+        self._refresh_for(pos)
+        i = bisect_right(self._starts, pos, 0, self._valid) - 1
+        if i >= 0 and self._starts[i] < pos < self._starts[i] + self._lengths[i]:
+            r = self.runs[i]
+            offset = pos - self._starts[i]
+            tail = deepcopy(r)
+            _keep_range(r, 0, offset)
+            _keep_range(tail, offset, None)
+            r.addnext(tail)
+            self.runs.insert(i + 1, tail)
+            self._lengths.insert(i + 1, self._lengths[i] - offset)
+            self._lengths[i] = offset
+            self._starts.insert(i + 1, pos)
+            self._valid += 1
+            return i + 1
+        return bisect_left(self._starts, pos, 0, self._valid)
+
+    def replace(self, start: int, end: int, new_runs: Sequence) -> Tuple[int, int]:
+        """
+        Replace characters [start, end) with the ``w:r`` elements new_runs.
+
+        Text inside the span is removed from its runs; runs left with only
+        non-text content stay in place after the new runs, and empty ones
+        are dropped. Returns the index range the new runs occupy.
+        """
+        i = self.split(start)
+        j = self.split(end)
+        covered = self.runs[i:j]
+
+        if covered:
+            anchor = covered[0]
+            for r in new_runs:
+                anchor.addprevious(r)
+        elif j < len(self.runs):
+            for r in new_runs:
+                self.runs[j].addprevious(r)
+        elif i > 0:
+            anchor = self.runs[i - 1]
+            for r in reversed(new_runs):
+                anchor.addnext(r)
+        else:
+            for r in new_runs:
+                self.paragraph_element.append(r)
+
+        kept = []
+        for r, length in zip(covered, self._lengths[i:j]):
+            if length:
+                _drop_text(r)
+                if all(child.tag == _RPR for child in r):
+                    r.getparent().remove(r)
+                    continue
+            kept.append(r)
+
+        lengths = [len(run_text(r)) for r in new_runs] + [0] * len(kept)
+        self.runs[i:j] = list(new_runs) + kept
+        self._lengths[i:j] = lengths
+        self._starts[i:j] = list(accumulate(lengths[:-1], initial=start))[:len(lengths)]
+        self._valid = i + len(lengths)
+        return i, i + len(new_runs)
+
+    def strip(self, index: int, leading: bool) -> int:
+        """Strip whitespace from the start (or end) of run index's text."""
+        removed = _strip_edge(self.runs[index], leading)
+        if removed:
+            self._lengths[index] -= removed
+            self._valid = min(self._valid, index + 1)
+        return removed
+
+    def text_of(self, index: int) -> str:
+        return run_text(self.runs[index])
@@ -0,0 +1,299 @@
+"""
+Inverted index for repeated searches over an unchanged document.
+
+``get_text(scope="search")`` is typically called many times in a row against
+the same document. Rather than re-reading the document and scanning every
+paragraph with ``str.find`` each time, ``SearchIndex`` keeps the document's
+paragraphs (see utils.text_stream) and, built lazily on first use:
+
+* a token index per case mode, word -> flat ``array('I')`` of
+  (paragraph, word position) pairs, answering whole-word searches directly;
+* a trigram index over case-folded text, trigram -> ``array('I')`` of
+  paragraph numbers, narrowing substring and regex searches to the
+  paragraphs that contain every trigram of the query's required literals.
+
+Candidates are always verified with the original matching rules, so results
+are identical to a full scan. Documents with more than
+EW_SEARCH_INDEX_MAX_CHARS characters of text are never indexed (0 disables
+indexing altogether).
+
+Indexes of in-memory documents are keyed by the document and its content
+version (utils.paragraph_index.DocumentVersions) and are dropped after any
+edit. Files that are not loaded are indexed from a streamed read and cached
+by path until their (mtime, size, inode) signature changes.
+"""
+
+from __future__ import annotations
+
+import re
+import weakref
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from word_document_server.utils.file_utils import get_file_signature
+from word_document_server.utils.limits import get_search_index_max_chars
+from word_document_server.utils.paragraph_index import get_document_versions
+from word_document_server.utils.parse_cache import is_racy_signature
+from word_document_server.utils.text_stream import ParagraphText, iter_body_paragraphs, iter_paragraphs
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+
+# Unloaded files whose paragraphs and index are kept, least recently used first.
+_MAX_FILE_INDEXES = 16
+
+_LITERAL = _sre_parse.LITERAL
+_SUBPATTERN = _sre_parse.SUBPATTERN
+_REPEATS = tuple(
+    op for op in (
+        _sre_parse.MAX_REPEAT,
+        _sre_parse.MIN_REPEAT,
+        getattr(_sre_parse, "POSSESSIVE_REPEAT", None),
+    ) if op is not None
+)
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _required_literals(parsed, ignore_case: bool) -> List[str]:
+    """Literal strings of 3+ characters that every match of a parsed regex contains."""
+    found: List[str] = []
+    run: List[str] = []
+
+    def end_run() -> None:
+        if len(run) >= 3:
+            found.append("".join(run))
+        run.clear()
+
+    for op, av in parsed:
+        if op is _LITERAL:
+            ch = chr(av)
+            # Under IGNORECASE, re matches i/I against dotted and dotless
+            # Turkish i, and non-ASCII letters have further equivalences that
+            # case folding does not reproduce; treat those as unknown.
+            if ignore_case and (not ch.isascii() or ch in "iI"):
+                end_run()
+            else:
+                run.append(ch)
+        elif op is _SUBPATTERN:
+            end_run()
+            _, add_flags, _, sub = av
+            found.extend(_required_literals(sub, ignore_case or bool(add_flags & re.IGNORECASE)))
+        elif op in _REPEATS:
+            end_run()
+            low, _, sub = av
+            if low >= 1:
+                found.extend(_required_literals(sub, ignore_case))
+        else:
+            end_run()
+    end_run()
+    return found
+
+
+def match_positions(text: str, term: str, match_case: bool = True, whole_word: bool = False) -> List[int]:
+    """
+    Positions of term in one paragraph's text.
+
+    Substring matches are character offsets and do not overlap; whole-word
+    matches are the word's position in ``text.split()``.
+    """
+    if not match_case:
+        text = text.lower()
+        term = term.lower()
+    if whole_word:
+        return [i for i, word in enumerate(text.split()) if word == term]
+    positions = []
+    pos = text.find(term)
+    while pos != -1:
+        positions.append(pos)
+        pos = text.find(term, pos + len(term))
+    return positions
+
+
+class SearchIndex:
+    """Paragraph texts of one document version, with lazily built lookups."""
+
+    def __init__(self, paragraphs: Sequence[ParagraphText]) -> None:
+        self.paragraphs: List[ParagraphText] = list(paragraphs)
+        self.total_chars = sum(len(p.text) for p in self.paragraphs)
+        self._lock = Lock()
+        self._tokens: Dict[bool, Dict[str, array]] = {}
+        self._trigram_index: Optional[Dict[str, array]] = None
+
+    @property
+    def indexable(self) -> bool:
+        limit = get_search_index_max_chars()
+        return bool(limit) and self.total_chars <= limit
+
+    # ------------------------------------------------------------------
+    # Lazily built structures
+    # ------------------------------------------------------------------
+
+    def _token_index(self, match_case: bool) -> Dict[str, array]:
+        with self._lock:
+            tokens = self._tokens.get(match_case)
+            if tokens is None:
+                tokens = {}
+                for pid, paragraph in enumerate(self.paragraphs):
+                    text = paragraph.text if match_case else paragraph.text.lower()
+                    for position, word in enumerate(text.split()):
+                        postings = tokens.get(word)
+                        if postings is None:
+                            postings = tokens[word] = array("I")
+                        postings.append(pid)
+                        postings.append(position)
+                self._tokens[match_case] = tokens
+            return tokens
+
+    def _trigram_postings(self) -> Dict[str, array]:
+        with self._lock:
+            if self._trigram_index is None:
+                index: Dict[str, array] = {}
+                for pid, paragraph in enumerate(self.paragraphs):
+                    for gram in _trigrams(paragraph.text.casefold()):
+                        postings = index.get(gram)
+                        if postings is None:
+                            postings = index[gram] = array("I")
+                        postings.append(pid)
+                self._trigram_index = index
+            return self._trigram_index
+
+    def _containing_all(self, literals: Iterable[str]) -> Optional[List[int]]:
+        grams = set()
+        for literal in literals:
+            grams |= _trigrams(literal.casefold())
+        if not grams:
+            return None
+        index = self._trigram_postings()
+        postings = sorted((index.get(gram, ()) for gram in grams), key=len)
+        if not postings[0]:
+            return []
+        result = set(postings[0])
+        for other in postings[1:]:
+            result.intersection_update(other)
+            if not result:
+                break
+        return sorted(result)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def candidates(self, term: str) -> Optional[List[int]]:
+        """
+        Paragraphs that may contain term, in either case mode.
+
+        Returns None when the index cannot narrow the search (term shorter
+        than three characters, or the document is not indexable).
+        """
+        if not self.indexable:
+            return None
+        return self._containing_all([term])
+
+    def regex_candidates(self, pattern: str, flags: int = 0) -> Optional[List[int]]:
+        """Paragraphs that may match pattern on their own, or None if unknown."""
+        if not self.indexable:
+            return None
+        try:
+            parsed = _sre_parse.parse(pattern, flags)
+        except (re.error, RecursionError, OverflowError):
+            return None
+        ignore_case = bool((flags | parsed.state.flags) & re.IGNORECASE)
+        return self._containing_all(_required_literals(parsed, ignore_case))
+
+    def find(self, term: str, match_case: bool = True, whole_word: bool = False) -> List[Tuple[int, int]]:
+        """
+        (paragraph number, position) of every match, in document order.
+
+        Gives exactly what match_positions finds over every paragraph.
+        """
+        needle = term if match_case else term.lower()
+        if whole_word:
+            if self.indexable:
+                postings = self._token_index(match_case).get(needle, ())
+                return [(postings[i], postings[i + 1]) for i in range(0, len(postings), 2)]
+            pids: Iterable[int] = range(len(self.paragraphs))
+        else:
+            pids = self.candidates(term)
+            if pids is None:
+                pids = range(len(self.paragraphs))
+
+        matches: List[Tuple[int, int]] = []
+        for pid in pids:
+            positions = match_positions(self.paragraphs[pid].text, term, match_case, whole_word)
+            matches.extend((pid, position) for position in positions)
+        return matches
+
+
+# ----------------------------------------------------------------------
+# Global accessors
+# ----------------------------------------------------------------------
+
+_cache_lock = Lock()
+_document_indexes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_file_indexes: "OrderedDict[str, Tuple[Tuple[int, int, int], SearchIndex]]" = OrderedDict()
+
+
+def cached_search_index(doc) -> Optional[SearchIndex]:
+    """The index of an in-memory Document's current version, if already built."""
+    with _cache_lock:
+        cached = _document_indexes.get(doc.element)
+    if cached is not None and cached[0] == get_document_versions().version(doc):
+        return cached[1]
+    return None
+
+
+def get_search_index(doc_path: str) -> Optional[SearchIndex]:
+    """
+    Return the search index for a document, building it if needed.
+
+    Uses the in-memory Document when one is loaded (so unsaved session edits
+    are searched), otherwise streams the file. Returns None when indexing is
+    disabled (EW_SEARCH_INDEX_MAX_CHARS=0).
+    """
+    from word_document_server.utils.session_utils import get_loaded_document
+
+    if not get_search_index_max_chars():
+        return None
+
+    doc = get_loaded_document(doc_path)
+    if doc is not None:
+        index = cached_search_index(doc)
+        if index is None:
+            version = get_document_versions().version(doc)
+            index = SearchIndex(iter_body_paragraphs(doc))
+            with _cache_lock:
+                _document_indexes[doc.element] = (version, index)
+        return index
+
+    key = str(Path(doc_path).resolve())
+    signature = get_file_signature(key)
+    with _cache_lock:
+        cached = _file_indexes.get(key)
+        if cached is not None and signature is not None and cached[0] == signature:
+            _file_indexes.move_to_end(key)
+            return cached[1]
+    index = SearchIndex(iter_paragraphs(doc_path))
+    # A file modified within the timestamp granularity could change again
+    # without its signature changing, so it is not cached yet.
+    if signature is not None and not is_racy_signature(signature) and index.indexable:
+        with _cache_lock:
+            _file_indexes[key] = (signature, index)
+            _file_indexes.move_to_end(key)
+            while len(_file_indexes) > _MAX_FILE_INDEXES:
+                _file_indexes.popitem(last=False)
+    return index
+
+
+def clear_search_indexes() -> None:
+    """Forget every cached index."""
+    with _cache_lock:
+        _document_indexes.clear()
+        _file_indexes.clear()
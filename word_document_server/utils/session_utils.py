@@ -4,10 +4,17 @@ Session utility functions for backward compatibility and document access.
 Provides helper functions to support both document_id and filename parameters
 in tools, allowing for gradual migration to session-based document management.
 """
+import io
 import os
-from typing import Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+from docx import Document
 from word_document_server.session_manager import get_session_manager
-from word_document_server.utils.file_utils import ensure_docx_extension
+from word_document_server.utils.file_utils import atomic_save_document_data, ensure_docx_extension
+from word_document_server.utils.paragraph_index import get_document_versions
+from word_document_server.utils.parse_cache import get_parse_cache
 
 
 def resolve_document_path(document_id: Optional[str] = None, filename: Optional[str] = None) -> Tuple[str, str]:
@@ -118,3 +125,167 @@ def update_session_document(document_id: str, updated_document) -> bool:
         return True
     
     return False
+
+
+class BatchTransaction:
+    """A document shared by every tool call of one batch_edit invocation."""
+
+    __slots__ = ("resolved_path", "document", "modified", "succeeded")
+
+    def __init__(self, file_path: str, document) -> None:
+        self.resolved_path = str(Path(file_path).resolve())
+        self.document = document
+        self.modified = False
+        # Set by mark_operation_succeeded; batch_edit clears it per operation.
+        self.succeeded = False
+
+
+_active_batch: ContextVar[Optional[BatchTransaction]] = ContextVar("ew_active_batch", default=None)
+
+
+@contextmanager
+def batch_transaction(file_path: str, document) -> Iterator[BatchTransaction]:
+    """
+    Route load_document/save_document for file_path to one in-memory document.
+
+    Inside the block, tools see the shared document, saves only mark it
+    modified, and check_file_writeable skips its per-call checks and undo
+    snapshot. The caller is responsible for the final save or rollback.
+    """
+    transaction = BatchTransaction(file_path, document)
+    token = _active_batch.set(transaction)
+    try:
+        yield transaction
+    finally:
+        _active_batch.reset(token)
+
+
+def get_batch_transaction(file_path: str) -> Optional[BatchTransaction]:
+    """Return the active batch transaction for file_path, if any."""
+    transaction = _active_batch.get()
+    if transaction is None or not file_path:
+        return None
+    if str(Path(file_path).resolve()) != transaction.resolved_path:
+        return None
+    return transaction
+
+
+def mark_operation_succeeded(file_path: str) -> None:
+    """
+    Report that the running tool call on file_path succeeded.
+
+    Tools return their failures as free-form strings, so batch_edit commits
+    only operations that report success through this call and rolls back
+    everything else. Outside a batch this does nothing.
+    """
+    transaction = get_batch_transaction(file_path)
+    if transaction is not None:
+        transaction.succeeded = True
+
+
+def load_document(file_path: str, for_write: bool = False, data: Optional[bytes] = None):
+    """
+    Load a document for reading or editing.
+
+    If the path is open in the session, the already-parsed resident Document
+    is returned (re-parsed only when the file changed on disk). Otherwise the
+    process-wide parse cache is consulted before parsing the file.
+
+    Args:
+        file_path: Resolved document path (see resolve_document_path)
+        for_write: True if the caller will mutate the document; a cached
+            parse is then taken out of the shared cache rather than borrowed
+        data: The file's bytes from preflight_write, parsed instead of
+            re-reading the file when a write needs a fresh parse
+
+    The document is checked out in utils.paragraph_index.DocumentVersions so
+    cached paragraph indexes are dropped once it is modified. If the previous
+    write to a resident session document failed before save_document, its
+    partial edits are rolled back first (see session_manager.discard_write).
+
+    Returns:
+        python-docx Document object
+    """
+    versions = get_document_versions()
+    doc, resident = _find_or_parse(file_path, for_write, data)
+    if versions.checkout(doc, for_write) and resident:
+        get_session_manager().discard_write(file_path, doc)
+        doc, resident = _find_or_parse(file_path, for_write, data)
+        versions.checkout(doc, for_write)
+    if for_write and resident:
+        get_session_manager().begin_write(file_path, doc)
+    return doc
+
+
+def _find_or_parse(file_path: str, for_write: bool, data: Optional[bytes]):
+    """The document to hand out, and whether it is the resident session document."""
+    transaction = get_batch_transaction(file_path)
+    if transaction is not None:
+        return transaction.document, False
+    doc = get_session_manager().get_resident_document(file_path)
+    if doc is not None:
+        return doc, True
+    cache = get_parse_cache()
+    if for_write:
+        doc = cache.take(file_path)
+        if doc is None:
+            doc = Document(io.BytesIO(data)) if data is not None else Document(file_path)
+        return doc, False
+    return cache.load(file_path), False
+
+
+def get_loaded_document(file_path: str):
+    """
+    Return the in-memory Document for file_path if one is already parsed.
+
+    Checks the active batch, the session's resident document and the parse
+    cache, in the same order as load_document, but never parses the file
+    itself. Readers that can work from the raw package (see
+    utils.text_stream) use this so unsaved session edits stay visible; a
+    failed write's partial edits are rolled back as in load_document.
+
+    Returns:
+        python-docx Document object, or None
+    """
+    transaction = get_batch_transaction(file_path)
+    if transaction is not None:
+        return transaction.document
+    session_manager = get_session_manager()
+    doc = session_manager.get_resident_document(file_path)
+    if doc is not None and get_document_versions().release(doc):
+        # Readers hold the path's read lock, so that write is over: it failed.
+        session_manager.discard_write(file_path, doc)
+        doc = session_manager.get_resident_document(file_path)
+    if doc is not None:
+        return doc
+    return get_parse_cache().get(file_path)
+
+
+def save_document(doc, file_path: str) -> None:
+    """
+    Persist a modified document.
+
+    Resident session documents are marked dirty and flushed according to the
+    session auto-flush policy; any other document is saved to file_path
+    directly (atomically, see utils.file_utils.atomic_save_document_data). In
+    every case the document's content version is bumped, invalidating its
+    paragraph index.
+
+    Args:
+        doc: Document returned by load_document (or a new Document)
+        file_path: Destination path
+    """
+    get_document_versions().commit(doc)
+    transaction = get_batch_transaction(file_path)
+    if transaction is not None and transaction.document is doc:
+        transaction.modified = True
+        return
+    session_manager = get_session_manager()
+    if session_manager.commit_document(file_path, doc):
+        return
+    data = atomic_save_document_data(doc, file_path)
+    # A different Document was written over a session path; drop the stale parse.
+    session_manager.invalidate_path(file_path)
+    # The saved Document now mirrors the file, so later reads can reuse it
+    # without reading or hashing the file again.
+    get_parse_cache().put(file_path, doc, data=data, trusted=True)
@@ -0,0 +1,358 @@
+"""
+Content-addressed storage for .docx undo snapshots.
+
+A .docx is a zip package. Between two saves of the same document usually only
+``word/document.xml`` changes, while media, styles, numbering, theme and font
+parts are rewritten with identical compressed data. A snapshot is therefore
+stored as a manifest of package segments rather than as whole-file bytes:
+
+    [prefix + local header 1] [data 1] [descriptor 1 + local header 2] [data 2]
+    ... [descriptor N + central directory + end record]
+
+Each segment is kept once in a reference-counted store keyed by its BLAKE2b
+digest, so unchanged part data is shared across snapshots of one document and
+across documents. Member data is copied as it sits in the zip (i.e. already
+deflate-compressed); local headers are split off because python-docx stamps
+every save with a fresh timestamp. Concatenating the segments reproduces the
+original file byte for byte. Inputs that are not zip packages are stored as a
+single segment.
+
+Segments live in one of two tiers. New and recently reused segments stay in
+memory; ``spill`` moves the least recently used ones, compressed with zstd
+when the ``zstandard`` package is installed and zlib otherwise, to an
+append-only file that is read back through mmap. Space freed in the spill
+file is reclaimed by rewriting it once dead records outweigh live ones.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import weakref
+import zipfile
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from word_document_server.utils.limits import get_undo_spill_dir
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Local file header: signature, versions, flags, method, time, date, crc,
+# sizes, then name and extra-field lengths at offsets 26 and 28.
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+# Compact the spill file once this much of it is dead (and dead > live).
+_SPILL_COMPACT_MIN_DEAD = 16 * 1024 * 1024
+
+Manifest = Tuple[bytes, ...]
+
+if zstandard is not None:
+    SPILL_CODEC = "zstd"
+
+    def _compress(data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+
+    def _decompress(data: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data)
+else:
+    SPILL_CODEC = "zlib"
+
+    def _compress(data: bytes) -> bytes:
+        return zlib.compress(data, 1)
+
+    def _decompress(data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+def _digest(data: memoryview) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def split_package(data: bytes) -> List[Tuple[int, int]]:
+    """
+    Split zip bytes into (start, end) segments isolating each member's data.
+
+    Returns a single segment covering the input when it is not a well-formed
+    zip, so callers never need a separate code path.
+    """
+    whole = [(0, len(data))]
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            infos = sorted(zf.infolist(), key=lambda info: info.header_offset)
+            central_dir = zf.start_dir
+    except (zipfile.BadZipFile, ValueError, OSError):
+        return whole
+
+    bounds: List[Tuple[int, int]] = []
+    position = 0
+    for info in infos:
+        offset = info.header_offset
+        if offset < position or data[offset:offset + 4] != _LOCAL_HEADER_SIGNATURE:
+            return whole
+        name_len, extra_len = struct.unpack_from("<HH", data, offset + 26)
+        data_start = offset + _LOCAL_HEADER_SIZE + name_len + extra_len
+        data_end = data_start + info.compress_size
+        if data_end > central_dir:
+            return whole
+        bounds.append((position, data_start))
+        if info.compress_size:
+            bounds.append((data_start, data_end))
+        position = data_end
+    if position > len(data) or central_dir < position:
+        return whole
+    bounds.append((position, len(data)))
+    return [(start, end) for start, end in bounds if end > start] or whole
+
+
+def digest_segments(data: bytes) -> List[Tuple[bytes, memoryview]]:
+    """
+    Split and hash data without touching any store.
+
+    This is the expensive part of storing a snapshot; it needs no lock, so
+    callers run it before entering the store's critical section.
+    """
+    view = memoryview(data)
+    return [(_digest(view[start:end]), view[start:end]) for start, end in split_package(data)]
+
+
+def _remove_spill_file(handle, path: str, created_dir: Optional[str]) -> None:
+    try:
+        handle.close()
+        os.unlink(path)
+    except OSError:
+        pass
+    if created_dir:
+        shutil.rmtree(created_dir, ignore_errors=True)
+
+
+class _SpillFile:
+    """Append-only record file, read back through a read-only mmap."""
+
+    def __init__(self, directory: str = "") -> None:
+        created_dir = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        else:
+            directory = created_dir = tempfile.mkdtemp(prefix="ew-undo-")
+        fd, self.path = tempfile.mkstemp(prefix="undo-", suffix=".spill", dir=directory)
+        self._handle = os.fdopen(fd, "w+b")
+        self._map: Optional[mmap.mmap] = None
+        self.size = 0
+        self._finalizer = weakref.finalize(self, _remove_spill_file, self._handle, self.path, created_dir)
+
+    def append(self, data: bytes) -> int:
+        offset = self.size
+        self._handle.seek(offset)
+        self._handle.write(data)
+        self.size += len(data)
+        return offset
+
+    def read(self, offset: int, length: int) -> bytes:
+        if self._map is None or offset + length > len(self._map):
+            self._handle.flush()
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map[offset:offset + length]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._finalizer()
+
+
+class _SpilledBlob:
+    __slots__ = ("offset", "length", "raw_length", "compressed")
+
+    def __init__(self, offset: int, length: int, raw_length: int, compressed: bool) -> None:
+        self.offset = offset
+        self.length = length
+        self.raw_length = raw_length
+        self.compressed = compressed
+
+
+class SnapshotStore:
+    """Reference-counted, content-addressed segment store with a disk tier.
+
+    Thread-safe. ``_lock`` guards the index and byte counters and is only
+    held across file I/O by the (rare) compaction; ``_file_lock`` serializes
+    access to the spill file and is always taken first.
+    """
+
+    def __init__(self, spill_dir: Optional[str] = None) -> None:
+        self._blobs: "OrderedDict[bytes, bytes]" = OrderedDict()  # memory tier, LRU first
+        self._spilled: Dict[bytes, _SpilledBlob] = {}
+        self._refs: Dict[bytes, int] = {}
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._spill_dir = spill_dir
+        self._file: Optional[_SpillFile] = None
+        self._dead_bytes = 0
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+
+    def _spill_directory(self) -> str:
+        if self._spill_dir is not None:
+            return self._spill_dir
+        return get_undo_spill_dir()
+
+    @property
+    def total_bytes(self) -> int:
+        return self.memory_bytes + self.disk_bytes
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def add(self, data: bytes) -> Manifest:
+        """Store data's segments and return the manifest that rebuilds it."""
+        return self.add_segments(digest_segments(data))
+
+    def add_segments(self, segments: List[Tuple[bytes, memoryview]]) -> Manifest:
+        """Store pre-hashed segments (see digest_segments)."""
+        keys = []
+        with self._lock:
+            for key, segment in segments:
+                if key in self._refs:
+                    self._refs[key] += 1
+                    if key in self._blobs:
+                        self._blobs.move_to_end(key)
+                else:
+                    self._blobs[key] = bytes(segment)
+                    self._refs[key] = 1
+                    self.memory_bytes += len(segment)
+                keys.append(key)
+        return tuple(keys)
+
+    def release(self, manifest: Manifest) -> int:
+        """Drop one reference per segment; return the bytes actually freed."""
+        freed = 0
+        with self._lock:
+            for key in manifest:
+                refs = self._refs.get(key, 0) - 1
+                if refs > 0:
+                    self._refs[key] = refs
+                    continue
+                if refs < 0:
+                    continue  # already dropped by clear()
+                del self._refs[key]
+                blob = self._blobs.pop(key, None)
+                if blob is not None:
+                    self.memory_bytes -= len(blob)
+                    freed += len(blob)
+                else:
+                    record = self._spilled.pop(key)
+                    self.disk_bytes -= record.length
+                    self._dead_bytes += record.length
+                    freed += record.length
+        return freed
+
+    def segments(self, manifest: Manifest) -> List[bytes]:
+        """Return the segments of a manifest, in order, from either tier."""
+        with self._file_lock:
+            with self._lock:
+                parts: List[Union[bytes, _SpilledBlob]] = []
+                for key in manifest:
+                    blob = self._blobs.get(key)
+                    parts.append(blob if blob is not None else self._spilled[key])
+            stored = [
+                part if isinstance(part, bytes)
+                else (self._file.read(part.offset, part.length), part.compressed)
+                for part in parts
+            ]
+        return [
+            part if isinstance(part, bytes) else (_decompress(part[0]) if part[1] else part[0])
+            for part in stored
+        ]
+
+    def materialize(self, manifest: Manifest) -> bytes:
+        """Rebuild the original bytes from a manifest."""
+        return b"".join(self.segments(manifest))
+
+    def spill(self, memory_limit: int) -> int:
+        """
+        Move least recently used segments to disk until the memory tier fits
+        memory_limit.
+
+        Returns:
+            Number of bytes moved out of memory
+
+        Raises:
+            OSError: if the spill file cannot be written
+        """
+        with self._file_lock:
+            with self._lock:
+                excess = self.memory_bytes - memory_limit
+                victims = []
+                for key, blob in self._blobs.items():
+                    if excess <= 0:
+                        break
+                    victims.append((key, blob))
+                    excess -= len(blob)
+            if not victims:
+                return 0
+
+            if self._file is None:
+                self._file = _SpillFile(self._spill_directory())
+            records = []
+            for key, blob in victims:
+                packed = _compress(blob)
+                compressed = len(packed) < len(blob)
+                if not compressed:
+                    packed = blob  # already-deflated part data rarely shrinks
+                offset = self._file.append(packed)
+                records.append((key, _SpilledBlob(offset, len(packed), len(blob), compressed)))
+
+            moved = 0
+            with self._lock:
+                for key, record in records:
+                    if self._blobs.pop(key, None) is None:
+                        self._dead_bytes += record.length  # released meanwhile
+                        continue
+                    self.memory_bytes -= record.raw_length
+                    moved += record.raw_length
+                    self._spilled[key] = record
+                    self.disk_bytes += record.length
+                if self._dead_bytes >= _SPILL_COMPACT_MIN_DEAD and self._dead_bytes > self.disk_bytes:
+                    self._compact()
+            return moved
+
+    def _compact(self) -> None:
+        """Rewrite the spill file with live records only (both locks held)."""
+        fresh = _SpillFile(self._spill_directory())
+        try:
+            offsets = [
+                fresh.append(self._file.read(record.offset, record.length))
+                for record in self._spilled.values()
+            ]
+        except BaseException:
+            fresh.close()
+            raise
+        for record, offset in zip(self._spilled.values(), offsets):
+            record.offset = offset
+        self._file.close()
+        self._file = fresh
+        self._dead_bytes = 0
+
+    def clear(self) -> None:
+        with self._file_lock, self._lock:
+            self._blobs.clear()
+            self._spilled.clear()
+            self._refs.clear()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._dead_bytes = 0
+            self.memory_bytes = 0
+            self.disk_bytes = 0
@@ -0,0 +1,204 @@
+"""
+Plain-text extraction straight from ``word/document.xml``.
+
+Building python-docx's object model (``Document``, ``doc.paragraphs``,
+``table.rows``/``row.cells``) just to read text is slow and keeps the whole
+tree in memory. ``iter_paragraphs`` instead streams the part with
+``lxml.etree.iterparse`` and clears each body element once it has been read,
+so memory stays flat however long the document is.
+
+Paragraph text follows python-docx's ``Paragraph.text`` exactly: the runs and
+hyperlinked runs directly under the ``w:p``, with tabs, breaks and
+non-breaking hyphens translated the same way. Paragraphs are produced in
+document order: body paragraphs (numbered as in ``doc.paragraphs``) and
+paragraphs of table cells, including nested tables, which are attributed to
+the enclosing top-level cell. Each cell is read once; horizontally merged
+cells are not repeated and vertically merged continuation cells are skipped.
+
+When the document is already parsed in memory (batch transaction, resident
+session document or parse cache) that tree is walked instead with
+``utils.body_walker.BodyWalker``, so unsaved session edits are always seen.
+"""
+
+from __future__ import annotations
+
+import zipfile
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from lxml import etree
+
+from word_document_server.utils.body_walker import BodyWalker, cell_layout
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY = _W + "body"
+_P = _W + "p"
+_R = _W + "r"
+_HYPERLINK = _W + "hyperlink"
+_TBL = _W + "tbl"
+_TR = _W + "tr"
+_TC = _W + "tc"
+_TCPR = _W + "tcPr"
+_T = _W + "t"
+_TAB = _W + "tab"
+_PTAB = _W + "ptab"
+_BR = _W + "br"
+_CR = _W + "cr"
+_NO_BREAK_HYPHEN = _W + "noBreakHyphen"
+_TYPE = _W + "type"
+
+_DOCUMENT_PART = "word/document.xml"
+_PACKAGE_RELS = "_rels/.rels"
+_RELATIONSHIP = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+_OFFICE_DOCUMENT_REL = "/officeDocument"
+
+
+class ParagraphText(NamedTuple):
+    """One paragraph's text and where it sits in the document."""
+
+    text: str
+    paragraph_index: Optional[int]  # index in doc.paragraphs, body paragraphs only
+    cell: Optional[Tuple[int, int, int]]  # (table, row, column) of the top-level cell
+
+
+def run_text(run) -> str:
+    parts: List[str] = []
+    for child in run:
+        tag = child.tag
+        if tag == _T:
+            parts.append(child.text or "")
+        elif tag == _TAB or tag == _PTAB:
+            parts.append("\t")
+        elif tag == _BR:
+            if child.get(_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == _CR:
+            parts.append("\n")
+        elif tag == _NO_BREAK_HYPHEN:
+            parts.append("-")
+    return "".join(parts)
+
+
+def paragraph_text(p) -> str:
+    """Text of a ``w:p`` element, identical to python-docx's ``Paragraph.text``."""
+    parts: List[str] = []
+    for child in p:
+        if child.tag == _R:
+            parts.append(run_text(child))
+        elif child.tag == _HYPERLINK:
+            parts.extend(run_text(run) for run in child if run.tag == _R)
+    return "".join(parts)
+
+
+def iter_body_paragraphs(doc, include_tables: bool = True) -> Iterator[ParagraphText]:
+    """Walk an already-parsed ``Document`` in document order."""
+    for item in BodyWalker(doc).paragraphs:
+        if item.cell is None:
+            yield ParagraphText(paragraph_text(item.element), item.paragraph_index, None)
+        elif include_tables:
+            yield ParagraphText(paragraph_text(item.element), None, item.cell.location)
+
+
+def _drop_read(elem) -> None:
+    """Free an element and everything before it under the same parent."""
+    elem.clear(keep_tail=True)
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def _stream(source, include_tables: bool) -> Iterator[ParagraphText]:
+    paragraph_idx = 0
+    table_idx = -1
+    row_idx = -1
+    depth = 0  # table nesting depth
+    cells: List[List] = []  # per open w:tc: [column, span, skip]
+    column = 0
+    events = etree.iterparse(
+        source,
+        events=("start", "end"),
+        tag=(_P, _TBL, _TR, _TC, _TCPR),
+        resolve_entities=False,
+        huge_tree=True,
+    )
+    for event, elem in events:
+        tag = elem.tag
+        if event == "start":
+            if tag == _TBL:
+                depth += 1
+                if depth == 1:
+                    table_idx += 1
+                    row_idx = -1
+            elif tag == _TR and depth == 1:
+                row_idx += 1
+                column = 0
+            elif tag == _TC:
+                cells.append([column if depth == 1 else None, 1, bool(cells) and cells[-1][2]])
+            continue
+
+        if tag == _P:
+            parent = elem.getparent()
+            parent_tag = parent.tag if parent is not None else None
+            if parent_tag == _BODY:
+                yield ParagraphText(paragraph_text(elem), paragraph_idx, None)
+                paragraph_idx += 1
+                _drop_read(elem)
+            elif parent_tag == _TC and include_tables and cells and not cells[-1][2]:
+                yield ParagraphText(paragraph_text(elem), None, (table_idx, row_idx, cells[0][0]))
+        elif tag == _TCPR:
+            if cells and elem.getparent() is not None and elem.getparent().tag == _TC:
+                span, continuation = cell_layout(elem.getparent())
+                cells[-1][1] = span
+                cells[-1][2] = cells[-1][2] or continuation
+        elif tag == _TC:
+            _, span, _ = cells.pop()
+            if depth == 1:
+                column += span
+        elif tag == _TR:
+            if depth == 1:
+                _drop_read(elem)
+        elif tag == _TBL:
+            depth -= 1
+            if depth == 0:
+                _drop_read(elem)
+
+
+def _main_part_name(zf: zipfile.ZipFile) -> str:
+    """Member name of the main document part, per the package relationships."""
+    try:
+        rels = etree.fromstring(zf.read(_PACKAGE_RELS), etree.XMLParser(resolve_entities=False))
+    except (KeyError, etree.XMLSyntaxError):
+        return _DOCUMENT_PART
+    for rel in rels.iter(_RELATIONSHIP):
+        if rel.get("Type", "").endswith(_OFFICE_DOCUMENT_REL) and rel.get("TargetMode") != "External":
+            return rel.get("Target", _DOCUMENT_PART).lstrip("/")
+    return _DOCUMENT_PART
+
+
+def iter_paragraphs(doc_path: str, include_tables: bool = True) -> Iterator[ParagraphText]:
+    """
+    Yield the text of every paragraph of a .docx in document order.
+
+    Args:
+        doc_path: Path to the Word document
+        include_tables: Also yield paragraphs inside tables
+
+    Raises:
+        OSError, zipfile.BadZipFile, KeyError, etree.XMLSyntaxError: if the
+            file cannot be read as a Word document
+    """
+    from word_document_server.utils.session_utils import get_loaded_document
+
+    doc = get_loaded_document(doc_path)
+    if doc is not None:
+        yield from iter_body_paragraphs(doc, include_tables)
+        return
+    with zipfile.ZipFile(doc_path) as zf:
+        with zf.open(_main_part_name(zf)) as part:
+            yield from _stream(part, include_tables)
+
+
+def iter_paragraph_texts(doc_path: str, include_tables: bool = True) -> Iterator[str]:
+    """Like iter_paragraphs, yielding only the text."""
+    for paragraph in iter_paragraphs(doc_path, include_tables):
+        yield paragraph.text
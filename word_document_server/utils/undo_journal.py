@@ -0,0 +1,360 @@
+"""
+Append-only on-disk undo journal (enabled by EW_UNDO_JOURNAL_DIR).
+
+Each resolved document path gets its own directory under the journal root,
+named by a hash of the path, holding two files:
+
+* ``journal.<generation>.pack`` – content-addressed snapshot segments (see
+  utils.snapshot_store), each written once, in append order.
+* ``journal.idx`` – a header naming the current pack, then one JSON record
+  per line describing pack entries and every undo/redo stack operation in
+  order (``push``, ``pop`` from the top, ``drop`` from the bottom, ``clear``).
+
+Replaying the index rebuilds the stacks as manifests without touching the
+pack, so loading a path's history after a restart is cheap and happens only
+when that path is first used. Segment data is read from the pack on demand.
+A torn trailing record (crash mid-append) ends the replay.
+
+When the journal outgrows EW_UNDO_JOURNAL_MAX_BYTES it is compacted: the
+index is rewritten as the current stacks and the pack keeps only referenced
+segments; if that is still too large, the oldest snapshots are dropped.
+Compaction writes a new pack generation and then atomically replaces the
+index, so a crash at any point leaves either the old or the new journal.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+from word_document_server.utils.snapshot_store import Manifest
+
+_INDEX_NAME = "journal.idx"
+_FORMAT_VERSION = 1
+
+# Rewrite the index once it holds this many records per live snapshot.
+_INDEX_RECORDS_PER_SNAPSHOT = 8
+
+Segments = List[Tuple[bytes, memoryview]]
+
+
+def journal_directory(root: str, resolved_path: str) -> str:
+    """Directory holding the journal for resolved_path under root."""
+    name = hashlib.sha256(resolved_path.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(root, name)
+
+
+class UndoJournal:
+    """Persistent mirror of one document's undo/redo stacks.
+
+    Callers serialize mutations per document (UndoManager holds the path's
+    lock); reads of pack data may come from any thread.
+    """
+
+    def __init__(self, root: str, resolved_path: str, max_bytes: int) -> None:
+        self.path = resolved_path
+        self.directory = journal_directory(root, resolved_path)
+        self.max_bytes = max_bytes
+        self._index_path = os.path.join(self.directory, _INDEX_NAME)
+        self._generation = 0
+        self._pack_path = self._pack_file(0)
+        self._lock = threading.Lock()
+        self._blobs: Dict[bytes, Tuple[int, int]] = {}  # key -> (offset, length)
+        self._stacks: Dict[str, Deque[Manifest]] = {"undo": deque(), "redo": deque()}
+        self._pack_size = 0
+        self._index_size = 0
+        self._records = 0
+        self._loaded = False
+        self._initialized = False  # files on disk match the in-memory state
+        self.enabled = True
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _pack_file(self, generation: int) -> str:
+        return os.path.join(self.directory, f"journal.{generation}.pack")
+
+    def load(self) -> Tuple[List[Manifest], List[Manifest]]:
+        """Replay the index and return (undo, redo) manifests, oldest first."""
+        with self._lock:
+            if not self._loaded:
+                self._replay()
+                self._loaded = True
+            return list(self._stacks["undo"]), list(self._stacks["redo"])
+
+    def _replay(self) -> None:
+        try:
+            with open(self._index_path, "rb") as f:
+                lines = f.read().split(b"\n")
+        except OSError:
+            return  # no history yet; files are created on the first write
+
+        valid_bytes = 0
+        header_ok = False
+        for line in lines[:-1]:  # the last element is empty or a torn record
+            try:
+                record = json.loads(line)
+                if not header_ok:
+                    if record.get("path") != self.path or record.get("version") != _FORMAT_VERSION:
+                        break
+                    self._generation = int(record["pack"])
+                    self._pack_path = self._pack_file(self._generation)
+                    self._pack_size = os.path.getsize(self._pack_path)
+                    header_ok = True
+                else:
+                    self._apply(record)
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError, OSError):
+                break
+            valid_bytes += len(line) + 1
+            self._records += 1
+
+        if not header_ok:
+            # Unreadable or foreign journal: start afresh on the first write.
+            self._blobs.clear()
+            for stack in self._stacks.values():
+                stack.clear()
+            return
+        self._initialized = True
+        self._remove_stale_packs()
+        self._index_size = valid_bytes
+        if valid_bytes != os.path.getsize(self._index_path):
+            # Cut a torn tail so later appends start on a record boundary.
+            with open(self._index_path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+    def _apply(self, record: Dict) -> None:
+        op = record["op"]
+        if op == "blob":
+            offset, length = int(record["offset"]), int(record["length"])
+            if offset + length > self._pack_size:
+                raise ValueError("blob beyond end of pack")
+            self._blobs[bytes.fromhex(record["key"])] = (offset, length)
+        elif op == "push":
+            manifest = tuple(bytes.fromhex(key) for key in record["manifest"])
+            if any(key not in self._blobs for key in manifest):
+                raise KeyError("push references an unknown blob")
+            self._stacks[record["stack"]].append(manifest)
+        elif op == "pop":
+            self._stacks[record["stack"]].pop()
+        elif op == "drop":
+            self._stacks[record["stack"]].popleft()
+        elif op == "clear":
+            self._stacks[record["stack"]].clear()
+        else:
+            raise ValueError(f"unknown journal op {op!r}")
+
+    def _reset_files(self) -> None:
+        """Create an empty journal on disk, discarding anything unreadable."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self._blobs.clear()
+        self._generation = 0
+        self._pack_path = self._pack_file(0)
+        open(self._pack_path, "wb").close()
+        self._pack_size = 0
+        self._index_size = 0
+        self._records = 0
+        self._write_index([self._header()], mode="wb")
+        self._initialized = True
+
+    # ------------------------------------------------------------------
+    # Appending
+    # ------------------------------------------------------------------
+
+    def _header(self) -> Dict:
+        return {"op": "open", "path": self.path, "version": _FORMAT_VERSION, "pack": self._generation}
+
+    def _remove_stale_packs(self) -> None:
+        """Delete pack generations left behind by an interrupted compaction."""
+        current = os.path.basename(self._pack_path)
+        for name in os.listdir(self.directory):
+            if name.endswith(".pack") and name != current:
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _write_index(self, records: List[Dict], mode: str = "ab") -> None:
+        payload = b"".join(
+            json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n" for record in records
+        )
+        with open(self._index_path, mode) as f:
+            f.write(payload)
+        self._index_size = len(payload) if mode == "wb" else self._index_size + len(payload)
+        self._records = len(records) if mode == "wb" else self._records + len(records)
+
+    def _append_blobs(self, segments: Segments) -> List[Dict]:
+        """Write segments missing from the pack; return their index records."""
+        records = []
+        fresh = [(key, data) for key, data in segments if key not in self._blobs]
+        if not fresh:
+            return records
+        with open(self._pack_path, "ab") as f:
+            for key, data in fresh:
+                if key in self._blobs:
+                    continue  # repeated within this snapshot
+                offset = self._pack_size
+                f.write(data)
+                self._pack_size += len(data)
+                self._blobs[key] = (offset, len(data))
+                records.append({"op": "blob", "key": key.hex(), "offset": offset, "length": len(data)})
+        return records
+
+    def record(self, operations: List[Tuple]) -> int:
+        """
+        Append stack operations, then enforce the size cap.
+
+        Args:
+            operations: ("push", stack, segments), ("pop", stack),
+                ("drop", stack) or ("clear", stack) tuples, in order
+
+        Returns:
+            Number of oldest undo snapshots dropped to honour the size cap;
+            the caller drops the same number from its own undo stack.
+
+        Raises:
+            OSError: if the journal cannot be written (it is then disabled)
+        """
+        with self._lock:
+            if not self.enabled:
+                return 0
+            try:
+                if not self._initialized:
+                    self._reset_files()
+                records: List[Dict] = []
+                for operation in operations:
+                    op, stack = operation[0], operation[1]
+                    if op == "push":
+                        segments = operation[2]
+                        records.extend(self._append_blobs(segments))
+                        manifest = tuple(key for key, _ in segments)
+                        self._stacks[stack].append(manifest)
+                        records.append({"op": "push", "stack": stack, "manifest": [k.hex() for k in manifest]})
+                    else:
+                        self._apply({"op": op, "stack": stack})
+                        records.append({"op": op, "stack": stack})
+                self._write_index(records)
+                return self._enforce_limits()
+            except OSError:
+                # The index no longer mirrors the stacks; make sure a restart
+                # does not replay it. The pack stays readable for this process.
+                self.enabled = False
+                try:
+                    os.unlink(self._index_path)
+                except OSError:
+                    pass
+                raise
+
+    # ------------------------------------------------------------------
+    # Size control
+    # ------------------------------------------------------------------
+
+    @property
+    def size(self) -> int:
+        return self._pack_size + self._index_size
+
+    def _live_snapshots(self) -> int:
+        return len(self._stacks["undo"]) + len(self._stacks["redo"])
+
+    def _enforce_limits(self) -> int:
+        dropped = 0
+        if self.size > self.max_bytes:
+            # Size the compacted journal in memory and drop the oldest
+            # snapshots until it fits, so the pack is rewritten only once.
+            while self._stacks["undo"] and self._compacted_size() > self.max_bytes:
+                self._stacks["undo"].popleft()
+                dropped += 1
+            self._compact()
+        elif self._records > _INDEX_RECORDS_PER_SNAPSHOT * (self._live_snapshots() + 1) + 64:
+            self._compact()
+        return dropped
+
+    def _compacted_layout(self) -> Tuple[Dict[bytes, Tuple[int, int]], List[Tuple[int, int]], List[Dict], bytes]:
+        """
+        Pack and index of a compaction of the current stacks, without I/O.
+
+        Returns (blobs, copies, records, payload): the new blob locations, the
+        (old offset, length) ranges to copy into the new pack in order, the
+        index records and their serialised form.
+        """
+        live = {key for stack in self._stacks.values() for manifest in stack for key in manifest}
+        generation = self._generation + 1
+        blobs: Dict[bytes, Tuple[int, int]] = {}
+        copies: List[Tuple[int, int]] = []
+        records: List[Dict] = [
+            {"op": "open", "path": self.path, "version": _FORMAT_VERSION, "pack": generation}
+        ]
+        offset = 0
+        for key, (old_offset, length) in self._blobs.items():
+            if key not in live:
+                continue
+            copies.append((old_offset, length))
+            blobs[key] = (offset, length)
+            records.append({"op": "blob", "key": key.hex(), "offset": offset, "length": length})
+            offset += length
+        for name, stack in self._stacks.items():
+            for manifest in stack:
+                records.append({"op": "push", "stack": name, "manifest": [k.hex() for k in manifest]})
+        payload = b"".join(
+            json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n" for record in records
+        )
+        return blobs, copies, records, payload
+
+    def _compacted_size(self) -> int:
+        _, copies, _, payload = self._compacted_layout()
+        return sum(length for _, length in copies) + len(payload)
+
+    def _compact(self) -> None:
+        """Rewrite pack and index with only what the current stacks reference."""
+        blobs, copies, records, payload = self._compacted_layout()
+        generation = self._generation + 1
+        pack_path = self._pack_file(generation)
+        index_tmp = self._index_path + ".tmp"
+        offset = 0
+        with open(self._pack_path, "rb") as src, open(pack_path, "wb") as dst:
+            for old_offset, length in copies:
+                src.seek(old_offset)
+                dst.write(src.read(length))
+                offset += length
+        with open(index_tmp, "wb") as f:
+            f.write(payload)
+        # Commit point: the index names the pack generation it belongs to.
+        os.replace(index_tmp, self._index_path)
+        old_pack = self._pack_path
+        self._generation = generation
+        self._pack_path = pack_path
+        self._blobs = blobs
+        self._pack_size = offset
+        self._index_size = len(payload)
+        self._records = len(records)
+        try:
+            os.unlink(old_pack)
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def materialize(self, manifest: Manifest) -> bytes:
+        """Rebuild file bytes for a journaled manifest from the pack."""
+        with self._lock:
+            locations = [self._blobs[key] for key in manifest]
+            with open(self._pack_path, "rb") as f:
+                parts = []
+                for offset, length in locations:
+                    f.seek(offset)
+                    parts.append(f.read(length))
+        return b"".join(parts)
+
+    def delete(self) -> None:
+        """Forget this document's history on disk."""
+        with self._lock:
+            self.enabled = False
+            shutil.rmtree(self.directory, ignore_errors=True)